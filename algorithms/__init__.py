@@ -1,7 +1,15 @@
+from .stopping import StoppingCriterion, GreedyRollout, QDelta, RewardPlateau, makeStoppingCriteria
 from .algorithm import AlgorithmType, Algorithm
+from .q_table import QTable, SparseQTable, IndexedQTable, makeQTable, warmStart
+from .action_selection import maskedArgmax, maskedSample
+from .batched import tdUpdate, vecEnvOf
+from .replay_buffer import ReplayBuffer
+from .planning import DynaPlanner, PrioritizedSweeping, makePlanner
 from .double_q_learning import DoubleQLearning
 from .q_learning import QLearning
+from .parallel_q_learning import ParallelQLearning
 from .sarsa import Sarsa
+from .dynamic_programming import ValueIteration, PolicyIteration
 from .ppo import Ppo
 
-__all__ = ['AlgorithmType', 'Algorithm', 'Sarsa', 'QLearning', 'DoubleQLearning', 'Ppo']
\ No newline at end of file
+__all__ = ['StoppingCriterion', 'GreedyRollout', 'QDelta', 'RewardPlateau', 'makeStoppingCriteria', 'AlgorithmType', 'Algorithm', 'QTable', 'SparseQTable', 'IndexedQTable', 'makeQTable', 'warmStart', 'maskedArgmax', 'maskedSample', 'tdUpdate', 'vecEnvOf', 'ReplayBuffer', 'DynaPlanner', 'PrioritizedSweeping', 'makePlanner', 'Sarsa', 'ValueIteration', 'PolicyIteration', 'QLearning', 'ParallelQLearning', 'DoubleQLearning', 'Ppo']
\ No newline at end of file
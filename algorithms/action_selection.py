@@ -0,0 +1,41 @@
+import numpy as np
+
+
+def maskedArgmax(values, mask):
+    """
+    Returns the valid action with the highest value, ties broken at random
+
+    Works on a single row or on a batch of rows, one action per row. A row
+    with no valid action returns a random action.
+
+    values : array of doubles
+        - Q-values, (num_actions,) or (N, num_actions)
+
+    mask : array of bool
+        - True for the valid actions, same shape as values
+    """
+    if values.ndim == 1:
+        # Single row, only look at the valid actions
+        valid = np.flatnonzero(mask)
+        if len(valid) == 0:
+            return np.random.randint(len(values))
+        validValues = values[valid]
+        best = valid[validValues == validValues.max()]
+        return best[0] if len(best) == 1 else best[int(np.random.random() * len(best))]
+
+    masked = np.where(mask, values, -np.inf)
+    best = masked == masked.max(axis=-1, keepdims=True)
+    return np.argmax(best * np.random.random(best.shape), axis=-1)
+
+
+def maskedSample(mask):
+    """
+    Returns a valid action drawn uniformly at random
+
+    Works on a single mask or on a batch of masks, one action per row. A row
+    with no valid action returns action 0.
+
+    mask : array of bool
+        - True for the valid actions, (num_actions,) or (N, num_actions)
+    """
+    return np.argmax(mask * np.random.random(mask.shape), axis=-1)
@@ -1,6 +1,17 @@
+# -- Imports -- #
+
+import os
+import random
+import numpy as np
+
 # -- Personal Imports -- #
 
 from enum import Enum
+from algorithms.q_table import makeQTable, warmStart
+from algorithms.checkpoint import Checkpoint
+from algorithms.batched import vecEnvOf
+from algorithms.stopping import makeStoppingCriteria
+from utils import Logger, EpisodeStats
 
 
 class AlgorithmType(Enum):
@@ -9,6 +20,11 @@ class AlgorithmType(Enum):
     """
     VANILLA = 0
     STABLE_BASELINES_PPO = 1
+    DYNAMIC_PROGRAMMING = 2
+
+# Params that do not change what is learned, a checkpoint resumes with other values
+RESUME_FREE_PARAMS = ('num_episodes', 'checkpoint_every', 'checkpoint_dir', 'log_name', 'log_format', 'log_chunk',
+                      'log_flush_seconds', 'stop_when')
 
 class Algorithm:
     """
@@ -46,6 +62,66 @@ class Algorithm:
     exploration_decay_rate = double # Decay Rate
         - Decay rate value to be used in the algorithm (Decay rate value)
 
+    q_table_kind : str
+        - "sparse" (default) allocates Q-table rows on the first visit, "dense" allocates every state up front,
+          "memmap" allocates every state in a np.memmap file under checkpoint_dir
+
+    checkpoint_every : int
+        - number of episodes between checkpoints, 0 (default) disables them
+
+    checkpoint_dir : str
+        - directory holding the checkpoints, one sub directory per algorithm (default "checkpoints")
+
+    log_name : str
+        - suffix added to the log file names, keeps the logs of parallel runs apart
+
+    num_envs : int
+        - number of boards stepped together by a BallSortVecEnv, with updates applied
+          in batches, 1 (default) runs the episodes one after the other
+
+    log_format : str
+        - format of the -all log, "csv" (default) or "npy", see Logger
+
+    log_chunk : int
+        - number of episodes buffered before the -all log is written (default 4096)
+
+    log_flush_seconds : double
+        - maximum number of seconds an episode stays buffered (default 10)
+
+    stats : EpisodeStats
+        - online statistics of the episode rewards, a row is written to the -avg log every
+          "avg_window" episodes (default 100), with the "ema_alpha" moving average (default 0.01)
+          and the estimated "quantiles" (default [0.5])
+
+    warm_start : str
+        - path (without .npy) of a saved Q-table copied into every new Q-table, see warmStart
+
+    tolerance : double
+        - dynamic programming stops once no state value changes by more than this (default 1e-6)
+
+    max_iterations : int
+        - maximum number of dynamic programming sweeps (default 10000)
+
+    q_table_file : str
+        - path (without .npy) where dynamic programming saves its Q-table, not saved by default
+
+    callbacks : list of functions
+        - functions called after every episode, see addCallback
+
+    stop_when : dict
+        - stopping criteria added to the callbacks, see makeStoppingCriteria: "greedy" stops
+          once the greedy policy solves the board, "q_delta" once the Q-values barely change,
+          "plateau" once the average reward stops improving
+
+    stopping : list of StoppingCriterion
+        - criteria of stop_when, their progress is saved with the checkpoints
+
+    stop_reason : str
+        - why a callback stopped the training, None if it ran every episode
+
+    stopped_by : function
+        - callback that stopped the training, None if it ran every episode
+
 
     clip_range : double
         - learning rate range : 0.003 to 5e-6
@@ -98,6 +174,11 @@ class Algorithm:
         self.render = render
         self.verbose = verbose
 
+        # Episode callbacks
+        self.callbacks = []
+        self.stop_reason = None
+        self.stopped_by = None
+
         # Define Hyper Parameters
         missingValues = False
         
@@ -123,6 +204,52 @@ class Algorithm:
             self.max_exploration_rate = data['max_exploration_rate'] # Max Epsilon
             self.min_exploration_rate = data['min_exploration_rate'] # Min Epsilon
             self.exploration_decay_rate = data['exploration_decay_rate'] # Decay Rate
+            self.q_table_kind = data.get('q_table', 'sparse')
+            self.checkpoint_every = data.get('checkpoint_every', 0)
+            self.checkpoint = Checkpoint(os.path.join(data.get('checkpoint_dir', 'checkpoints'), type(self).__name__), self.runConfig(data))
+            self.start_episode = 0
+            self.log_name = data.get('log_name')
+            self.num_envs = data.get('num_envs', 1)
+            self.warm_start = data.get('warm_start')
+            self.log_format = data.get('log_format', 'csv')
+            self.log_chunk = data.get('log_chunk', 4096)
+            self.log_flush_seconds = data.get('log_flush_seconds', 10)
+            self.stats = EpisodeStats(data.get('avg_window', 100), data.get('ema_alpha', 0.01), data.get('quantiles', [0.5]))
+
+            if self.q_table_kind not in ('dense', 'sparse', 'memmap'):
+                print("q_table should be dense, sparse or memmap. More on readme")
+                exit(-1)
+            if self.log_format not in Logger.formats:
+                print("log_format should be csv or npy. More on readme")
+                exit(-1)
+
+            try:
+                self.stop_when = data.get('stop_when', {})
+                self.stopping = makeStoppingCriteria(self.stop_when, self.max_steps_per_episode)
+                for criterion in self.stopping:
+                    self.addCallback(criterion)
+            except ValueError:
+                print("stop_when criteria should be greedy, q_delta or plateau. More on readme")
+                exit(-1)
+        elif algorithmType == AlgorithmType.DYNAMIC_PROGRAMMING:
+            if 'discount_rate' not in data:
+                print("Missing values in JSON File. More on readme")
+                exit(-1)
+
+            self.discount_rate = data['discount_rate'] # Gamma
+            self.tolerance = data.get('tolerance', 1e-6)
+            self.max_iterations = data.get('max_iterations', 10000)
+            self.q_table_kind = data.get('q_table', 'sparse')
+            self.q_table_file = data.get('q_table_file')
+            self.checkpoint = Checkpoint(os.path.join(data.get('checkpoint_dir', 'checkpoints'), type(self).__name__))
+            self.warm_start = None
+
+            if self.discount_rate >= 1:
+                print("discount_rate should be below 1 for dynamic programming. More on readme")
+                exit(-1)
+            if self.q_table_kind not in ('dense', 'sparse', 'memmap'):
+                print("q_table should be dense, sparse or memmap. More on readme")
+                exit(-1)
         else:
             if 'learning_rate' not in data: missingValues = True
             if 'clip_range' not in data: missingValues = True
@@ -148,4 +275,282 @@ class Algorithm:
             self.vf_coef = data['vf_coef']
             self.num_cpu = data['num_cpu']
             self.num_episodes = data['num_episodes']
-            self.iteration_test = data['iteration_test']
\ No newline at end of file
+            self.iteration_test = data['iteration_test']
+
+    def runConfig(self, data):
+        """
+        Returns what a checkpoint must have been trained with to be resumed: the
+        algorithm, the board and environment, and every param but the ones in
+        RESUME_FREE_PARAMS, which can change between runs
+        """
+        env = self.env.unwrapped
+        return {'algorithm' : type(self).__name__,
+                'board' : env.orig_board,
+                'max_steps' : env.max_steps,
+                'backend' : env.backend,
+                'symmetry' : env.symmetry,
+                'param' : {key: value for key, value in data.items() if key not in RESUME_FREE_PARAMS},
+        }
+
+    def newQTable(self, name):
+        """
+        Builds an empty Q-table sized to the environment, filled from warm_start when set
+
+        name : str
+            - name of the table in the checkpoints
+        """
+        filename = self.checkpoint.workFile(name) if self.q_table_kind == 'memmap' else None
+        table = makeQTable(self.q_table_kind, self.env.observation_space.n, self.env.action_space.n, filename)
+        if self.warm_start:
+            warmStart(table, self.warm_start)
+        return table
+
+    def newLogger(self, name):
+        """
+        Builds the logger of the algorithm
+
+        name : str
+            - algorithm name, prefix of the log files
+        """
+        return Logger(name, self.log_name, self.log_format, self.log_chunk, self.log_flush_seconds)
+
+    def qTables(self):
+        """
+        Returns the Q-tables of the algorithm by name, saved in the checkpoints
+        """
+        return {}
+
+    def extraState(self):
+        """
+        Returns anything else a subclass needs to resume, pickled with the checkpoints
+        """
+        return None
+
+    def restoreExtraState(self, state):
+        """
+        Continues from a state returned by extraState
+        """
+        pass
+
+    def batchActions(self, states, masks):
+        """
+        Chooses an action for every board of a batch, see runBatched
+
+        states : array of int
+            - state of every board
+
+        masks : array of bool
+            - (N, num_actions) valid actions of every board
+        """
+        raise NotImplementedError
+
+    def batchUpdate(self, states, actions, rewards, nextStates, dones, nextActions):
+        """
+        Applies the updates of a batch of transitions, see runBatched
+
+        nextStates : array of int
+            - state reached by every transition, before any reset
+
+        dones : array of bool
+            - true when the transition ended the game
+
+        nextActions : array of int
+            - action chosen in every next state, ended games included
+        """
+        raise NotImplementedError
+
+    def runBatched(self):
+        """
+        Runs the episodes on num_envs boards stepped together
+
+        Every step chooses the actions of all the boards with batchActions and
+        applies all the updates with batchUpdate. Each board counts as one
+        episode when it ends or reaches max_steps_per_episode, and the
+        exploration rate decays after every finished episode, as in the
+        sequential run. Only the list backend without symmetry is supported.
+        """
+        # BallSortVecEnv has its own board engine, the same as the list backend
+        if self.env.unwrapped.symmetry:
+            Logger.error("num_envs can't be used with symmetry. More on readme")
+            exit(-1)
+        if self.env.unwrapped.backend != 'list':
+            Logger.error("num_envs can't be used with the {} backend. More on readme".format(self.env.unwrapped.backend))
+            exit(-1)
+
+        vecEnv = vecEnvOf(self.env, self.num_envs)
+        states = vecEnv.reset()
+        actions = self.batchActions(states, vecEnv.masks)
+        steps = np.zeros(self.num_envs, dtype=np.int64)
+        rewards_current_episodes = np.zeros(self.num_envs, dtype=np.int64)
+
+        episode = self.start_episode
+        while episode < self.num_episodes:
+            new_states, rewards, dones, infos = vecEnv.step(actions)
+            steps += 1
+            rewards_current_episodes += rewards.astype(np.int64)
+
+            # Finished games are already reset, learn from their last state and from an action chosen
+            # there, as the sequential updates do: the episode length is not a terminal state
+            next_actions = self.batchActions(new_states, vecEnv.masks)
+            nextStates, nextActions = new_states.copy(), next_actions.copy()
+            finished = np.flatnonzero(dones)
+            if len(finished):
+                nextStates[finished] = [infos[idx]["terminal_observation"] for idx in finished]
+                nextActions[finished] = self.batchActions(nextStates[finished],
+                                                          np.array([infos[idx]["terminal_action_mask"] for idx in finished]))
+            self.batchUpdate(states, actions, rewards, nextStates, dones, nextActions)
+
+            # Games reaching the episode length start over
+            truncated = np.flatnonzero(~dones & (steps >= self.max_steps_per_episode))
+            if len(truncated):
+                new_states[truncated] = vecEnv.resetAt(truncated)
+                next_actions[truncated] = self.batchActions(new_states[truncated], vecEnv.masks[truncated])
+
+            for idx in np.flatnonzero(dones | (steps >= self.max_steps_per_episode)):
+                if episode >= self.num_episodes:
+                    break
+                rewards_current_episode = int(rewards_current_episodes[idx])
+                solved = bool(dones[idx] and infos[idx]["solved"])
+                epsilon = self.exploration_rate
+                if self.verbose: Logger.newEpisode(episode)
+
+                # Exploration rate decay
+                self.exploration_rate = self.min_exploration_rate + \
+                    (self.max_exploration_rate - self.min_exploration_rate) * np.exp(-self.exploration_decay_rate * episode)
+
+                self.logEpisode(episode, rewards_current_episode, int(steps[idx]), solved, epsilon)
+                episode += 1
+                if not self.endEpisode(episode - 1, rewards_current_episode):
+                    return
+                self.saveCheckpoint(episode - 1)
+
+                steps[idx] = 0
+                rewards_current_episodes[idx] = 0
+
+            states, actions = new_states, next_actions
+
+    def logEpisode(self, episode, reward, steps, solved, epsilon):
+        """
+        Records a finished episode in the episode log and the online
+        statistics, writing an -avg row every avg_window episodes
+
+        steps : int
+            - number of steps played
+
+        solved : bool
+            - True when the episode ended on the goal
+
+        epsilon : double
+            - exploration rate used during the episode
+        """
+        self.logger.writeLog(episode, reward, steps, solved, epsilon)
+
+        if self.stats.add(reward):
+            self.logger.writeAvg(self.stats.columns(), self.stats.row())
+            if self.verbose: Logger.printAvgRewards(self.stats.count, self.stats.window.mean)
+
+    def addCallback(self, callback):
+        """
+        Adds a function called after every episode
+
+        callback : function
+            - callback(algorithm, episode, reward) returning None to continue
+              training, or a message saying why the training should stop
+        """
+        self.callbacks.append(callback)
+
+    def endEpisode(self, episode, reward):
+        """
+        Runs the callbacks after an episode
+
+        episode : int
+            - episode that just finished
+
+        reward : int
+            - total reward of the episode
+
+        Returns
+        -------
+
+        bool - False when a callback stops the training
+        """
+        for callback in self.callbacks:
+            reason = callback(self, episode, reward)
+            if reason is not None:
+                self.stop_reason = reason
+                self.stopped_by = callback
+                return False
+        return True
+
+    def saveCheckpoint(self, episode):
+        """
+        Saves a checkpoint every checkpoint_every episodes
+
+        episode : int
+            - episode that just finished
+        """
+        if not self.checkpoint_every or (episode + 1) % self.checkpoint_every != 0:
+            return
+
+        state = {
+            'episode' : episode,
+            'exploration_rate' : self.exploration_rate,
+            'random' : random.getstate(),
+            'numpy' : np.random.get_state(),
+            'action_space' : getRngState(self.env.action_space.np_random),
+            'stats' : self.stats,
+            'stopping' : (self.stop_when, [criterion.state() for criterion in self.stopping]),
+            'extra' : self.extraState(),
+        }
+        self.checkpoint.save(episode, self.qTables(), state)
+
+    def resume(self):
+        """
+        Loads the last checkpoint, run() then continues after its episode
+
+        Returns
+        -------
+
+        bool - False if there was no checkpoint to resume from
+        """
+        try:
+            state = self.checkpoint.restore(self.qTables())
+        except ValueError as error:
+            Logger.error("{}. Change checkpoint_dir or remove it to start over.".format(error))
+            exit(-1)
+        if state is None:
+            return False
+
+        self.stats = state['stats']
+
+        # The criteria start over when stop_when changed
+        stop_when, progress = state['stopping']
+        if stop_when == self.stop_when:
+            for criterion, criterionState in zip(self.stopping, progress):
+                criterion.restore(criterionState)
+        self.start_episode = state['episode'] + 1
+        self.exploration_rate = state['exploration_rate']
+        random.setstate(state['random'])
+        np.random.set_state(state['numpy'])
+        setRngState(self.env.action_space.np_random, state['action_space'])
+        self.restoreExtraState(state['extra'])
+        return True
+
+
+def getRngState(rng):
+    """
+    Returns the state of a np.random.RandomState or np.random.Generator
+    """
+    if hasattr(rng, 'get_state'):
+        return rng.get_state()
+    return rng.bit_generator.state
+
+
+def setRngState(rng, state):
+    """
+    Restores a state returned by getRngState
+    """
+    if hasattr(rng, 'set_state'):
+        rng.set_state(state)
+    else:
+        rng.bit_generator.state = state
@@ -0,0 +1,38 @@
+import numpy as np
+
+from gym_game.envs.ball_sort_vec_env import BallSortVecEnv
+
+
+def tdUpdate(values, rows, actions, targets, learning_rate):
+    """
+    Moves a batch of Q-values towards their targets
+
+    Pairs (row, action) appearing k times in the batch are updated once with
+    the mean of their targets and a step of 1 - (1 - learning_rate) ** k, the
+    result of k sequential updates towards that mean.
+
+    values : array of doubles
+        - (num_rows, num_actions) Q-values, updated in place
+
+    rows, actions : arrays of int
+        - row and action of each transition
+
+    targets : array of doubles
+        - TD target of each transition
+    """
+    keys = rows * values.shape[1] + actions
+    unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    means = np.bincount(inverse, weights=targets, minlength=len(unique)) / counts
+
+    uniqueRows, uniqueActions = np.divmod(unique, values.shape[1])
+    current = values[uniqueRows, uniqueActions]
+    values[uniqueRows, uniqueActions] = current + (1 - (1 - learning_rate) ** counts) * (means - current)
+
+
+def vecEnvOf(env, num_envs):
+    """
+    Builds a BallSortVecEnv stepping num_envs copies of the board of a BallSortEnv
+    """
+    env = env.unwrapped
+    return BallSortVecEnv(num_envs, env.orig_board, env.max_steps, env.bottle_size, env.num_bottles, env.empty_spaces,
+                          env.num_balls, env.ball_per_color, env.num_colors)
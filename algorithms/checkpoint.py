@@ -0,0 +1,156 @@
+# -- Imports -- #
+
+import os
+import json
+import pickle
+import hashlib
+import shutil
+
+
+class Checkpoint:
+    """
+    Class for saving and resuming the state of a tabular algorithm
+
+    Every checkpoint is written to its own episode-N directory, which is only
+    renamed into place once complete. The latest.json pointer is then replaced
+    atomically, so an interrupted run always resumes from a whole checkpoint.
+
+    The latest.json pointer also holds the run config the checkpoint was
+    trained with and its fingerprint, a checkpoint is only restored into a run
+    of the same config.
+
+    Layout
+    ------
+    directory/latest.json
+        - name of the last complete checkpoint, run config and fingerprint
+    directory/episode-N/<table>.npy
+        - Q-tables, see QTable.save
+    directory/episode-N/state.pkl
+        - episode counter, exploration rate, random number generator states
+          and online reward statistics
+    """
+    def __init__(self, directory, config=None):
+        """
+        directory : str
+            - directory holding the checkpoints
+
+        config : dict
+            - JSON serializable description of the run, see Algorithm.runConfig
+        """
+        self.directory = directory
+        self.config = config
+        self.fingerprint = fingerprint(config)
+
+    def workFile(self, name):
+        """
+        Returns the path of the file backing a memory-mapped Q-table during training
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, name + '-work.npy')
+
+    def pointer(self):
+        """
+        Returns the contents of latest.json, None if there is no checkpoint
+        """
+        try:
+            with open(os.path.join(self.directory, 'latest.json')) as json_file:
+                return json.load(json_file)
+        except FileNotFoundError:
+            return None
+
+    def latest(self):
+        """
+        Returns the directory of the last complete checkpoint, None if there is none
+        """
+        pointer = self.pointer()
+        return None if pointer is None else os.path.join(self.directory, pointer['checkpoint'])
+
+    def check(self, pointer):
+        """
+        Raises a ValueError naming the differences when a checkpoint was trained with another config
+        """
+        if pointer.get('fingerprint') == self.fingerprint:
+            return
+
+        saved = pointer.get('config') or {}
+        current = self.config or {}
+        differences = sorted(key for key in set(saved) | set(current) if saved.get(key) != current.get(key))
+        if 'param' in differences:
+            savedParam, currentParam = saved.get('param') or {}, current.get('param') or {}
+            differences.remove('param')
+            differences += sorted('param.' + key for key in set(savedParam) | set(currentParam)
+                                  if savedParam.get(key) != currentParam.get(key))
+        raise ValueError("Checkpoint {} was trained with another config ({})".format(
+            self.latest(), ', '.join(differences) or 'no fingerprint'))
+
+    def save(self, episode, tables, state):
+        """
+        Writes a checkpoint
+
+        episode : int
+            - last finished episode
+
+        tables : dict
+            - name -> Q-table
+
+        state : dict
+            - anything else needed to resume, pickled
+        """
+        name = 'episode-{}'.format(episode)
+        path = os.path.join(self.directory, name)
+        tmp = path + '.tmp'
+
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for tableName, table in tables.items():
+            table.save(os.path.join(tmp, tableName))
+        with open(os.path.join(tmp, 'state.pkl'), 'wb') as state_file:
+            pickle.dump(state, state_file)
+
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp, path)
+
+        # Point to the new checkpoint, then drop the previous ones
+        previous = self.latest()
+        with open(os.path.join(self.directory, 'latest.json.tmp'), 'w') as json_file:
+            json.dump({'checkpoint': name, 'episode': episode, 'fingerprint': self.fingerprint, 'config': self.config}, json_file)
+            json_file.flush()
+            os.fsync(json_file.fileno())
+        os.replace(os.path.join(self.directory, 'latest.json.tmp'), os.path.join(self.directory, 'latest.json'))
+
+        if previous is not None and previous != path:
+            shutil.rmtree(previous, ignore_errors=True)
+
+    def restore(self, tables):
+        """
+        Loads the last checkpoint into the given Q-tables
+
+        tables : dict
+            - name -> Q-table
+
+        Returns
+        -------
+
+        dict - the pickled state, None if there is no checkpoint
+
+        Raises ValueError when the checkpoint was trained with another config, see check
+        """
+        pointer = self.pointer()
+        if pointer is None:
+            return None
+        self.check(pointer)
+        path = self.latest()
+
+        for tableName, table in tables.items():
+            table.restore(os.path.join(path, tableName))
+        with open(os.path.join(path, 'state.pkl'), 'rb') as state_file:
+            return pickle.load(state_file)
+
+
+def fingerprint(config):
+    """
+    Returns the SHA-256 of a run config, None without config
+    """
+    if config is None:
+        return None
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
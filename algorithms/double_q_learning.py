@@ -6,7 +6,7 @@ import random
 
 # -- Personal Libraries -- #
 
-from algorithms import Algorithm
+from algorithms import Algorithm, maskedArgmax, maskedSample, tdUpdate
 from utils import Logger
 
 
@@ -34,11 +34,8 @@ class DoubleQLearning(Algorithm):
     logger: Logger
         - logger class for printing the values obtained from the algorithm
     
-    q_table: List of lists of doubles
-        - Q-table containing the values fo the actions of the Q-learning algorithm
-
-    rewards_all_episodes: List of int
-        - list containing the rewards values from all episodes
+    q_table_one, q_table_two: QTable or SparseQTable
+        - Q-tables containing the values fo the actions of the Double-Q-learning algorithm
 
     """
     def __init__(self, env, data, algorithmType, render, verbose):
@@ -47,19 +44,18 @@ class DoubleQLearning(Algorithm):
         """
         super().__init__(env, data, algorithmType, render, verbose)
         
-        self.logger = Logger("DoubleQLearning")
-
-        # Set the action and state spaces
-        action_space_size = self.env.action_space.n
-        state_space_size = self.env.observation_space.n
+        self.logger = self.newLogger("DoubleQLearning")
 
         # Create Q-table
-        self.q_table_one = np.zeros((state_space_size, action_space_size))
-        self.q_table_two = np.zeros((state_space_size, action_space_size))
+        self.q_table_one = self.newQTable('q_table_one')
+        self.q_table_two = self.newQTable('q_table_two')
 
-        # List of rewards
-        self.rewards_all_episodes = []
 
+    def qTables(self):
+        """
+        Returns the Q-tables saved in the checkpoints
+        """
+        return {'q_table_one' : self.q_table_one, 'q_table_two' : self.q_table_two}
 
     def finishLog(self):
         """
@@ -71,9 +67,20 @@ class DoubleQLearning(Algorithm):
         """
         Method for running the Double-Q-Learning algorithm
         """
+        if self.num_envs > 1:
+            self.runBatched()
+        else:
+            self.runSequential()
+
+        if self.verbose: Logger.finish(self.stats.total.mean, self.exploration_rate)
+
+    def runSequential(self):
+        """
+        Runs the episodes one after the other on the environment
+        """
 
         # Double Q-Learning algorithm
-        for episode in range(self.num_episodes):
+        for episode in range(self.start_episode, self.num_episodes):
             if self.verbose: Logger.newEpisode(episode)
 
             # Reset the environment
@@ -85,31 +92,21 @@ class DoubleQLearning(Algorithm):
                 if self.render: self.env.render()
 
                 # Get a move
-                validMoves = self.env.game.getValid()
+                validMask = self.env.getValidMask()
                 exploration_rate_threshold = random.uniform(0, 1)
 
                 # Choose the best action
                 if exploration_rate_threshold > self.exploration_rate:
                     q_table = self.q_table_one[state,:] + self.q_table_two[state,:]
-                    action = self.env.argMax(validMoves, q_table)
+                    action = maskedArgmax(q_table, validMask)
                 else:
-                    action = self.env.validSample(validMoves)
+                    action = maskedSample(validMask)
 
                 # Take the action and observe the outcome state and reward
                 new_state, reward, done, info = self.env.step(action)
 
                 # Coose one qTable and Update
-                p = np.random.random()
-                if (p < 0.5):
-                    # Update 1
-                    self.q_table_one[state, action] =  self.q_table_one[state, action] + \
-                        self.learning_rate * (reward + self.discount_rate * np.max(self.q_table_two[new_state, :]) - \
-                        self.q_table_one[state, action])
-                else:
-                    # Update 2
-                    self.q_table_two[state, action] =  self.q_table_two[state, action] + \
-                        self.learning_rate * (reward + self.discount_rate * np.max(self.q_table_one[new_state, :]) - \
-                        self.q_table_two[state, action])
+                self.update(state, action, reward, new_state)
                 
                 state = new_state
                 rewards_current_episode += reward
@@ -120,23 +117,70 @@ class DoubleQLearning(Algorithm):
                         self.env.render()
                     break
                     
+            solved = self.env.unwrapped.game.isGoal()
+            epsilon = self.exploration_rate
+
             # Exploration rate decay
             # Reduce exploration rate (epsilon), because we need less and less exploration
             self.exploration_rate = self.min_exploration_rate + \
                 (self.max_exploration_rate - self.min_exploration_rate) * np.exp(-self.exploration_decay_rate * episode)
             
-            self.rewards_all_episodes.append(rewards_current_episode)
-            
             if self.render: self.env.render()
-            self.logger.writeLog(episode, rewards_current_episode)
-            
-        # Calculate and print the average reward per 10 episodes
-        rewards_per_thousand_episodes = np.split(np.array(self.rewards_all_episodes), self.num_episodes / 100)
+            self.logEpisode(episode, rewards_current_episode, step + 1, solved, epsilon)
+            if not self.endEpisode(episode, rewards_current_episode):
+                break
+            self.saveCheckpoint(episode)
+
+    def update(self, state, action, reward, new_state):
+        """
+        Learn the Q-value of an action, updating one of the q-tables chosen at random
+
+        Parameters
+        ----------
+
+        state, new_state : int
+            - states before and after the action
+
+        action : int
+            - action taken
+
+        reward : int
+            - reward of the action
+        """
+        p = np.random.random()
+        if (p < 0.5):
+            # Update 1
+            self.q_table_one[state, action] =  self.q_table_one[state, action] + \
+                self.learning_rate * (reward + self.discount_rate * np.max(self.q_table_two[new_state, :]) - \
+                self.q_table_one[state, action])
+        else:
+            # Update 2
+            self.q_table_two[state, action] =  self.q_table_two[state, action] + \
+                self.learning_rate * (reward + self.discount_rate * np.max(self.q_table_one[new_state, :]) - \
+                self.q_table_two[state, action])
+
+    def batchActions(self, states, masks):
+        """
+        Chooses an action for every board of a batch, exploring with the exploration rate
+        """
+        rowsOne, rowsTwo = self.q_table_one.rowsOf(states), self.q_table_two.rowsOf(states)
+        actions = maskedArgmax(self.q_table_one.values[rowsOne] + self.q_table_two.values[rowsTwo], masks)
+        explore = np.random.uniform(0, 1, len(states)) <= self.exploration_rate
+        actions[explore] = maskedSample(masks[explore])
+        return actions
+
+    def batchUpdate(self, states, actions, rewards, nextStates, dones, nextActions):
+        """
+        Updates a batch of transitions, each of them on one Q-table chosen at random
+        """
+        rowsOne, nextRowsOne = self.q_table_one.rowsOf(states), self.q_table_one.rowsOf(nextStates)
+        rowsTwo, nextRowsTwo = self.q_table_two.rowsOf(states), self.q_table_two.rowsOf(nextStates)
+        valuesOne, valuesTwo = self.q_table_one.values, self.q_table_two.values
 
-        count = 100
-        for r in rewards_per_thousand_episodes:
-            self.logger.writeAvgRewards(count, r)
-            if self.verbose: Logger.printAvgRewards(count, r)
-            count += 100
+        # Each table is updated towards the best value of the other one
+        targetsOne = rewards + self.discount_rate * np.max(valuesTwo[nextRowsTwo, :], axis=1)
+        targetsTwo = rewards + self.discount_rate * np.max(valuesOne[nextRowsOne, :], axis=1)
 
-        if self.verbose: Logger.finish(self.rewards_all_episodes, self.num_episodes, self.exploration_rate)
\ No newline at end of file
+        one = np.random.random(len(states)) < 0.5
+        tdUpdate(valuesOne, rowsOne[one], actions[one], targetsOne[one], self.learning_rate)
+        tdUpdate(valuesTwo, rowsTwo[~one], actions[~one], targetsTwo[~one], self.learning_rate)
\ No newline at end of file
@@ -0,0 +1,294 @@
+import os
+import time
+import numpy as np
+
+from algorithms import Algorithm
+from gym_game.envs.transition_graph import TransitionGraph
+from utils import Logger
+
+class DynamicProgramming(Algorithm):
+    """
+    Base class of the exact solvers working on the reachable state graph
+
+    The states reachable from the config board are enumerated into a
+    TransitionGraph and the Bellman backups run on its CSR arrays, one
+    vectorized sweep over every state at a time. The environment model is the
+    one of BallSortEnv: a valid move pays the reward of the board it reaches
+    (num_balls for the goal), an invalid action keeps the board and pays its
+    reward minus 10, and goal or stuck boards end the game with a value of 0.
+    The step limit of the episodes is ignored.
+
+    The result is written to q_table in the same layout as QLearning.q_table,
+    so it can be compared with a learned table or used as a warm start.
+
+    Attributes
+    ----------
+    q_table : QTable or SparseQTable
+        - optimal Q-values of every reachable state
+
+    graph : TransitionGraph
+        - reachable state graph, the one of the environment with the graph backend
+
+    values : array of doubles
+        - optimal value of every graph state
+
+    iterations : int
+        - number of iterations run by solve
+
+    residual : double
+        - largest value change of the last sweep
+
+    seconds : double
+        - time taken by run
+    """
+    def __init__(self, env, data, algorithmType, render, verbose):
+        """
+        Parameters
+        ----------
+        env: Environment
+            - OpenAI Gym environment
+
+        data: list of parameters
+            - list containing the necessary parameters for the class
+
+        algorithmType: Algorithm
+            - Chosen algorithm, AlgorithmType.DYNAMIC_PROGRAMMING
+
+        render: Render
+            - ignored, no game is played
+
+        verbose: bool
+            - ignored, the summary of run is always printed
+        """
+        super().__init__(env, data, algorithmType, render, verbose)
+
+        self.max_states = data.get('max_states')
+        self.q_table = self.newQTable('q_table')
+
+        self.graph = None
+        self.values = None
+        self.iterations = 0
+        self.residual = np.inf
+        self.seconds = 0.0
+
+    def qTables(self):
+        """
+        Returns the Q-table computed by run
+        """
+        return {'q_table' : self.q_table}
+
+    def buildGraph(self):
+        """
+        Returns the reachable state graph of the environment board
+        """
+        env = self.env.unwrapped
+        if env.symmetry:
+            print("Dynamic programming can't be used with symmetry. More on readme")
+            exit(-1)
+        if env.backend == 'graph':
+            return env.graph
+
+        try:
+            return TransitionGraph.build(env.orig_board, env.bottle_size, env.num_bottles, self.max_states)
+        except ValueError as error:
+            Logger.error("{}. More information on README.".format(error))
+            exit(-1)
+
+    def prepare(self):
+        """
+        Builds the per move and per state arrays used by the backups
+        """
+        graph, env = self.graph, self.env.unwrapped
+        counts = np.diff(graph.indptr)
+
+        self.moveStates = np.repeat(np.arange(graph.num_states), counts)
+        self.targets = graph.targets.astype(np.int64)
+        self.moveRewards = np.where(graph.goal[self.targets], env.num_balls, graph.rewards[self.targets]).astype(np.float64)
+        self.invalidRewards = graph.rewards.astype(np.float64) - 10
+        self.hasInvalid = counts < self.env.action_space.n
+        self.terminal = graph.goal | graph.stuck
+
+        # reduceat needs the start of every non empty segment
+        self.withMoves = counts > 0
+        self.starts = graph.indptr[:-1][self.withMoves]
+
+    def moveValues(self, values):
+        """
+        Returns the Q-value of every valid move
+        """
+        return self.moveRewards + self.discount_rate * values[self.targets]
+
+    def invalidValues(self, values):
+        """
+        Returns the Q-value of the invalid actions of every state
+        """
+        return self.invalidRewards + self.discount_rate * values
+
+    def bestMoveValues(self, moveValues):
+        """
+        Returns the highest move Q-value of every state, -inf without moves
+        """
+        best = np.full(self.graph.num_states, -np.inf)
+        if len(self.starts):
+            best[self.withMoves] = np.maximum.reduceat(moveValues, self.starts)
+        return best
+
+    def backup(self, values):
+        """
+        Returns the Bellman optimality backup of every state value
+        """
+        best = self.bestMoveValues(self.moveValues(values))
+        best = np.where(self.hasInvalid, np.maximum(best, self.invalidValues(values)), best)
+        best[self.terminal] = 0
+        return best
+
+    def greedyMoves(self, values):
+        """
+        Returns the CSR position of the best move of every state, -1 when an
+        invalid action is better or there is no move
+        """
+        moveValues = self.moveValues(values)
+        best = self.bestMoveValues(moveValues)
+
+        moves = np.full(self.graph.num_states, -1, dtype=np.int64)
+        candidates = np.flatnonzero(moveValues >= best[self.moveStates])
+        states, first = np.unique(self.moveStates[candidates], return_index=True)
+        moves[states] = candidates[first]
+
+        moves[self.hasInvalid & (self.invalidValues(values) > best)] = -1
+        return moves
+
+    def policyValues(self, moves, values):
+        """
+        Returns the one step value of every state when following moves
+        """
+        valid = moves >= 0
+        rewards = self.invalidRewards.copy()
+        nextStates = np.arange(self.graph.num_states)
+        rewards[valid] = self.moveRewards[moves[valid]]
+        nextStates[valid] = self.targets[moves[valid]]
+
+        result = rewards + self.discount_rate * values[nextStates]
+        result[self.terminal] = 0
+        return result
+
+    def solve(self):
+        """
+        Returns the optimal value of every graph state
+        """
+        raise NotImplementedError
+
+    def fillQTable(self, values):
+        """
+        Writes the Q-values of every graph state into q_table
+        """
+        graph = self.graph
+        q = np.repeat(self.invalidValues(values)[:, None], self.env.action_space.n, axis=1)
+        q[self.moveStates, graph.actions] = self.moveValues(values)
+        q[self.terminal] = 0
+
+        rows = self.q_table.rowsOf(graph.ranks)
+        self.q_table.values[rows] = q
+
+    def solutionLength(self):
+        """
+        Returns the number of moves the greedy policy takes from the config
+        board to the goal, None if it never gets there
+        """
+        moves = self.greedyMoves(self.values)
+        state = 0
+        for step in range(self.graph.num_states):
+            if self.graph.goal[state]:
+                return step
+            if moves[state] < 0:
+                return None
+            state = self.targets[moves[state]]
+        return None
+
+    def run(self):
+        """
+        Computes the optimal Q-table, saved to q_table_file when set
+        """
+        start = time.perf_counter()
+
+        self.graph = self.buildGraph()
+        self.prepare()
+        self.values = self.solve()
+        self.fillQTable(self.values)
+
+        self.seconds = time.perf_counter() - start
+
+        if self.q_table_file:
+            directory = os.path.dirname(self.q_table_file)
+            if directory: os.makedirs(directory, exist_ok=True)
+            self.q_table.save(self.q_table_file)
+
+        print("{}: {} states, {} iterations, residual {:.2e}, {:.3f}s".format(
+            type(self).__name__, self.graph.num_states, self.iterations, self.residual, self.seconds))
+        length = self.solutionLength()
+        if length is None:
+            print("The greedy policy does not solve the board")
+        else:
+            print("The greedy policy solves the board in {} moves, value {:.3f}".format(length, self.values[0]))
+        if self.q_table_file:
+            print("Q-table saved to {}.npy".format(self.q_table_file))
+
+
+class ValueIteration(DynamicProgramming):
+    """
+    Value iteration: repeats the Bellman optimality backup until no state value
+    changes by more than tolerance
+    """
+    def solve(self):
+        values = np.zeros(self.graph.num_states)
+        for iteration in range(1, self.max_iterations + 1):
+            newValues = self.backup(values)
+            self.residual = np.max(np.abs(newValues - values), initial=0)
+            self.iterations = iteration
+            values = newValues
+
+            if self.residual <= self.tolerance:
+                break
+        return values
+
+
+class PolicyIteration(DynamicProgramming):
+    """
+    Policy iteration: evaluates the greedy policy with sweeps until no state
+    value changes by more than tolerance, then improves it, until no state has
+    a move better than its current one by more than tolerance
+
+    Attributes
+    ----------
+    sweeps : int
+        - number of evaluation sweeps over every iteration
+    """
+    sweeps = 0
+
+    def evaluate(self, moves, values):
+        """
+        Returns the values of the policy following moves, starting the sweeps from values
+        """
+        for _ in range(self.max_iterations):
+            newValues = self.policyValues(moves, values)
+            self.residual = np.max(np.abs(newValues - values), initial=0)
+            self.sweeps += 1
+            values = newValues
+
+            if self.residual <= self.tolerance:
+                break
+        return values
+
+    def solve(self):
+        values = np.zeros(self.graph.num_states)
+        moves = self.greedyMoves(values)
+        for iteration in range(1, self.max_iterations + 1):
+            values = self.evaluate(moves, values)
+            self.iterations = iteration
+
+            # Only switch moves that are strictly better, ties would never settle
+            changed = self.backup(values) > self.policyValues(moves, values) + self.tolerance
+            if not changed.any():
+                break
+            moves = np.where(changed, self.greedyMoves(values), moves)
+        return values
@@ -0,0 +1,230 @@
+import os
+import time
+import random
+import multiprocessing
+import numpy as np
+
+from multiprocessing import shared_memory
+from algorithms import Algorithm, QTable, IndexedQTable, maskedArgmax, maskedSample, warmStart
+from utils import Logger
+
+class ParallelQLearning(Algorithm):
+    """
+    Q-Learning run by several worker processes sharing one Q-table
+
+    The Q-table lives in shared memory. With the graph backend it holds one
+    row per reachable state, otherwise it is dense and the training refuses to
+    start when it would take more than max_shared_mb. Every worker plays its own
+    copy of the environment, takes the next episode from a shared counter and
+    uses the exploration rate of that episode, so the exploration schedule is
+    the same as in QLearning whatever the number of workers. Updates are
+    lock-free (Hogwild) unless lock_stripes is set, then the states are
+    spread over that many locks.
+
+    The main process logs the episodes in order as they finish and runs the
+    episode callbacks, a callback stopping the training stops every worker.
+    Workers are forked, they inherit the environment and the shared objects.
+    Checkpoints are not written in this mode.
+
+    Attributes
+    ----------
+    num_workers : int
+        - number of worker processes, the number of cores by default
+
+    lock_stripes : int
+        - number of locks guarding the Q-table rows, 0 (default) for lock-free updates
+
+    max_shared_mb : int
+        - largest dense Q-table allowed, in megabytes (default 1024)
+
+    q_table : QTable or IndexedQTable
+        - Q-table shared by the workers, new shared memory starts zeroed
+
+    worker_stats : list of dict
+        - episodes, steps and steps per second of every worker
+    """
+    def __init__(self, env, data, algorithmType, render, verbose):
+        """
+        Constructor for the parallel Q-learning algorithm class
+
+        Parameters
+        ----------
+        env: Environment
+            - OpenAI Gym environment, copied into every worker
+
+        data: list of parameters
+            - list containing the necessary parameters for the class
+
+        algorithmType: Algorithm
+            - Chosen algorithm
+
+        render: Render
+            - ignored, workers do not render
+
+        verbose: bool
+            - Boolean value used for printing the values obtained in the algorithm
+
+        """
+        super().__init__(env, data, algorithmType, render, verbose)
+
+        self.num_workers = data.get('num_workers', os.cpu_count())
+        self.lock_stripes = data.get('lock_stripes', 0)
+        self.max_shared_mb = data.get('max_shared_mb', 1024)
+
+        self.logger = self.newLogger("ParallelQLearning")
+
+        # Initializing the shared Q-matrix, only over the reachable states when the graph backend knows them
+        states = self.env.unwrapped.reachableStates()
+        shape = (self.env.observation_space.n if states is None else len(states), self.env.action_space.n)
+        size = shape[0] * shape[1] * 8
+        if states is None and size > self.max_shared_mb * 2 ** 20:
+            Logger.error("The dense Q-table needs {} MB of shared memory, more than max_shared_mb ({}). "
+                         "Use the graph backend or raise max_shared_mb.".format(size // 2 ** 20, self.max_shared_mb))
+            exit(-1)
+
+        self.shared = shared_memory.SharedMemory(create=True, size=max(1, size))
+        values = np.ndarray(shape, buffer=self.shared.buf)
+        self.q_table = QTable.fromArray(values) if states is None else IndexedQTable(states, values)
+        if self.warm_start:
+            warmStart(self.q_table, self.warm_start)
+
+        self.worker_stats = []
+
+    def qTables(self):
+        """
+        Returns the Q-tables restored by resume
+        """
+        return {'q_table' : self.q_table}
+
+    def finishLog(self):
+        """
+        Closes the logger from printing more values
+        """
+        return self.logger.closeLogs()
+
+    def explorationRate(self, episode):
+        """
+        Returns the exploration rate used during an episode, the one QLearning reaches after the previous episode
+        """
+        if episode == self.start_episode:
+            return self.exploration_rate
+        return self.min_exploration_rate + \
+            (self.max_exploration_rate - self.min_exploration_rate) * np.exp(-self.exploration_decay_rate * (episode - 1))
+
+    def update(self, state, action, reward, new_state):
+        """
+        Updates Q(s,a), holding the lock of the state when the updates are striped
+        """
+        lock = self.locks[state % len(self.locks)] if self.locks else None
+        if lock is not None: lock.acquire()
+
+        row, newRow = self.q_table.row(state), self.q_table.row(new_state)
+        q_table = self.q_table.values
+        q_table[row, action] += self.learning_rate * \
+            (reward + self.discount_rate * np.max(q_table[newRow, :]) - q_table[row, action])
+
+        if lock is not None: lock.release()
+
+    def work(self, idx, seed):
+        """
+        Worker process: plays episodes until they are all taken or the training is stopped
+        """
+        random.seed(seed)
+        np.random.seed(seed % 2 ** 32)
+        self.env.action_space.seed(seed)
+
+        start = time.perf_counter()
+        while not self.stop.value:
+            with self.next_episode.get_lock():
+                episode = self.next_episode.value
+                self.next_episode.value += 1
+            if episode >= self.num_episodes:
+                break
+
+            exploration_rate = self.explorationRate(episode)
+            state = self.env.reset()
+            rewards_current_episode = 0
+
+            for step in range(self.max_steps_per_episode):
+                # Get a move
+                validMask = self.env.getValidMask()
+                if random.uniform(0, 1) > exploration_rate:
+                    action = maskedArgmax(self.q_table[state, :], validMask)
+                else:
+                    action = maskedSample(validMask)
+
+                # Take the action and observe the outcome state and reward
+                new_state, reward, done, info = self.env.step(action)
+                self.update(state, action, reward, new_state)
+
+                state = new_state
+                rewards_current_episode += reward
+
+                if done:
+                    break
+
+            self.rewards[episode] = rewards_current_episode
+            self.episode_steps[episode] = step + 1
+            self.solved[episode] = self.env.unwrapped.game.isGoal()
+            self.finished[episode] = 1
+            self.episodes[idx] += 1
+            self.steps[idx] += step + 1
+            self.seconds[idx] = time.perf_counter() - start
+
+    def run(self):
+        """
+        Method for running the parallel Q-Learning algorithm
+        """
+        context = multiprocessing.get_context('fork')
+
+        # Shared episode counter, results and per worker counters
+        self.next_episode = context.Value('q', self.start_episode)
+        self.rewards = context.Array('q', self.num_episodes, lock=False)
+        self.episode_steps = context.Array('i', self.num_episodes, lock=False)
+        self.solved = context.Array('b', self.num_episodes, lock=False)
+        self.finished = context.Array('b', self.num_episodes, lock=False)
+        self.stop = context.Value('b', 0, lock=False)
+        self.episodes = context.Array('q', self.num_workers, lock=False)
+        self.steps = context.Array('q', self.num_workers, lock=False)
+        self.seconds = context.Array('d', self.num_workers, lock=False)
+        self.locks = [context.Lock() for _ in range(self.lock_stripes)]
+
+        seeds = [random.randrange(2 ** 32) for _ in range(self.num_workers)]
+        workers = [context.Process(target=self.work, args=(idx, seeds[idx])) for idx in range(self.num_workers)]
+        for worker in workers:
+            worker.start()
+
+        # The workers hold the mapping, the name is not needed anymore
+        self.shared.unlink()
+
+        # Log the episodes in order as they finish
+        episode = self.start_episode
+        while episode < self.num_episodes:
+            alive = any(worker.is_alive() for worker in workers)
+            if self.finished[episode]:
+                rewards_current_episode = self.rewards[episode]
+                if self.verbose: Logger.newEpisode(episode)
+
+                self.exploration_rate = self.explorationRate(episode + 1)
+                self.logEpisode(episode, rewards_current_episode, self.episode_steps[episode],
+                                bool(self.solved[episode]), self.explorationRate(episode))
+                if not self.endEpisode(episode, rewards_current_episode):
+                    self.stop.value = 1
+                    break
+                episode += 1
+            elif not alive:
+                break
+            else:
+                time.sleep(0.01)
+
+        for worker in workers:
+            worker.join()
+
+        self.worker_stats = [{'episodes' : self.episodes[idx], 'steps' : self.steps[idx], 'seconds' : self.seconds[idx],
+                              'steps_per_second' : self.steps[idx] / self.seconds[idx] if self.seconds[idx] else 0.0}
+                             for idx in range(self.num_workers)]
+
+        if self.verbose:
+            for idx, stats in enumerate(self.worker_stats):
+                print("Worker {}: {} episodes, {:.0f} steps/s".format(idx, stats['episodes'], stats['steps_per_second']))
+            Logger.finish(self.stats.total.mean, self.exploration_rate)
@@ -0,0 +1,176 @@
+import heapq
+import numpy as np
+
+from algorithms import ReplayBuffer, tdUpdate
+
+
+class DynaPlanner:
+    """
+    Dyna-Q planning
+
+    The game is deterministic, so the transitions seen so far are an exact
+    model of it. After every real step, plan() replays transitions drawn from
+    a ReplayBuffer and applies their Q-learning updates in a single batch.
+    """
+    def __init__(self, capacity):
+        self.buffer = ReplayBuffer(capacity)
+
+    def observe(self, state, action, reward, next_state, done):
+        """
+        Adds a real transition to the model
+        """
+        self.buffer.add(state, action, reward, next_state, done)
+
+    def observeBatch(self, states, actions, rewards, next_states, dones):
+        """
+        Adds a batch of real transitions to the model
+        """
+        self.buffer.addBatch(states, actions, rewards, next_states, dones)
+
+    def state(self):
+        """
+        Returns the model, see restore
+        """
+        return {'buffer' : self.buffer}
+
+    def restore(self, state, q_table):
+        """
+        Continues from a model returned by state
+        """
+        self.buffer = state['buffer']
+
+    def plan(self, q_table, learning_rate, discount_rate, steps):
+        """
+        Applies the updates of steps transitions drawn from the model
+
+        q_table : QTable or SparseQTable
+            - Q-table to update
+        """
+        if not len(self.buffer):
+            return
+
+        states, actions, rewards, next_states, dones = self.buffer.sample(steps)
+        rows, nextRows = q_table.rowsOf(states), q_table.rowsOf(next_states)
+        values = q_table.values
+        targets = rewards + discount_rate * np.max(values[nextRows, :], axis=1)
+        tdUpdate(values, rows, actions, targets, learning_rate)
+
+
+class PrioritizedSweeping:
+    """
+    Prioritized sweeping planning
+
+    Keeps the last outcome of every state-action pair and the pairs leading to
+    every state. Pairs whose update would change their Q-value by more than
+    threshold are queued by the size of that change, and plan() updates the
+    largest ones first, queueing the pairs leading to each updated state.
+
+    A pair is queued again only with a larger priority, the older entry is
+    then stale: it is skipped when popped, and the queue is rebuilt from the
+    live entries once the stale ones outnumber them.
+    """
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.model = {}         # (state, action) -> (reward, next_state)
+        self.predecessors = {}  # state -> set of (state, action) leading to it
+        self.queue = []         # (-priority, state, action)
+        self.priorities = {}    # (state, action) -> priority of its live queue entry
+        self.q_table = None
+        self.discount_rate = 0
+
+    def observe(self, state, action, reward, next_state, done):
+        """
+        Adds a real transition to the model and queues its pair
+        """
+        state, action, next_state = int(state), int(action), int(next_state)
+        self.model[(state, action)] = (reward, next_state)
+        self.predecessors.setdefault(next_state, set()).add((state, action))
+        self.push(state, action)
+
+    def observeBatch(self, states, actions, rewards, next_states, dones):
+        """
+        Adds a batch of real transitions to the model
+        """
+        for transition in zip(states, actions, rewards, next_states, dones):
+            self.observe(*transition)
+
+    def state(self):
+        """
+        Returns the model and the queue, see restore
+        """
+        return {'model' : self.model, 'predecessors' : self.predecessors, 'queue' : self.queue,
+                'priorities' : self.priorities, 'discount_rate' : self.discount_rate,
+                'planning' : self.q_table is not None}
+
+    def restore(self, state, q_table):
+        """
+        Continues from a model and queue returned by state, planning on q_table
+        if plan() had already been called
+        """
+        self.model, self.predecessors = state['model'], state['predecessors']
+        self.queue, self.priorities = state['queue'], state['priorities']
+        self.discount_rate = state['discount_rate']
+        self.q_table = q_table if state['planning'] else None
+
+    def error(self, state, action):
+        """
+        Returns the change of Q(s,a) a full update would make
+        """
+        reward, next_state = self.model[(state, action)]
+        return reward + self.discount_rate * np.max(self.q_table[next_state, :]) - self.q_table[state, action]
+
+    def push(self, state, action):
+        """
+        Queues a pair when its update is large enough
+        """
+        if self.q_table is None:
+            return
+        priority = abs(self.error(state, action))
+        if priority <= self.threshold or priority <= self.priorities.get((state, action), 0):
+            return
+
+        self.priorities[(state, action)] = priority
+        heapq.heappush(self.queue, (-priority, state, action))
+        if len(self.queue) > 2 * len(self.priorities):
+            self.queue = [(-priority, state, action) for (state, action), priority in self.priorities.items()]
+            heapq.heapify(self.queue)
+
+    def plan(self, q_table, learning_rate, discount_rate, steps):
+        """
+        Updates up to steps queued pairs, the largest changes first
+
+        q_table : QTable or SparseQTable
+            - Q-table to update
+        """
+        if self.q_table is None:
+            # Pairs observed before the first plan are queued now
+            self.q_table, self.discount_rate = q_table, discount_rate
+            for state, action in self.model:
+                self.push(state, action)
+
+        updates = 0
+        while updates < steps and self.queue:
+            priority, state, action = heapq.heappop(self.queue)
+            if self.priorities.get((state, action)) != -priority:
+                continue
+            del self.priorities[(state, action)]
+            updates += 1
+
+            self.q_table[state, action] = self.q_table[state, action] + learning_rate * self.error(state, action)
+
+            for predecessor, predecessorAction in self.predecessors.get(state, ()):
+                self.push(predecessor, predecessorAction)
+
+
+def makePlanner(kind, capacity, threshold):
+    """
+    Builds a planner
+
+    kind : str
+        - "dyna" for DynaPlanner, "prioritized" for PrioritizedSweeping
+    """
+    if kind == 'dyna':
+        return DynaPlanner(capacity)
+    if kind == 'prioritized':
+        return PrioritizedSweeping(threshold)
+    raise ValueError("Unknown planning '{}'".format(kind))
@@ -2,8 +2,9 @@ import gym
 import numpy as np
 
 from algorithms import Algorithm
+from utils import Logger
 from stable_baselines3 import PPO
-from stable_baselines3.common.env_util import make_vec_env
+from gym_game.envs.ball_sort_vec_env import BallSortVecEnv
 
 class Ppo(Algorithm):
     """
@@ -12,8 +13,8 @@ class Ppo(Algorithm):
     Attributes
     ----------
 
-    env: Environment
-        - OpenAI Gym environment
+    env: dict
+        - BallSortEnv keyword arguments, used to build the vectorized environment
 
     data: list of parameters
         - list containing the necessary parameters for the class
@@ -39,8 +40,8 @@ class Ppo(Algorithm):
 
         Parameters
         ----------
-        env: Environment
-            - OpenAI Gym environment
+        env: dict
+            - BallSortEnv keyword arguments, used to build the vectorized environment
 
         data: list of parameters
             - list containing the necessary parameters for the class
@@ -63,8 +64,12 @@ class Ppo(Algorithm):
         Method for running the Proximal Policy Optimization (PPO) algorithm
         """
 
-        # Create the vectorized environment
-        env = make_vec_env(self.env, n_envs=self.num_cpu)
+        # Create the vectorized environment, all the boards are stepped in one call
+        try:
+            env = BallSortVecEnv(self.num_cpu, **self.env)
+        except ValueError as error:
+            Logger.error("{}. More on readme".format(error))
+            exit(-1)
 
         model = PPO('MlpPolicy', 
                     env,
@@ -85,9 +90,7 @@ class Ppo(Algorithm):
             obs, rewards, gameStates, info = env.step(action)
 
             if self.verbose: print(gameStates)
-            if self.render:
-                for board in info:
-                    print(board)
+            if self.render: env.render()
         
 
         
\ No newline at end of file
@@ -2,7 +2,7 @@ import gym
 import numpy as np
 import random
 
-from algorithms import Algorithm
+from algorithms import Algorithm, maskedArgmax, maskedSample, tdUpdate, makePlanner
 from utils import Logger
     
 class QLearning(Algorithm):
@@ -29,12 +29,15 @@ class QLearning(Algorithm):
     logger: Logger
         - logger class for printing the values obtained from the algorithm
     
-    q_table : List of lists of doubles
+    q_table : QTable or SparseQTable
         - Q-table containing the values fo the actions of the Q-learning algorithm
 
-    rewards_all_episodes : List of int
-        - list containing the rewards values from all episodes
-    
+    planning_steps : int
+        - number of planning updates after every real step, 0 (default) disables planning
+
+    planner : DynaPlanner or PrioritizedSweeping
+        - model of the transitions used for planning, None without planning
+
 
 
     """
@@ -63,17 +66,40 @@ class QLearning(Algorithm):
 
         super().__init__(env, data, algorithmType, render, verbose)
         
-        self.logger = Logger("QLearning")
-
-        # Set the action and state spaces
-        action_space_size = self.env.action_space.n
-        state_space_size = self.env.observation_space.n
+        self.logger = self.newLogger("QLearning")
 
         # Initializing the Q-matrix
-        self.q_table = np.zeros((state_space_size, action_space_size))
+        self.q_table = self.newQTable('q_table')
+
+        # Planning from the transitions seen so far
+        self.planning_steps = data.get('planning_steps', 0)
+        self.planner = None
+        if self.planning_steps > 0:
+            try:
+                self.planner = makePlanner(data.get('planning', 'dyna'), data.get('replay_capacity', 100000),
+                                           data.get('priority_threshold', 1e-4))
+            except ValueError:
+                Logger.error("planning should be dyna or prioritized. Check readme.")
+                exit(-1)
+
+    def qTables(self):
+        """
+        Returns the Q-tables saved in the checkpoints
+        """
+        return {'q_table' : self.q_table}
+
+    def extraState(self):
+        """
+        Returns the model of the planner, saved in the checkpoints
+        """
+        return self.planner.state() if self.planner is not None else None
 
-        # List of rewards
-        self.rewards_all_episodes = []
+    def restoreExtraState(self, state):
+        """
+        Restores the model of the planner
+        """
+        if self.planner is not None:
+            self.planner.restore(state, self.q_table)
 
     def finishLog(self):
         """
@@ -85,9 +111,20 @@ class QLearning(Algorithm):
         """
         Method for running the Q-Learning algorithm
         """
+        if self.num_envs > 1:
+            self.runBatched()
+        else:
+            self.runSequential()
+
+        if self.verbose: Logger.finish(self.stats.total.mean, self.exploration_rate)
+
+    def runSequential(self):
+        """
+        Runs the episodes one after the other on the environment
+        """
 
         # Q-Learning algorithm
-        for episode in range(self.num_episodes):
+        for episode in range(self.start_episode, self.num_episodes):
             if self.verbose: Logger.newEpisode(episode)
 
             # Reset the environment
@@ -99,21 +136,23 @@ class QLearning(Algorithm):
                 if self.render: self.env.render()
 
                 # Get a move
-                validMoves = self.env.game.getValid()
+                validMask = self.env.getValidMask()
                 exploration_rate_threshold = random.uniform(0, 1)
 
                 if exploration_rate_threshold > self.exploration_rate:
-                    action = self.env.argMax(validMoves, self.q_table[state,:])
+                    action = maskedArgmax(self.q_table[state,:], validMask)
                 else:
-                    action = self.env.validSample(validMoves)
+                    action = maskedSample(validMask)
                 
                 # Take the action and observe the outcome state and reward
                 new_state, reward, done, info = self.env.step(action)
 
                 # Update Q-table for Q(s,a)
-                self.q_table[state, action] = self.q_table[state, action] + \
-                    self.learning_rate * (reward + self.discount_rate * np.max(self.q_table[new_state, :]) - \
-                    self.q_table[state, action])
+                self.update(state, action, reward, new_state)
+
+                if self.planner is not None:
+                    self.planner.observe(state, action, reward, new_state, done)
+                    self.planner.plan(self.q_table, self.learning_rate, self.discount_rate, self.planning_steps)
                 
                 state = new_state
                 rewards_current_episode += reward
@@ -124,23 +163,59 @@ class QLearning(Algorithm):
                         self.env.render()
                     break
                     
+            solved = self.env.unwrapped.game.isGoal()
+            epsilon = self.exploration_rate
+
             # Exploration rate decay
             # Reduce exploration rate (epsilon), because we need less and less exploration
             self.exploration_rate = self.min_exploration_rate + \
                 (self.max_exploration_rate - self.min_exploration_rate) * np.exp(-self.exploration_decay_rate * episode)
             
-            self.rewards_all_episodes.append(rewards_current_episode)
-            
             if self.render: self.env.render()
-            self.logger.writeLog(episode, rewards_current_episode)
-            
-        # Calculate and print the average reward per 10 episodes
-        rewards_per_thousand_episodes = np.split(np.array(self.rewards_all_episodes), self.num_episodes / 100)
+            self.logEpisode(episode, rewards_current_episode, step + 1, solved, epsilon)
+            if not self.endEpisode(episode, rewards_current_episode):
+                break
+            self.saveCheckpoint(episode)
+
+    def update(self, state, action, reward, new_state):
+        """
+        Learn the Q-value of an action, updating the q-table
+
+        Parameters
+        ----------
 
-        count = 100
-        for r in rewards_per_thousand_episodes:
-            self.logger.writeAvgRewards(count, r)
-            if self.verbose: Logger.printAvgRewards(count, r)
-            count += 100
+        state, new_state : int
+            - states before and after the action
 
-        if self.verbose: Logger.finish(self.rewards_all_episodes, self.num_episodes, self.exploration_rate)
\ No newline at end of file
+        action : int
+            - action taken
+
+        reward : int
+            - reward of the action
+        """
+        self.q_table[state, action] = self.q_table[state, action] + \
+            self.learning_rate * (reward + self.discount_rate * np.max(self.q_table[new_state, :]) - \
+            self.q_table[state, action])
+
+    def batchActions(self, states, masks):
+        """
+        Chooses an action for every board of a batch, exploring with the exploration rate
+        """
+        rows = self.q_table.rowsOf(states)
+        actions = maskedArgmax(self.q_table.values[rows], masks)
+        explore = np.random.uniform(0, 1, len(states)) <= self.exploration_rate
+        actions[explore] = maskedSample(masks[explore])
+        return actions
+
+    def batchUpdate(self, states, actions, rewards, nextStates, dones, nextActions):
+        """
+        Updates Q(s,a) for a batch of transitions
+        """
+        rows, nextRows = self.q_table.rowsOf(states), self.q_table.rowsOf(nextStates)
+        values = self.q_table.values
+        targets = rewards + self.discount_rate * np.max(values[nextRows, :], axis=1)
+        tdUpdate(values, rows, actions, targets, self.learning_rate)
+
+        if self.planner is not None:
+            self.planner.observeBatch(states, actions, rewards, nextStates, dones)
+            self.planner.plan(self.q_table, self.learning_rate, self.discount_rate, self.planning_steps)
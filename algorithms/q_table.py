@@ -0,0 +1,321 @@
+import os
+import numpy as np
+
+
+class QTable:
+    """
+    Dense Q-table, one row for every state of the observation space
+
+    Attributes
+    ----------
+    values : array of doubles
+        - (num_states, num_actions) array of Q-values, backed by a np.memmap
+          file when a filename is given
+
+    visited : array of bool
+        - True for the states whose row was written or looked up by rowsOf,
+          None when unknown (tables built by fromArray or load)
+    """
+    def __init__(self, num_states, num_actions, filename=None):
+        self.num_actions = num_actions
+        if filename is None:
+            self.values = np.zeros((num_states, num_actions))
+        else:
+            self.values = np.lib.format.open_memmap(filename, mode='w+', shape=(num_states, num_actions))
+        self.visited = np.zeros(num_states, dtype=np.bool_)
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def __setitem__(self, key, value):
+        self.values[key] = value
+        if self.visited is not None:
+            self.visited[key[0] if isinstance(key, tuple) else key] = True
+
+    def __len__(self):
+        return len(self.values)
+
+    def peek(self, state):
+        """
+        Returns the Q-values of a state
+        """
+        return self.values[state]
+
+    def row(self, state):
+        """
+        Returns the row of a state, raises an IndexError when it is out of the table
+        """
+        if not 0 <= state < len(self.values):
+            raise IndexError("State {} is out of the Q-table".format(state))
+        return state
+
+    def rowsOf(self, states):
+        """
+        Returns the rows of values holding a batch of states
+        """
+        rows = np.asarray(states, dtype=np.int64)
+        if self.visited is not None:
+            self.visited[rows] = True
+        return rows
+
+    def states(self):
+        """
+        Returns the state of every row of values
+        """
+        return np.arange(len(self.values))
+
+    def visitedRows(self):
+        """
+        Returns the rows of the visited states, the non zero rows when they are not tracked
+        """
+        if self.visited is not None:
+            return np.flatnonzero(self.visited)
+        return np.flatnonzero(np.any(self.values, axis=1))
+
+    def save(self, path):
+        """
+        Saves the Q-values to path.npy, and the visited rows of a dense table
+        to path-visited.npy
+
+        A memory-mapped table is flushed and only its visited rows are saved,
+        with their states in path-states.npy as SparseQTable.save does, so a
+        checkpoint does not copy the whole file
+        """
+        if isinstance(self.values, np.memmap):
+            self.values.flush()
+            states = self.visitedRows()
+            np.save(path + '.npy', self.values[states])
+            np.save(path + '-states.npy', states)
+            return
+        np.save(path + '.npy', self.values)
+        if self.visited is not None:
+            np.save(path + '-visited.npy', self.visitedRows())
+
+    def restore(self, path):
+        """
+        Copies the Q-values saved by save into the table
+        """
+        if not os.path.exists(path + '-states.npy'):
+            self.values[:] = np.load(path + '.npy', mmap_mode='r')
+            if self.visited is not None:
+                self.visited[:] = False
+                if os.path.exists(path + '-visited.npy'):
+                    self.visited[np.load(path + '-visited.npy')] = True
+                else:
+                    self.visited[np.any(self.values, axis=1)] = True
+            return
+
+        # Only the visited rows can be non zero
+        self.values[self.visitedRows()] = 0
+        states = np.load(path + '-states.npy')
+        self.values[states] = np.load(path + '.npy')
+        if self.visited is not None:
+            self.visited[states] = True
+
+    @classmethod
+    def fromArray(cls, values):
+        """
+        Builds a table over an existing (num_states, num_actions) array, without copying it
+        """
+        table = cls.__new__(cls)
+        table.values = values
+        table.num_actions = values.shape[1]
+        table.visited = None
+        return table
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Loads a table saved by save, memory-mapped read-only by default so
+        that only the visited rows are read from disk. A memory-mapped table
+        saved with its visited rows only loads as a SparseQTable.
+        """
+        if os.path.exists(path + '-states.npy'):
+            return SparseQTable.load(path, mmap)
+        table = cls.__new__(cls)
+        table.values = np.load(path + '.npy', mmap_mode='r' if mmap else None)
+        table.num_actions = table.values.shape[1]
+        table.visited = None
+        return table
+
+
+class SparseQTable:
+    """
+    Q-table allocating the row of a state the first time it is visited
+
+    The rows live in one contiguous array, doubled when it is full, and a
+    dictionary maps each visited state to its row. Supports the same
+    q_table[state, action] access as QTable, so memory grows with the number
+    of visited states instead of the size of the observation space.
+
+    Attributes
+    ----------
+    values : array of doubles
+        - (capacity, num_actions) array of Q-values, only the first num_rows are used
+
+    index : dict
+        - state -> row of values
+    """
+    def __init__(self, num_states, num_actions, capacity=1024):
+        self.num_actions = num_actions
+        self.values = np.zeros((capacity, num_actions))
+        self.index = {}
+        self.num_rows = 0
+
+    def row(self, state):
+        """
+        Returns the row of a state, allocating it on the first visit
+        """
+        row = self.index.get(state)
+        if row is None:
+            if self.num_rows == len(self.values):
+                values = np.zeros((2 * len(self.values), self.num_actions))
+                values[:self.num_rows] = self.values
+                self.values = values
+            row = self.num_rows
+            self.index[state] = row
+            self.num_rows += 1
+        return row
+
+    def __getitem__(self, key):
+        state, actions = key
+        row = self.row(state)
+        return self.values[row, actions]
+
+    def __setitem__(self, key, value):
+        state, actions = key
+        row = self.row(state)
+        self.values[row, actions] = value
+
+    def __len__(self):
+        return self.num_rows
+
+    def peek(self, state):
+        """
+        Returns the Q-values of a state, zeros without allocating a row when it was never visited
+        """
+        row = self.index.get(state)
+        return self.values[row] if row is not None else np.zeros(self.num_actions)
+
+    def rowsOf(self, states):
+        """
+        Returns the rows of values holding a batch of states
+        """
+        return np.fromiter((self.row(state) for state in states), dtype=np.int64, count=len(states))
+
+    def states(self):
+        """
+        Returns the state of every row of values
+        """
+        states = np.zeros(self.num_rows, dtype=np.int64)
+        for state, row in self.index.items():
+            states[row] = state
+        return states
+
+    def visitedRows(self):
+        """
+        Returns the rows of the visited states, every used row
+        """
+        return np.arange(self.num_rows)
+
+    def save(self, path):
+        """
+        Saves the used rows to path.npy and their states to path-states.npy
+        """
+        np.save(path + '.npy', self.values[:self.num_rows])
+        np.save(path + '-states.npy', self.states())
+
+    def restore(self, path):
+        """
+        Replaces the table with the rows saved by save
+        """
+        values = np.load(path + '.npy')
+        capacity = len(self.values)
+        while capacity < len(values):
+            capacity *= 2
+
+        self.values = np.zeros((capacity, self.num_actions))
+        self.values[:len(values)] = values
+        self.index = {int(state): row for row, state in enumerate(np.load(path + '-states.npy'))}
+        self.num_rows = len(values)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Loads a table saved by save, the Q-values are memory-mapped read-only
+        by default. Visiting a new state copies the table to memory.
+        """
+        table = cls.__new__(cls)
+        table.values = np.load(path + '.npy', mmap_mode='r' if mmap else None)
+        table.num_actions = table.values.shape[1]
+        table.index = {int(state): row for row, state in enumerate(np.load(path + '-states.npy'))}
+        table.num_rows = len(table.values)
+        return table
+
+
+class IndexedQTable(SparseQTable):
+    """
+    Q-table over a fixed set of states known in advance, such as the
+    reachable states of a TransitionGraph
+
+    Works as a SparseQTable whose rows are all allocated up front, over an
+    existing (num_states, num_actions) array that can live in shared memory.
+    Visiting a state out of the set raises a KeyError instead of growing the
+    table.
+    """
+    def __init__(self, states, values):
+        self.num_actions = values.shape[1]
+        self.values = values
+        self.index = {int(state): row for row, state in enumerate(states)}
+        self.num_rows = len(self.index)
+
+    def row(self, state):
+        """
+        Returns the row of a state, raises a KeyError when it is not in the table
+        """
+        row = self.index.get(state)
+        if row is None:
+            raise KeyError("State {} is not in the Q-table".format(state))
+        return row
+
+    def restore(self, path):
+        """
+        Copies the rows saved by save into the table, keeping its array
+        """
+        self.values[:] = 0
+        self.values[self.rowsOf(np.load(path + '-states.npy'))] = np.load(path + '.npy')
+
+
+def makeQTable(kind, num_states, num_actions, filename=None):
+    """
+    Builds a Q-table
+
+    kind : str
+        - "dense" for QTable, "sparse" for SparseQTable, "memmap" for a QTable
+          backed by the np.memmap file filename
+    """
+    if kind == 'dense':
+        return QTable(num_states, num_actions)
+    if kind == 'memmap':
+        return QTable(num_states, num_actions, filename)
+    if kind == 'sparse':
+        return SparseQTable(num_states, num_actions)
+    raise ValueError("Unknown Q-table '{}'".format(kind))
+
+
+def warmStart(table, path):
+    """
+    Copies the Q-values saved by the save of any kind of Q-table into a table
+
+    Rows that are all zero are skipped, so a dense table only fills the rows
+    of the states it learned something about.
+    """
+    values = np.load(path + '.npy', mmap_mode='r')
+    if os.path.exists(path + '-states.npy'):
+        states = np.load(path + '-states.npy')
+    else:
+        states = np.arange(len(values))
+
+    used = np.flatnonzero(np.any(values != 0, axis=1))
+    rows = table.rowsOf(states[used])
+    table.values[rows] = values[used]
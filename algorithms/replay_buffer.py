@@ -0,0 +1,75 @@
+import numpy as np
+
+
+class ReplayBuffer:
+    """
+    Fixed-capacity ring buffer of transitions
+
+    Every field is a preallocated NumPy column, once the buffer is full the
+    oldest transitions are overwritten.
+
+    Attributes
+    ----------
+    states, actions, rewards, next_states, dones : arrays
+        - one column per field, only the first len(buffer) rows are used
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.states = np.zeros(capacity, dtype=np.int64)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float64)
+        self.next_states = np.zeros(capacity, dtype=np.int64)
+        self.dones = np.zeros(capacity, dtype=np.bool_)
+
+        self.position = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        """
+        Stores one transition
+        """
+        idx = self.position
+        self.states[idx] = state
+        self.actions[idx] = action
+        self.rewards[idx] = reward
+        self.next_states[idx] = next_state
+        self.dones[idx] = done
+
+        self.position = (idx + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def addBatch(self, states, actions, rewards, next_states, dones):
+        """
+        Stores a batch of transitions
+        """
+        count = len(states)
+        if count > self.capacity:
+            # Only the newest transitions fit
+            states, actions, rewards, next_states, dones = (column[-self.capacity:] for column in
+                                                            (states, actions, rewards, next_states, dones))
+            count = self.capacity
+
+        idx = (self.position + np.arange(count)) % self.capacity
+        self.states[idx] = states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_states[idx] = next_states
+        self.dones[idx] = dones
+
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+
+    def sample(self, batch_size):
+        """
+        Draws transitions uniformly at random, with replacement
+
+        Returns
+        -------
+
+        (states, actions, rewards, next_states, dones) - one array per field
+        """
+        idx = np.random.randint(self.size, size=batch_size)
+        return self.states[idx], self.actions[idx], self.rewards[idx], self.next_states[idx], self.dones[idx]
@@ -1,7 +1,7 @@
 import gym
 import numpy as np
 
-from algorithms import Algorithm
+from algorithms import Algorithm, maskedArgmax, maskedSample, tdUpdate
 from utils import Logger
 
 class Sarsa(Algorithm):
@@ -28,12 +28,9 @@ class Sarsa(Algorithm):
     logger: Logger
         - logger class for printing the values obtained from the algorithm
     
-    q_table : List of lists of doubles
+    q_table : QTable or SparseQTable
         - Q-table containing the values fo the actions of the Q-learning algorithm
 
-    rewards_all_episodes : List of int
-        - list containing the rewards values from all episodes
-
     """
 
     def __init__(self, env, data, algorithmType, render, verbose):
@@ -62,17 +59,16 @@ class Sarsa(Algorithm):
 
         super().__init__(env, data, algorithmType, render, verbose)
 
-        self.logger = Logger("Sarsa")
-
-        # Set the action and state spaces
-        action_space_size = self.env.action_space.n
-        state_space_size = self.env.observation_space.n
+        self.logger = self.newLogger("Sarsa")
 
         # Initializing the Q-matrix
-        self.q_table = np.zeros((state_space_size, action_space_size))
+        self.q_table = self.newQTable('q_table')
 
-        # List of rewards
-        self.rewards_all_episodes = []
+    def qTables(self):
+        """
+        Returns the Q-tables saved in the checkpoints
+        """
+        return {'q_table' : self.q_table}
 
     def finishLog(self):
         """
@@ -84,8 +80,19 @@ class Sarsa(Algorithm):
         """
         Method for running the Q-Learning algorithm
         """
+        if self.num_envs > 1:
+            self.runBatched()
+        else:
+            self.runSequential()
+
+        if self.verbose: Logger.finish(self.stats.total.mean, self.exploration_rate)
+
+    def runSequential(self):
+        """
+        Runs the episodes one after the other on the environment
+        """
         # Starting the SARSA learning
-        for episode in range(self.num_episodes):
+        for episode in range(self.start_episode, self.num_episodes):
             if self.verbose: Logger.newEpisode(episode)
 
             # Reset the envirnoment , start the episode and get the initial observation
@@ -119,26 +126,19 @@ class Sarsa(Algorithm):
                         self.env.render()
                     break
             
+            solved = self.env.unwrapped.game.isGoal()
+            epsilon = self.exploration_rate
+
             # Exploration rate decay
             # Reduce exploration rate (epsilon), because we need less and less exploration
             self.exploration_rate = self.min_exploration_rate + \
                 (self.max_exploration_rate - self.min_exploration_rate) * np.exp(-self.exploration_decay_rate * episode)
 
-            self.rewards_all_episodes.append(rewards_current_episode)
-
             if self.render: self.env.render()
-            self.logger.writeLog(episode, rewards_current_episode)
-
-        # Calculate and print the average reward per 10 episodes
-        rewards_per_thousand_episodes = np.split(np.array(self.rewards_all_episodes), self.num_episodes / 100)
-
-        count = 100
-        for r in rewards_per_thousand_episodes:
-            self.logger.writeAvgRewards(count, r)
-            if self.verbose: Logger.printAvgRewards(count, r)
-            count += 100
-
-        if self.verbose: Logger.finish(self.rewards_all_episodes, self.num_episodes, self.exploration_rate)
+            self.logEpisode(episode, rewards_current_episode, step + 1, solved, epsilon)
+            if not self.endEpisode(episode, rewards_current_episode):
+                break
+            self.saveCheckpoint(episode)
 
     def choose_action(self, state):
         """
@@ -151,24 +151,10 @@ class Sarsa(Algorithm):
             - Index for the current value of the Q table
 
         """
-        validMoves = self.env.game.getValid()
-        action = 0
+        validMask = self.env.getValidMask()
         if np.random.uniform(0, 1) < self.exploration_rate:
-            action = self.env.action_space.sample()
-            while action not in validMoves:
-                action = self.env.action_space.sample()
-        else:
-            qtableT = self.q_table[state,:]
-            action = np.argmax(self.q_table[state,:])
-
-            already = False
-            arr = qtableT.argsort()[::-1]
-            for i in arr:
-                if i in validMoves and not already:
-                    action = i
-                    already = True
-
-        return action
+            return maskedSample(validMask)
+        return maskedArgmax(self.q_table[state,:], validMask)
   
 
     def update(self, state, state2, reward, action, action2):
@@ -195,4 +181,23 @@ class Sarsa(Algorithm):
         """
         predict = self.q_table[state, action]
         target = reward + self.discount_rate * self.q_table[state2, action2]
-        self.q_table[state, action] = self.q_table[state, action] + self.learning_rate * (target - predict)
\ No newline at end of file
+        self.q_table[state, action] = self.q_table[state, action] + self.learning_rate * (target - predict)
+
+    def batchActions(self, states, masks):
+        """
+        Chooses an action for every board of a batch, exploring with the exploration rate
+        """
+        rows = self.q_table.rowsOf(states)
+        actions = maskedArgmax(self.q_table.values[rows], masks)
+        explore = np.random.uniform(0, 1, len(states)) < self.exploration_rate
+        actions[explore] = maskedSample(masks[explore])
+        return actions
+
+    def batchUpdate(self, states, actions, rewards, nextStates, dones, nextActions):
+        """
+        Learns the Q-values of a batch of transitions, bootstrapping on the next action as update does
+        """
+        rows, nextRows = self.q_table.rowsOf(states), self.q_table.rowsOf(nextStates)
+        values = self.q_table.values
+        targets = rewards + self.discount_rate * values[nextRows, nextActions]
+        tdUpdate(values, rows, actions, targets, self.learning_rate)
\ No newline at end of file
@@ -0,0 +1,183 @@
+import numpy as np
+
+from utils import WindowStats
+
+
+class StoppingCriterion:
+    """
+    Base class of the stopping criteria, episode callbacks whose progress is
+    saved with the checkpoints
+
+    Attributes
+    ----------
+    progress : tuple of str
+        - attributes changed by the checks, see state and restore
+    """
+    progress = ()
+
+    def state(self):
+        """
+        Returns the progress of the criterion
+        """
+        return {name: getattr(self, name) for name in self.progress}
+
+    def restore(self, state):
+        """
+        Continues from a progress returned by state
+        """
+        for name, value in state.items():
+            setattr(self, name, value)
+
+
+class GreedyRollout(StoppingCriterion):
+    """
+    Stops once the greedy policy solves the board
+
+    Every `every` episodes, plays the board from the start always taking the
+    valid action with the best summed Q-value, without exploring and without
+    touching the random number generators, and stops the training when it
+    reaches the goal within max_steps moves.
+    """
+    def __init__(self, every, max_steps):
+        self.every = every
+        self.max_steps = max_steps
+
+    def rollout(self, algorithm):
+        """
+        Plays the greedy policy of an algorithm
+
+        Returns
+        -------
+
+        int - number of moves to the goal, None if it was not reached
+        """
+        env = algorithm.env
+        tables = list(algorithm.qTables().values())
+        state = env.reset()
+        for step in range(self.max_steps):
+            values = sum(table.peek(state) for table in tables)
+            action = int(np.argmax(np.where(env.getValidMask(), values, -np.inf)))
+            state, _, done, _ = env.step(action)
+            if env.unwrapped.game.isGoal():
+                return step + 1
+            if done:
+                return None
+        return None
+
+    def __call__(self, algorithm, episode, reward):
+        if (episode + 1) % self.every:
+            return None
+
+        moves = self.rollout(algorithm)
+        if moves is None:
+            return None
+        return "greedy policy solves the board in {} moves after {} episodes".format(moves, episode + 1)
+
+
+class QDelta(StoppingCriterion):
+    """
+    Stops once the Q-values barely change
+
+    Every `every` episodes, compares the visited rows of the Q-tables with a
+    copy taken at the previous check, and stops the training when no Q-value
+    moved by more than tolerance and no other state was visited in between.
+    """
+    progress = ('previous',)
+
+    def __init__(self, every, tolerance):
+        self.every = every
+        self.tolerance = tolerance
+        self.previous = None
+
+    def snapshot(self, table):
+        """
+        Returns the visited rows of a Q-table and a copy of them
+        """
+        rows = table.visitedRows()
+        return rows, table.values[rows]
+
+    def __call__(self, algorithm, episode, reward):
+        if (episode + 1) % self.every:
+            return None
+
+        current = {name: self.snapshot(table) for name, table in algorithm.qTables().items()}
+        previous, self.previous = self.previous, current
+        if previous is None:
+            return None
+
+        delta = 0.0
+        for name, (rows, values) in current.items():
+            previousRows, previousValues = previous[name]
+            if not np.array_equal(rows, previousRows):
+                return None
+            if len(values):
+                delta = max(delta, float(np.max(np.abs(values - previousValues))))
+
+        if delta > self.tolerance:
+            return None
+        return "Q-values moved by at most {:.3g} over the last {} episodes".format(delta, self.every)
+
+
+class RewardPlateau(StoppingCriterion):
+    """
+    Stops once the average reward stops improving
+
+    Every `every` episodes, compares the average reward of the last window
+    episodes with the best average of the previous checks, and stops the
+    training after `patience` checks in a row without an improvement above
+    tolerance.
+    """
+    progress = ('window', 'best', 'stale')
+
+    def __init__(self, every, window, tolerance, patience=1):
+        self.every = every
+        self.window = WindowStats(window)
+        self.tolerance = tolerance
+        self.patience = patience
+        self.best = None
+        self.stale = 0
+
+    def __call__(self, algorithm, episode, reward):
+        self.window.add(reward)
+        if (episode + 1) % self.every or self.window.count < self.window.size:
+            return None
+
+        average = self.window.mean
+        if self.best is None or average > self.best + self.tolerance:
+            self.best = average
+            self.stale = 0
+            return None
+
+        self.stale += 1
+        if self.stale < self.patience:
+            return None
+        return "average reward {:.2f} of the last {} episodes did not improve by {} in {} episodes".format(
+            average, self.window.size, self.tolerance, self.stale * self.every)
+
+
+def makeStoppingCriteria(config, max_steps):
+    """
+    Builds the stopping criteria of a stop_when param
+
+    config : dict
+        - criterion -> settings, every criterion has an "every" check interval (default 100):
+            - "greedy" : {"max_steps"} (default max_steps), see GreedyRollout
+            - "q_delta" : {"tolerance"} (default 1e-4), see QDelta
+            - "plateau" : {"window" (default 1000), "tolerance" (default 0.1), "patience" (default 1)}, see RewardPlateau
+
+    max_steps : int
+        - default number of moves of the greedy rollout
+    """
+    criteria = []
+    for kind, settings in config.items():
+        every = settings.get('every', 100)
+        if kind == 'greedy':
+            criteria.append(GreedyRollout(every, settings.get('max_steps', max_steps)))
+        elif kind == 'q_delta':
+            criteria.append(QDelta(every, settings.get('tolerance', 1e-4)))
+        elif kind == 'plateau':
+            criteria.append(RewardPlateau(every, settings.get('window', 1000), settings.get('tolerance', 0.1),
+                                          settings.get('patience', 1)))
+        else:
+            raise ValueError("Unknown stopping criterion '{}'".format(kind))
+    return criteria
@@ -0,0 +1,4 @@
+from .suite import bestTime, loadBoards, benchPuzzle, benchEnv, benchLearner, runSuite
+from .report import machineInfo, saveResults, loadResults, compareResults, printComparison
+
+__all__ = ['bestTime', 'loadBoards', 'benchPuzzle', 'benchEnv', 'benchLearner', 'runSuite', 'machineInfo', 'saveResults', 'loadResults', 'compareResults', 'printComparison']
@@ -0,0 +1,46 @@
+import sys
+from datetime import datetime
+
+from benchmarks import runSuite, saveResults, loadResults, compareResults, printComparison
+from utils import Logger
+
+USAGE = """Usage:
+    python -m benchmarks run [OUTPUT] [EPISODES] [-quick]
+    python -m benchmarks compare CURRENT BASELINE [THRESHOLD]"""
+
+# Benchmarks of the puzzle, the environment and the learners: python -m benchmarks run|compare
+if __name__ == "__main__":
+    # -quick trades accuracy for a run of a few seconds
+    quick = '-quick' in sys.argv
+    sys.argv = [arg for arg in sys.argv if arg != '-quick']
+
+    if len(sys.argv) < 2 or sys.argv[1] not in ('run', 'compare'):
+        print(USAGE)
+        exit(-1)
+
+    if sys.argv[1] == 'run':
+        output = sys.argv[2] if len(sys.argv) > 2 else 'benchmarks/results/{}.json'.format(datetime.now().strftime("%Y-%m-%d-%H_%M_%S"))
+        episodes = int(sys.argv[3]) if len(sys.argv) > 3 else (50 if quick else 300)
+        min_seconds = 0.2 if quick else 1.0
+
+        results = runSuite(episodes=episodes, min_seconds=min_seconds)
+        saveResults(results, output, {'episodes' : episodes, 'min_seconds' : min_seconds})
+        print("Results saved to {}".format(output))
+    else:
+        if len(sys.argv) < 4:
+            print(USAGE)
+            exit(-1)
+        threshold = float(sys.argv[4]) if len(sys.argv) > 4 else 0.1
+
+        try:
+            current, baseline = loadResults(sys.argv[2]), loadResults(sys.argv[3])
+        except FileNotFoundError as error:
+            Logger.error("Benchmark results {} not found. Make them with \"python -m benchmarks run\".".format(error.filename))
+            exit(-1)
+        rows = compareResults(baseline, current, threshold)
+        printComparison(baseline, current, rows)
+
+        regressions = [row for row in rows if row['status'] == 'regression']
+        if regressions:
+            print("{} regressions beyond {:.0f}%".format(len(regressions), 100 * threshold))
+            exit(1)
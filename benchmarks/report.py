@@ -0,0 +1,118 @@
+# -- Imports -- #
+
+import os
+import json
+import platform
+import subprocess
+from datetime import datetime
+
+import numpy as np
+
+
+def cpuModel():
+    """
+    Returns the CPU model name, from /proc/cpuinfo on Linux
+    """
+    try:
+        with open('/proc/cpuinfo') as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor()
+
+def gitCommit():
+    """
+    Returns the commit of the working tree, None outside of a git repository
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def machineInfo():
+    """
+    Returns the metadata of the machine and code the benchmarks ran on
+    """
+    return {'date' : datetime.now().isoformat(timespec='seconds'),
+            'host' : platform.node(),
+            'platform' : platform.platform(),
+            'machine' : platform.machine(),
+            'cpu' : cpuModel(),
+            'cpu_count' : os.cpu_count(),
+            'python' : platform.python_version(),
+            'numpy' : np.__version__,
+            'commit' : gitCommit(),
+    }
+
+def saveResults(results, path, settings=None):
+    """
+    Writes the results of runSuite with the machine metadata to a JSON file
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as json_file:
+        json.dump({'machine' : machineInfo(), 'settings' : settings or {}, 'results' : results}, json_file, indent=4)
+
+def loadResults(path):
+    with open(path) as json_file:
+        return json.load(json_file)
+
+def compareResults(baseline, current, threshold=0.1):
+    """
+    Compares two benchmark files
+
+    Parameters
+    ----------
+
+    baseline, current : dict
+        - contents of files written by saveResults
+
+    threshold : double
+        - relative slowdown above which a benchmark is a regression
+
+    Returns
+    -------
+
+    list of dict - name, baseline, current, change and status ("regression",
+    "improvement" or "ok") of every benchmark in both files, change is the
+    relative speedup, negative when slower
+    """
+    rows = []
+    for name, old in baseline['results'].items():
+        new = current['results'].get(name)
+        if new is None:
+            continue
+
+        # Positive change means faster, whatever the unit
+        if old['higher_is_better']:
+            change = new['value'] / old['value'] - 1
+        else:
+            change = old['value'] / new['value'] - 1
+
+        if change < -threshold:
+            status = 'regression'
+        elif change > threshold:
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append({'name' : name, 'unit' : old['unit'], 'baseline' : old['value'], 'current' : new['value'],
+                     'change' : change, 'status' : status})
+    return rows
+
+def printComparison(baseline, current, rows):
+    for key in ('host', 'cpu', 'python', 'numpy'):
+        if baseline['machine'].get(key) != current['machine'].get(key):
+            print("Warning: {} differs, {} vs {}".format(key, baseline['machine'].get(key), current['machine'].get(key)))
+
+    print("{:<55}{:>14}{:>14}{:>9}  {}".format("Benchmark", "Baseline", "Current", "Change", "Unit"))
+    for row in rows:
+        mark = {'regression' : ' REGRESSION', 'improvement' : ' improved', 'ok' : ''}[row['status']]
+        print("{:<55}{:>14.1f}{:>14.1f}{:>+8.1f}%  {}{}".format(
+            row['name'], row['baseline'], row['current'], 100 * row['change'], row['unit'], mark))
+
+    missing = set(baseline['results']) ^ set(current['results'])
+    if missing:
+        print("{} benchmarks are only in one of the files".format(len(missing)))
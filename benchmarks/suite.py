@@ -0,0 +1,226 @@
+# -- Imports -- #
+
+import os
+import glob
+import json
+import random
+import time
+from copy import deepcopy
+
+import numpy as np
+
+# -- Personal Imports -- #
+
+from algorithms import AlgorithmType, QLearning, Sarsa, DoubleQLearning
+from gym_game.envs.ball_sort_env import BallSortEnv
+from gym_game.envs.ball_sort_puzzle import BallSortPuzzle
+from gym_game.envs.packed_ball_sort_puzzle import PackedBallSortPuzzle
+from gym_game.envs.state_indexer import StateIndexer
+from utils import GameSettings
+from solvers import BoardGenerator
+from main import envKwargs
+
+
+# Puzzle methods timed on a fixed board, none of them changes it
+PUZZLE_METHODS = ['getValid', 'isGoal', 'isStuck', 'calculateReward', 'recalculateReward', 'getState']
+PUZZLES = {'list' : BallSortPuzzle, 'packed' : PackedBallSortPuzzle}
+LEARNERS = {'QLearning' : QLearning, 'Sarsa' : Sarsa, 'DoubleQLearning' : DoubleQLearning}
+
+# (colors, bottle size) of the generated boards, each with two empty bottles
+BOARD_SIZES = [(3, 3), (4, 3), (4, 4), (5, 4), (6, 4)]
+
+# Learner params of the generated boards
+GENERATED_PARAM = {"max_steps_per_episode" : 100,
+                   "learning_rate" : 0.1,
+                   "discount_rate" : 0.9,
+                   "exploration_rate" : 1,
+                   "max_exploration_rate" : 1,
+                   "min_exploration_rate" : 0.001,
+                   "exploration_decay_rate" : 0.01,
+}
+
+
+def bestTime(function, number, repeat=3):
+    """
+    Returns the best time, in nanoseconds per call, of repeat runs of number calls
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            function()
+        elapsed = (time.perf_counter_ns() - start) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def autoNumber(function, min_seconds):
+    """
+    Returns a number of calls of function lasting at least min_seconds
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        if time.perf_counter() - start >= min_seconds:
+            return number
+        number *= 2
+
+def result(value, unit, higher_is_better):
+    return {'value' : value, 'unit' : unit, 'higher_is_better' : higher_is_better}
+
+def loadBoards(config_dir, sizes=BOARD_SIZES, seed=0):
+    """
+    Returns the benchmark boards: name -> (board, max_steps, param)
+
+    Every config/level*.json with tabular params is used as it is, followed by
+    one solvable board of each size made by BoardGenerator
+    """
+    boards = {}
+    for path in sorted(glob.glob(os.path.join(config_dir, 'level*.json'))):
+        with open(path) as json_file:
+            data = json.load(json_file)
+        if 'exploration_decay_rate' not in data.get('param', {}):
+            continue
+        name = os.path.splitext(os.path.basename(path))[0]
+        boards[name] = (data['board'], data['max_steps'], data['param'])
+
+    for num_colors, bottle_size in sizes:
+        name = 'generated-{}x{}'.format(num_colors, bottle_size)
+        board, _ = BoardGenerator(num_colors, bottle_size, 2, seed=seed).generate()
+        boards[name] = (board, 100, GENERATED_PARAM)
+    return boards
+
+def makeEnv(board, max_steps, backend='list'):
+    data = {'board' : board, 'max_steps' : max_steps, 'backend' : backend}
+    return BallSortEnv(**envKwargs(data, GameSettings(board)))
+
+def randomWalk(game, length, rng):
+    """
+    Plays up to length random valid moves, returns the actions played
+    """
+    actions = []
+    for _ in range(length):
+        valid = game.getValid()
+        if not valid or game.isGoal():
+            break
+        action = rng.choice(valid)
+        game.applyMovement(action)
+        actions.append(action)
+    return actions
+
+def benchPuzzle(board, min_seconds=0.1, walk_length=200, seed=0):
+    """
+    Microbenchmarks every BallSortPuzzle method on a fixed board, for both board backends
+
+    Returns
+    -------
+
+    dict - backend/method -> ns per call
+    """
+    settings = GameSettings(board)
+    colors = sorted({ball for bottle in board for ball in bottle if ball != 0})
+    indexer = StateIndexer(settings.bottle_size, settings.num_bottles, colors, settings.ball_per_color)
+
+    results = {}
+    for backend, puzzle in PUZZLES.items():
+        newGame = lambda: puzzle(deepcopy(board), settings.bottle_size, settings.num_bottles, indexer)
+        game = newGame()
+        for method in PUZZLE_METHODS:
+            function = getattr(game, method)
+            results['{}/{}'.format(backend, method)] = bestTime(function, autoNumber(function, min_seconds))
+        results['{}/init'.format(backend)] = bestTime(newGame, autoNumber(newGame, min_seconds))
+
+        # applyMovement changes the board, time a fixed random walk from fresh games
+        walk = randomWalk(newGame(), walk_length, random.Random(seed))
+        if not walk:
+            continue
+        best, repeats = None, 0
+        deadline = time.perf_counter() + min_seconds
+        while repeats < 3 or time.perf_counter() < deadline:
+            game = newGame()
+            start = time.perf_counter_ns()
+            for action in walk:
+                game.applyMovement(action)
+            elapsed = (time.perf_counter_ns() - start) / len(walk)
+            best = elapsed if best is None else min(best, elapsed)
+            repeats += 1
+        results['{}/applyMovement'.format(backend)] = best
+    return results
+
+def benchEnv(board, max_steps, backend, min_seconds=1.0, seed=0):
+    """
+    Plays random valid moves on a BallSortEnv for at least min_seconds
+
+    Returns
+    -------
+
+    float - steps per second, including reset and the valid action masks
+    """
+    env = makeEnv(board, max_steps, backend)
+    rng = np.random.default_rng(seed)
+
+    steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        env.reset()
+        done = False
+        while not done:
+            valid = np.flatnonzero(env.getValidMask())
+            action = valid[rng.integers(len(valid))] if len(valid) else 0
+            _, _, done, _ = env.step(action)
+            steps += 1
+    return steps / (time.perf_counter() - start)
+
+def benchLearner(learner, board, max_steps, param, episodes, seed=0):
+    """
+    Trains a learner for a number of episodes, its logs are removed afterwards
+
+    Returns
+    -------
+
+    float - episodes per second
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+
+    param = dict(param, num_episodes=episodes, log_name='benchmark', checkpoint_every=0)
+    env = makeEnv(board, max_steps)
+    algorithm = LEARNERS[learner](env, param, AlgorithmType.VANILLA, False, False)
+
+    start = time.perf_counter()
+    algorithm.run()
+    seconds = time.perf_counter() - start
+
+    for path in algorithm.finishLog():
+        os.remove(path)
+    return algorithm.stats.count / seconds
+
+def runSuite(config_dir='config', episodes=300, min_seconds=1.0, backends=('list', 'packed'), verbose=True):
+    """
+    Runs every benchmark
+
+    Returns
+    -------
+
+    dict - benchmark name -> {"value", "unit", "higher_is_better"}
+    """
+    results = {}
+    def record(name, value, unit, higher_is_better):
+        results[name] = result(value, unit, higher_is_better)
+        if verbose: print("{:<55}{:>14.1f} {}".format(name, value, unit))
+
+    boards = loadBoards(config_dir)
+    for name, (board, max_steps, param) in boards.items():
+        for method, ns in benchPuzzle(board, min_seconds / 10).items():
+            record('puzzle/{}/{}'.format(name, method), ns, 'ns/call', False)
+
+    for name, (board, max_steps, param) in boards.items():
+        for backend in backends:
+            record('env/{}/{}'.format(name, backend), benchEnv(board, max_steps, backend, min_seconds), 'steps/s', True)
+
+    for name, (board, max_steps, param) in boards.items():
+        for learner in LEARNERS:
+            record('learner/{}/{}'.format(name, learner), benchLearner(learner, board, max_steps, param, episodes), 'episodes/s', True)
+
+    return results
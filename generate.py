@@ -0,0 +1,52 @@
+import sys
+import json
+
+from solvers import BoardGenerator, saveConfig, saveBoards
+
+USAGE = "Usage: generate.py [COLORS] [BOTTLE_SIZE] [EMPTY] [OUTPUT.json|OUTPUT.npz] { -count N -seed N -min_depth N -max_depth N -moves N -param CONFIG }"
+
+# Learning params of the generated configs, unless -param copies them from a config file
+DEFAULT_PARAM = {"num_episodes" : 30000,
+                 "max_steps_per_episode" : 100,
+                 "learning_rate" : 0.1,
+                 "discount_rate" : 0.9,
+                 "exploration_rate" : 1,
+                 "max_exploration_rate" : 1,
+                 "min_exploration_rate" : 0.001,
+                 "exploration_decay_rate" : 0.01
+}
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {'-count' : '1', '-seed' : None, '-min_depth' : None, '-max_depth' : None, '-moves' : None, '-param' : None}
+    for option in options:
+        if option in args:
+            idx = args.index(option)
+            options[option] = args[idx + 1]
+            del args[idx:idx + 2]
+
+    if len(args) != 4 or not args[3].endswith(('.json', '.npz')):
+        print(USAGE)
+        exit(-1)
+
+    number = lambda option: None if options[option] is None else int(options[option])
+    generator = BoardGenerator(int(args[0]), int(args[1]), int(args[2]), seed=number('-seed'))
+    batch = generator.batch(int(options['-count']), min_depth=number('-min_depth'),
+                            max_depth=number('-max_depth'), moves=number('-moves'))
+    output = args[3]
+
+    if output.endswith('.npz'):
+        saveBoards(output, [board for board, _ in batch], [depth for _, depth in batch])
+        print("{} boards saved to {}".format(len(batch), output))
+        exit(0)
+
+    max_steps, param = 100, DEFAULT_PARAM
+    if options['-param'] is not None:
+        with open('./config/{}'.format(options['-param'])) as json_file:
+            data = json.load(json_file)
+        max_steps, param = data['max_steps'], data['param']
+
+    for idx, (board, depth) in enumerate(batch):
+        path = output if len(batch) == 1 else output[:-len('.json')] + '-{}.json'.format(idx)
+        saveConfig(path, board, depth, max_steps, param)
+        print("{} : depth {}".format(path, depth))
@@ -7,15 +7,26 @@ import numpy as np
 from math import perm, comb, factorial
 from copy import deepcopy
 from gym_game.envs.ball_sort_puzzle import BallSortPuzzle
+from gym_game.envs.packed_ball_sort_puzzle import PackedBallSortPuzzle
+from gym_game.envs.state_indexer import StateIndexer
+from gym_game.envs.transition_graph import TransitionGraph, GraphBallSortPuzzle
+from gym_game.envs.symmetry import Canonicalizer
 
 class BallSortEnv(gym.Env):
     """
     clas to represent the Ball Sort Puzzle environment
     """
     metadata = {'render.modes': ['human']}
+    backends = ('list', 'packed', 'graph')
+
+    def __init__(self, board, max_steps, bottle_size, num_bottles, empty_spaces, num_balls, ball_per_color, num_colors, backend='list', debug=False, graph_file=None, symmetry=False):
+        if backend not in self.backends:
+            raise ValueError("Unknown board backend '{}'".format(backend))
 
-    def __init__(self, board, max_steps, bottle_size, num_bottles, empty_spaces, num_balls, ball_per_color, num_colors):
         self.orig_board = board
+        self.backend = backend
+        self.debug = debug
+        self.symmetry = symmetry
         self.max_steps = max_steps
         self.bottle_size = bottle_size
         self.num_bottles = num_bottles
@@ -35,11 +46,28 @@ class BallSortEnv(gym.Env):
         # Observation Space
         # Number of States
         empty_spaces = self.emptySpacesComb(self.empty_spaces, self.num_bottles, self.bottle_size) 
-        ball_permutations = factorial(self.num_balls) / (pow(factorial(self.ball_per_color), self.num_colors))
-        value = int(empty_spaces * ball_permutations)
+        ball_permutations = factorial(self.num_balls) // pow(factorial(self.ball_per_color), self.num_colors)
+        value = empty_spaces * ball_permutations
 
         self.observation_space = gym.spaces.Discrete(value)
 
+        # Ranks every board in [0, value), state ids are the same in every episode
+        colors = sorted({ball for bottle in board for ball in bottle if ball != 0})
+        self.indexer = StateIndexer(self.bottle_size, self.num_bottles, colors, self.ball_per_color)
+
+        # States and actions seen through the canonical board, see Canonicalizer
+        if self.symmetry:
+            self.canonicalizer = Canonicalizer(self.num_bottles, colors)
+
+        # Precomputed transitions, step() becomes a table lookup
+        if self.backend == 'graph':
+            if graph_file is None:
+                self.graph = TransitionGraph.build(board, self.bottle_size, self.num_bottles)
+            else:
+                self.graph = TransitionGraph.load(graph_file)
+                if self.graph.board.tolist() != board:
+                    raise ValueError("Transition graph {} was built for another board".format(graph_file))
+
         # Init Game
         self.reset()
 
@@ -55,12 +83,12 @@ class BallSortEnv(gym.Env):
         factor = w + 1
 
         for i in range(k + 1):
-            value = comb(10, i) * pow(-1, i)
+            value = comb(k, i) * pow(-1, i)
             firstSeries.append(value)
         
         for i in range(n + 1):
-            value = factorial(k + i - 1) / (factorial(k - 1) * factorial(i))
-            secondSeries.append(int(value))
+            value = factorial(k + i - 1) // (factorial(k - 1) * factorial(i))
+            secondSeries.append(value)
 
         result = 0
         for idx, i in enumerate(firstSeries):
@@ -72,54 +100,60 @@ class BallSortEnv(gym.Env):
 
         return sum(valueList)
 
-    def argMax(self, validMoves, q_table_line):
+    def getValidMask(self):
         """
-        Get the action with maximum value
-
-        validMoves : list of Moves
-            - List containing all the valid moves
-        
-        q_table_line : List
-            - Single q_table row
+        Returns a boolean mask over the action space, True for the valid actions
         """
-        action = np.argmax(q_table_line)
-
-        stateValues = q_table_line.argsort()[::-1]
-        for i in stateValues:
-            if i in validMoves:
-                return i
+        mask = np.zeros(self.action_space.n, dtype=np.bool_)
+        mask[self.game.getValid()] = True
+        if self.symmetry:
+            return mask[self.actionMap]
+        return mask
 
-        return action    
-
-
-    def validSample(self, validMoves):
+    def reachableStates(self):
         """
-        Action validation
-
-        validMoves : list of Moves
-            - List containing all the valid moves
+        Returns the sorted state ids of every board of the transition graph,
+        canonical with symmetry, None without the graph backend
         """
-        action = self.action_space.sample()
-        if action not in validMoves:
-            return np.random.choice(validMoves)
-        
-        return action
+        if self.backend != 'graph':
+            return None
+        if not self.symmetry:
+            return np.unique(self.graph.ranks)
+
+        states = set()
+        for rank in self.graph.ranks:
+            board, _ = self.canonicalizer.canonicalize(self.indexer.unrank(int(rank)))
+            states.add(self.indexer.rank(board))
+        return np.array(sorted(states), dtype=np.int64)
+
+    def observe(self):
+        """
+        Returns the state id of the game, the id of its canonical board with symmetry
+        """
+        if not self.symmetry:
+            return self.game.getState()
 
+        board, order = self.canonicalizer.canonicalize(self.game.board)
+        self.actionMap = self.canonicalizer.actionMap(order)
+        return self.indexer.rank(board)
 
     def step(self, action):
         """
         Apply movement in the game
 
         action : action
-            - ACtion to be executed
+            - ACtion to be executed, on the canonical board with symmetry
 
         """
         self.iteration += 1
 
+        if self.symmetry:
+            action = self.actionMap[action]
+
         reward = self.game.applyMovement(action)
         done = self.game.isGoal()
         stuck = self.game.isStuck()
-        state = self.game.getState()
+        state = self.observe()
 
         if done: reward = self.num_balls
 
@@ -141,11 +175,21 @@ class BallSortEnv(gym.Env):
         """
         Reset the game
         """
-        board_copy = deepcopy(self.orig_board)
-        self.game = BallSortPuzzle(board_copy, self.bottle_size, self.num_bottles)
+        if self.backend == 'packed':
+            # The packed board is a single integer, restoring it is one assignment
+            if not hasattr(self, 'game'):
+                self.game = PackedBallSortPuzzle(self.orig_board, self.bottle_size, self.num_bottles, self.indexer, self.debug)
+            self.game.reset()
+        elif self.backend == 'graph':
+            if not hasattr(self, 'game'):
+                self.game = GraphBallSortPuzzle(self.graph, self.bottle_size, self.num_bottles, self.indexer)
+            self.game.reset()
+        else:
+            board_copy = deepcopy(self.orig_board)
+            self.game = BallSortPuzzle(board_copy, self.bottle_size, self.num_bottles, self.indexer, self.debug)
 
         self.iteration = 0
-        self.state = 0
+        self.state = self.observe()
         self.done = False    
 
         return self.state
\ No newline at end of file
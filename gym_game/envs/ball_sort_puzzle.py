@@ -1,11 +1,11 @@
 from itertools import permutations 
-from math import perm
+from gym_game.envs.state_indexer import StateIndexer
 
 class BallSortPuzzle:
     """
     Class to apply the game mechanics of the Ball Sort Puzzle
     """
-    def __init__(self, board, bottle_size, num_bottles):
+    def __init__(self, board, bottle_size, num_bottles, indexer=None, debug=False):
         """
         Constructor for the BallSortPuzzle object
 
@@ -24,22 +24,36 @@ class BallSortPuzzle:
         actions : Action
             - permutations of possible actions in the game
 
-        states : List
-            - List of Game States
-        
-        numStatesDiscovered : int
-            - Number of discovered Stares
-        
+        indexer : StateIndexer
+            - maps boards to state ids, shared between games of the same environment
+
+        heights : list of int
+            - number of balls in each bottle
+
+        runs : list of lists of int
+            - runs[b][i] is the length of the single color run ending at board[b][i]
+
+        misplaced : list of int
+            - number of balls above the first color break of each bottle
+
+        misplacedBalls : int
+            - running total of misplaced, the negated reward of the game
+
+        debug : bool
+            - checks the running reward against a full recompute on every call
 
         """
         self.board = board
         self.bottle_size = bottle_size
         self.num_bottles = num_bottles
+        self.debug = debug
 
         self.actions = self.getActions()
+        self.buildMetadata()
 
-        self.states = {}
-        self.numStatesDiscovered = 0
+        if indexer is None:
+            indexer = StateIndexer.fromBoard(board, bottle_size, num_bottles)
+        self.indexer = indexer
 
         self.alreadyFull = 0
     
@@ -47,13 +61,55 @@ class BallSortPuzzle:
         """
         Returns the game state
         """
-        tup = tuple(tuple(sub) for sub in self.board)
-        if tup not in self.states.keys():    
-            self.states[tup] = self.numStatesDiscovered
-            self.numStatesDiscovered += 1
-            return self.states[tup]
-        else:
-            return self.states[tup]
+        return self.indexer.rank(self.board)
+
+    def buildMetadata(self):
+        """
+        Scans the board once to build the per bottle metadata kept by applyMovement
+        """
+        self.heights = []
+        self.runs = []
+        for bottle in self.board:
+            height = 0
+            runs = [0] * self.bottle_size
+            for idx, ball in enumerate(bottle):
+                if ball == 0:
+                    break
+                runs[idx] = runs[idx - 1] + 1 if idx > 0 and bottle[idx - 1] == ball else 1
+                height += 1
+            self.heights.append(height)
+            self.runs.append(runs)
+
+        self.buildMisplaced()
+
+    def buildMisplaced(self):
+        """
+        Counts the misplaced balls of every bottle, the start of the running reward
+        """
+        self.misplaced = [self.countMisplaced(idx) for idx in range(self.num_bottles)]
+        self.misplacedBalls = sum(self.misplaced)
+
+    def moveMisplaced(self, src, dst):
+        """
+        Updates the running reward after a ball moved from src to dst
+
+        The moved ball was misplaced only if src had misplaced balls, and as it
+        lands on a ball of its own color it is misplaced only if dst already
+        had misplaced balls
+        """
+        if self.misplaced[src]:
+            self.misplaced[src] -= 1
+            self.misplacedBalls -= 1
+        if self.misplaced[dst]:
+            self.misplaced[dst] += 1
+            self.misplacedBalls += 1
+
+    def getTop(self, idx):
+        """
+        Returns the color on top of a bottle, 0 if it is empty
+        """
+        height = self.heights[idx]
+        return self.board[idx][height - 1] if height else 0
 
     def applyMovement(self, action):
         """
@@ -71,47 +127,81 @@ class BallSortPuzzle:
         int - reward of the applied movement
 
         """
-        action = self.actions[action]
-        # Get pieces to toggle
-        first, second = self.pickPiece(self.board[action[0]]), self.getFirstEmpty(self.board[action[1]])
+        src, dst = self.actions[action]
+        srcHeight, dstHeight = self.heights[src], self.heights[dst]
 
         # Invalid Move
-        if first == -1 or second == -1:
+        if srcHeight == 0 or dstHeight == self.bottle_size:
              return self.calculateReward() - 10
 
         # Get Color to Swap
-        color = self.board[action[0]][first]
+        color = self.board[src][srcHeight - 1]
         # Invalid Move: a ball must be placed on top of a ball of the same color or on an empty tube
-        if not self.checkColor(color, self.board[action[1]], second-1):
+        if dstHeight and self.board[dst][dstHeight - 1] != color:
              return self.calculateReward() - 10
 
         # Do the action
-        self.board[action[0]][first] = 0
-        self.board[action[1]][second] = color
+        self.board[src][srcHeight - 1] = 0
+        self.board[dst][dstHeight] = color
+
+        # Update the metadata of both bottles
+        self.runs[src][srcHeight - 1] = 0
+        self.runs[dst][dstHeight] = self.runs[dst][dstHeight - 1] + 1 if dstHeight else 1
+        self.heights[src] = srcHeight - 1
+        self.heights[dst] = dstHeight + 1
+        self.moveMisplaced(src, dst)
 
         return self.calculateReward()
 
 
     def calculateReward(self):
         """
-        Calculates the rewards from the game
+        Calculates the rewards from the game, kept up to date by applyMovement
 
         Returns
         -------
         int - reward value of the game
 
         """
-        value = 0
-        for tubeIdx, tube in enumerate(self.board):
-            prevBall = -1
-            for idx, ball in enumerate(tube):
-                if prevBall != -1 and prevBall != ball and ball != 0:
-                    for i in range(idx, len(tube)):
-                        if tube[i] != 0:
-                            value -= 1
-                    break
-                prevBall = ball
-        return value
+        if self.debug and -self.misplacedBalls != self.recalculateReward():
+            raise AssertionError("Running reward {} differs from the recomputed {}".format(
+                -self.misplacedBalls, self.recalculateReward()))
+        return -self.misplacedBalls
+
+    def recalculateReward(self):
+        """
+        Calculates the rewards from the game, scanning the whole board
+
+        Returns
+        -------
+        int - reward value of the game
+
+        """
+        return -sum(self.countMisplaced(idx) for idx in range(self.num_bottles))
+
+    def countMisplaced(self, idx):
+        """
+        Counts the balls sitting above the first color break of a bottle
+
+        idx : int
+            - index of the bottle
+
+        Returns
+        -------
+        int - number of misplaced balls
+
+        """
+        tube = self.board[idx]
+        prevBall = -1
+        for pos, ball in enumerate(tube):
+            if prevBall != -1 and prevBall != ball and ball != 0:
+                value = 0
+                for i in range(pos, len(tube)):
+                    if tube[i] != 0:
+                        value += 1
+                return value
+            prevBall = ball
+        return 0
 
     def checkColor(self, color, bottle, index):
         """
@@ -186,8 +276,8 @@ class BallSortPuzzle:
         bool - true if it the puzzle has been solved, false otherwise
 
         """
-        for i in self.board:
-            if not all(element == i[0] for element in i):
+        for idx, height in enumerate(self.heights):
+            if height and self.runs[idx][self.bottle_size - 1] != self.bottle_size:
                 return False
         return True
     
@@ -207,19 +297,14 @@ class BallSortPuzzle:
 
         bool - true if the player is stuck, false otherwise
         """
-        isStuck = True
-        allActions = list(permutations(list(range(0, self.num_bottles)), 2))
-        for a in allActions:
-            if a[0] == a[1]:
+        heights = self.heights
+        for src, dst in self.actions.values():
+            if heights[src] == 0 or heights[dst] == self.bottle_size:
                 continue
-            first, second = self.pickPiece(self.board[a[0]]), self.getFirstEmpty(self.board[a[1]])
-            if first == -1 or second == -1:
-                continue
-            color = self.board[a[0]][first]
-            if not self.checkColor(color, self.board[a[1]], second-1):
+            if heights[dst] and self.getTop(dst) != self.getTop(src):
                 continue
             return False
-        return isStuck
+        return True
 
     def getValid(self):
         """
@@ -230,26 +315,19 @@ class BallSortPuzzle:
 
         List of actions - Returns a list of valid actions from the game
         """
-        numActions = perm(self.num_bottles, 2)
+        heights = self.heights
+        tops = [self.getTop(idx) for idx in range(self.num_bottles)]
         validActions = []
 
-        for num in range(numActions):
-            action = self.actions[num]
-            # Get pieces to toggle
-            first, second = self.pickPiece(self.board[action[0]]), self.getFirstEmpty(self.board[action[1]])
-
+        for num, (src, dst) in self.actions.items():
             # Invalid Move
-            if first == -1 or second == -1:
+            if heights[src] == 0 or heights[dst] == self.bottle_size:
                 continue
 
-            # Get Color to Swap
-            color = self.board[action[0]][first]
             # Invalid Move: a ball must be placed on top of a ball of the same color or on an empty tube
-            if not self.checkColor(color, self.board[action[1]], second-1):
+            if heights[dst] and tops[dst] != tops[src]:
                 continue
 
             validActions.append(num)
 
         return validActions
-
-        
@@ -0,0 +1,215 @@
+# -- Imports -- #
+import gym
+import numpy as np
+
+# -- Personal Imports -- #
+from itertools import permutations
+from stable_baselines3.common.vec_env import VecEnv
+from gym_game.envs.state_indexer import StateIndexer
+
+class BallSortVecEnv(VecEnv):
+    """
+    class to represent N Ball Sort Puzzle environments stepped together
+
+    The N boards live in a single (N, num_bottles, bottle_size) array and every
+    step applies the moves, rewards, goal and stuck checks and valid action
+    masks of all of them with array operations. Follows the Stable Baselines3
+    VecEnv contract: finished boards are reset automatically and their last
+    observation is kept in info["terminal_observation"], with its valid
+    actions in info["terminal_action_mask"].
+    """
+    def __init__(self, num_envs, board, max_steps, bottle_size, num_bottles, empty_spaces, num_balls, ball_per_color, num_colors,
+                 backend='list', debug=False, graph_file=None, symmetry=False):
+        """
+        Constructor for the BallSortVecEnv object
+
+        Parameters
+        ----------
+
+        num_envs : int
+            - number of boards stepped together
+
+        board, max_steps, bottle_size, num_bottles, empty_spaces, num_balls, ball_per_color, num_colors
+            - same as BallSortEnv
+
+        backend, debug, graph_file, symmetry
+            - BallSortEnv options, the boards are stepped the way of the list
+              backend without debug checks nor symmetry, any other value raises
+              a ValueError
+
+        """
+        if backend != 'list' or debug or graph_file is not None or symmetry:
+            raise ValueError("BallSortVecEnv only supports the list backend, without debug, graph_file nor symmetry")
+
+        self.orig_board = np.array(board, dtype=np.int8)
+        self.max_steps = max_steps
+        self.bottle_size = bottle_size
+        self.num_bottles = num_bottles
+        self.num_balls = num_balls
+
+        colors = sorted({ball for bottle in board for ball in bottle if ball != 0})
+        self.indexer = StateIndexer(bottle_size, num_bottles, colors, ball_per_color)
+
+        actions = list(permutations(list(range(0, num_bottles)), 2))
+        self.actionSrc = np.array([a[0] for a in actions], dtype=np.int64)
+        self.actionDst = np.array([a[1] for a in actions], dtype=np.int64)
+
+        super().__init__(num_envs, gym.spaces.Discrete(self.indexer.num_states), gym.spaces.Discrete(len(actions)))
+
+        self.rows = np.arange(num_envs)
+        self.bottles = np.arange(num_bottles)
+        self.actions = np.zeros(num_envs, dtype=np.int64)
+
+        # Every game restarts from the same board
+        self.orig_states = self.indexer.rankBatch(self.orig_board[None])
+        self.orig_heights = (self.orig_board != 0).sum(axis=1)
+
+        self.reset()
+
+    def reset(self):
+        """
+        Reset every game
+        """
+        self.boards = np.repeat(self.orig_board[None], self.num_envs, axis=0)
+        self.heights = (self.boards != 0).sum(axis=2)
+        self.iterations = np.zeros(self.num_envs, dtype=np.int64)
+        self.masks = self.getValidMasks()
+        self.orig_mask = self.masks[0].copy()
+
+        return self.indexer.rankBatch(self.boards)
+
+    def step_async(self, actions):
+        """
+        Stores the actions applied by step_wait
+        """
+        self.actions = np.asarray(actions, dtype=np.int64)
+
+    def step_wait(self):
+        """
+        Apply one movement in every game
+
+        Returns
+        -------
+
+        (states, rewards, dones, infos) - one entry per game
+        """
+        rows = self.rows
+        src, dst = self.actionSrc[self.actions], self.actionDst[self.actions]
+        srcHeight, dstHeight = self.heights[rows, src], self.heights[rows, dst]
+
+        # A ball must be placed on top of a ball of the same color or on an empty tube
+        color = self.boards[rows, src, np.maximum(srcHeight - 1, 0)]
+        below = self.boards[rows, dst, np.maximum(dstHeight - 1, 0)]
+        valid = (srcHeight > 0) & (dstHeight < self.bottle_size) & ((dstHeight == 0) | (below == color))
+
+        moved = rows[valid]
+        self.boards[moved, src[valid], srcHeight[valid] - 1] = 0
+        self.boards[moved, dst[valid], dstHeight[valid]] = color[valid]
+        self.heights[moved, src[valid]] -= 1
+        self.heights[moved, dst[valid]] += 1
+        self.iterations += 1
+
+        rewards = (-self.countMisplaced() - 10 * ~valid).astype(np.float32)
+        goal = (self.boards == self.boards[:, :, :1]).all(axis=(1, 2))
+        self.masks = self.getValidMasks()
+        stuck = ~self.masks.any(axis=1)
+        over = self.iterations > self.max_steps
+
+        rewards[goal] = self.num_balls
+        dones = goal | stuck | over
+        states = self.indexer.rankBatch(self.boards)
+
+        infos = [{"action_mask": self.masks[idx], "solved": bool(goal[idx])} for idx in range(self.num_envs)]
+
+        # Automatic reset of the finished games
+        finished = np.flatnonzero(dones)
+        if len(finished):
+            for idx in finished:
+                infos[idx]["terminal_observation"] = states[idx]
+                infos[idx]["terminal_action_mask"] = self.masks[idx].copy()
+            states[finished] = self.resetAt(finished)
+
+        return states, rewards, dones, infos
+
+    def resetAt(self, indices):
+        """
+        Reset some of the games
+
+        indices : array of int
+            - games to reset
+
+        Returns
+        -------
+
+        array of int - new state of each reset game
+        """
+        self.boards[indices] = self.orig_board
+        self.heights[indices] = self.orig_heights
+        self.iterations[indices] = 0
+        self.masks[indices] = self.orig_mask
+        return np.repeat(self.orig_states, len(indices))
+
+    def countMisplaced(self):
+        """
+        Counts, for every game, the balls sitting above a color break
+
+        Returns
+        -------
+
+        array of int - number of misplaced balls of every game
+        """
+        filled = self.boards[:, :, 1:] != 0
+        breaks = (self.boards[:, :, 1:] != self.boards[:, :, :-1]) & filled
+        return (np.logical_or.accumulate(breaks, axis=2) & filled).sum(axis=(1, 2))
+
+    def getValidMasks(self):
+        """
+        Returns the valid actions of every game
+
+        Returns
+        -------
+
+        array of bool - (N, num_actions) valid action masks
+        """
+        tops = self.boards[self.rows[:, None], self.bottles, np.maximum(self.heights - 1, 0)]
+        srcHeight, dstHeight = self.heights[:, self.actionSrc], self.heights[:, self.actionDst]
+        return (srcHeight > 0) & (dstHeight < self.bottle_size) & \
+            ((dstHeight == 0) | (tops[:, self.actionSrc] == tops[:, self.actionDst]))
+
+    def render(self, mode="human"):
+        """
+        Print every game
+        """
+        for idx, board in enumerate(self.boards):
+            print("Bottles {} - Move {}".format(idx, self.iterations[idx]))
+            for row in range(self.bottle_size):
+                for bottle_num in range(self.num_bottles):
+                    print("|" + str(board[bottle_num][self.bottle_size - row - 1]) + "|", end="")
+                print("\n", end="")
+
+    def close(self):
+        pass
+
+    def seed(self, seed=None):
+        # The games are deterministic, there is nothing to seed
+        return [seed] * self.num_envs
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(self, attr_name)] * len(self._get_indices(indices))
+
+    def set_attr(self, attr_name, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False] * len(self._get_indices(indices))
+
+    def _get_indices(self, indices):
+        if indices is None:
+            return range(self.num_envs)
+        if isinstance(indices, int):
+            return [indices]
+        return indices
@@ -0,0 +1,272 @@
+from gym_game.envs.ball_sort_puzzle import BallSortPuzzle
+
+class PackedBallSortPuzzle(BallSortPuzzle):
+    """
+    Ball Sort Puzzle game mechanics over a bit-packed board
+
+    The whole board is kept in a single integer. Every ball takes `bits` bits,
+    every bottle takes `bottle_size * bits` bits, with the bottom of the bottle
+    in the lowest bits and bottle 0 in the lowest bottle slot. Moves become
+    shifts and masks, copying the board is one assignment and the integer
+    itself is the state hash.
+    """
+    def __init__(self, board, bottle_size, num_bottles, indexer=None, debug=False):
+        """
+        Constructor for the PackedBallSortPuzzle object
+
+        Attributes
+        ----------
+
+        board : list of lists
+            - list of lists representing the game, packed on construction
+
+        bottle_size : int
+            - number of balls that can fit in each bottle
+
+        num_bottles : int
+            - number of bottles in the game
+
+        indexer : StateIndexer
+            - maps boards to state ids, shared between games of the same environment
+
+        debug : bool
+            - checks the running reward against a full recompute on every call
+
+        bits : int
+            - number of bits used by each ball
+
+        packed : int
+            - integer holding the whole board
+
+        orig_packed : int
+            - packed board at construction, used by reset
+
+        """
+        self.bottle_size = bottle_size
+        self.num_bottles = num_bottles
+
+        self.bits = max(1, max(max(bottle) for bottle in board).bit_length())
+        self.ballMask = (1 << self.bits) - 1
+        self.bottleBits = self.bits * bottle_size
+        self.bottleMask = (1 << self.bottleBits) - 1
+        self.offsets = [idx * self.bottleBits for idx in range(num_bottles)]
+
+        # units[h] has a 1 in the lowest bit of each of the first h ball slots
+        self.units = [0]
+        for idx in range(bottle_size):
+            self.units.append(self.units[-1] | (1 << (idx * self.bits)))
+
+        super().__init__(board, bottle_size, num_bottles, indexer, debug)
+        self.orig_packed = self.packed
+
+    @property
+    def board(self):
+        """
+        Returns the game as a list of lists
+        """
+        board = []
+        for offset in self.offsets:
+            bottle = self.packed >> offset
+            board.append([(bottle >> (idx * self.bits)) & self.ballMask for idx in range(self.bottle_size)])
+        return board
+
+    @board.setter
+    def board(self, board):
+        """
+        Packs a list of lists into the game
+        """
+        packed = 0
+        for offset, bottle in zip(self.offsets, board):
+            for idx, ball in enumerate(bottle):
+                packed |= ball << (offset + idx * self.bits)
+        self.packed = packed
+
+    def reset(self):
+        """
+        Restores the board given on construction
+        """
+        self.load(self.orig_packed)
+
+    def load(self, packed):
+        """
+        Sets the board to a packed integer
+
+        packed : int
+            - integer holding the whole board
+        """
+        self.packed = packed
+        self.buildMisplaced()
+
+    def buildMetadata(self):
+        """
+        Heights and tops are read straight from the packed integer, only the
+        running reward is kept
+        """
+        self.buildMisplaced()
+
+    def getState(self):
+        """
+        Returns the game state
+        """
+        return self.indexer.rankPacked(self.packed, self.bits)
+
+    def getBottle(self, idx):
+        """
+        Returns the packed bottle with the given index
+        """
+        return (self.packed >> self.offsets[idx]) & self.bottleMask
+
+    def getHeight(self, bottle):
+        """
+        Returns the number of balls inside a packed bottle
+        """
+        return (bottle.bit_length() + self.bits - 1) // self.bits
+
+    def getTops(self):
+        """
+        Returns the height and top color of every bottle
+
+        Returns
+        -------
+
+        (list of int, list of int) - heights and top colors (0 when empty)
+        """
+        heights, tops = [], []
+        for idx in range(self.num_bottles):
+            bottle = self.getBottle(idx)
+            height = self.getHeight(bottle)
+            heights.append(height)
+            tops.append(bottle >> ((height - 1) * self.bits) if height else 0)
+        return heights, tops
+
+    def applyMovement(self, action):
+        """
+        Applies a given action to the game
+
+        Parameter
+        ---------
+
+        action : Action
+            - Action to be applied
+
+        Returns
+        -------
+
+        int - reward of the applied movement
+
+        """
+        src, dst = self.actions[action]
+        srcBottle, dstBottle = self.getBottle(src), self.getBottle(dst)
+        srcHeight, dstHeight = self.getHeight(srcBottle), self.getHeight(dstBottle)
+
+        # Invalid Move
+        if srcHeight == 0 or dstHeight == self.bottle_size:
+            return self.calculateReward() - 10
+
+        color = srcBottle >> ((srcHeight - 1) * self.bits)
+        # Invalid Move: a ball must be placed on top of a ball of the same color or on an empty tube
+        if dstHeight and dstBottle >> ((dstHeight - 1) * self.bits) != color:
+            return self.calculateReward() - 10
+
+        # Do the action
+        self.packed ^= color << (self.offsets[src] + (srcHeight - 1) * self.bits)
+        self.packed |= color << (self.offsets[dst] + dstHeight * self.bits)
+        self.moveMisplaced(src, dst)
+
+        return self.calculateReward()
+
+    def countMisplaced(self, idx):
+        """
+        Counts the balls sitting above the first color break of a bottle
+
+        idx : int
+            - index of the bottle
+
+        Returns
+        -------
+        int - number of misplaced balls
+
+        """
+        bottle = self.getBottle(idx)
+        height = self.getHeight(bottle)
+        diff = bottle ^ ((bottle & self.ballMask) * self.units[height])
+        if diff:
+            # Every ball from the first color break upwards is misplaced
+            return height - ((diff & -diff).bit_length() - 1) // self.bits
+        return 0
+
+    def isGoal(self):
+        """
+        Cheks if the game puzzle has been solved
+
+        Returns
+        -------
+
+        bool - true if it the puzzle has been solved, false otherwise
+
+        """
+        full = self.units[self.bottle_size]
+        for idx in range(self.num_bottles):
+            bottle = self.getBottle(idx)
+            if bottle and bottle != (bottle & self.ballMask) * full:
+                return False
+        return True
+
+    def isStuck(self):
+        """
+        Verifiies if the player entered a stuck state of the game, losing
+
+        Returns
+        -------
+
+        bool - true if the player is stuck, false otherwise
+        """
+        heights, tops = self.getTops()
+        for src, dst in self.actions.values():
+            if heights[src] == 0 or heights[dst] == self.bottle_size:
+                continue
+            if heights[dst] and tops[dst] != tops[src]:
+                continue
+            return False
+        return True
+
+    def getValid(self):
+        """
+        Returns all valid actions from the game
+
+        Returns
+        -------
+
+        List of actions - Returns a list of valid actions from the game
+        """
+        heights, tops = self.getTops()
+        validActions = []
+        for num, (src, dst) in self.actions.items():
+            if heights[src] == 0 or heights[dst] == self.bottle_size:
+                continue
+            if heights[dst] and tops[dst] != tops[src]:
+                continue
+            validActions.append(num)
+        return validActions
+
+    def getSuccessors(self):
+        """
+        Returns the board reached by every valid action, the game is left unchanged
+
+        Returns
+        -------
+
+        list of (int, int) - action id and packed board after the action
+        """
+        heights, tops = self.getTops()
+        successors = []
+        for num, (src, dst) in self.actions.items():
+            if heights[src] == 0 or heights[dst] == self.bottle_size:
+                continue
+            if heights[dst] and tops[dst] != tops[src]:
+                continue
+            color = tops[src]
+            packed = self.packed ^ (color << (self.offsets[src] + (heights[src] - 1) * self.bits))
+            packed |= color << (self.offsets[dst] + heights[dst] * self.bits)
+            successors.append((num, packed))
+        return successors
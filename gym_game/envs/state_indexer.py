@@ -0,0 +1,258 @@
+import numpy as np
+
+from math import factorial
+
+class StateIndexer:
+    """
+    Perfect hash between legal boards and dense integers
+
+    A board is split in two independent parts, ranked separately and combined
+    as `heights * num_sequences + sequence`:
+        - the heights of the bottles, a composition of num_balls in num_bottles
+          parts of at most bottle_size
+        - the sequence of colors read bottle by bottle from the bottom, a
+          permutation of a multiset with ball_per_color balls of each color
+
+    Every call runs in O(num_balls * num_colors) and keeps no table of seen
+    boards, so the same board gets the same id in every episode.
+    """
+    def __init__(self, bottle_size, num_bottles, colors, ball_per_color):
+        """
+        Constructor for the StateIndexer object
+
+        Attributes
+        ----------
+
+        bottle_size : int
+            - number of balls that can fit in each bottle
+
+        num_bottles : int
+            - number of bottles in the game
+
+        colors : list of int
+            - color labels used in the game
+
+        ball_per_color : int
+            - number of existing balls of each color
+
+        num_states : int
+            - number of legal boards, every index is in [0, num_states)
+
+        """
+        self.bottle_size = bottle_size
+        self.num_bottles = num_bottles
+        self.colors = sorted(colors)
+        self.num_colors = len(self.colors)
+        self.ball_per_color = ball_per_color
+        self.num_balls = self.num_colors * ball_per_color
+
+        # Color label -> position in the multiset
+        self.colorIndex = {color: idx for idx, color in enumerate(self.colors)}
+
+        # ways[t][r] - ways of filling bottles t.. with r balls
+        self.ways = [[0] * (self.num_balls + 1) for _ in range(num_bottles + 1)]
+        self.ways[num_bottles][0] = 1
+        for t in range(num_bottles - 1, -1, -1):
+            for r in range(self.num_balls + 1):
+                self.ways[t][r] = sum(self.ways[t + 1][r - h] for h in range(min(r, bottle_size) + 1))
+
+        # offsets[t][r][h] - boards ranked before bottle t having height h with r balls left
+        self.offsets = []
+        for t in range(num_bottles):
+            table = []
+            for r in range(self.num_balls + 1):
+                row = [0]
+                for h in range(bottle_size):
+                    row.append(row[-1] + (self.ways[t + 1][r - h] if r - h >= 0 else 0))
+                table.append(row)
+            self.offsets.append(table)
+
+        self.num_heights = self.ways[0][self.num_balls]
+        self.num_sequences = factorial(self.num_balls) // pow(factorial(ball_per_color), self.num_colors)
+        self.num_states = self.num_heights * self.num_sequences
+
+        # Batched ranking runs on int64, products of num_sequences and num_balls must fit
+        self.batchable = self.num_states * self.num_balls < 2 ** 63
+        self.colorCodes = np.full(max(self.colors) + 1, -1, dtype=np.int64)
+        for color, idx in self.colorIndex.items():
+            self.colorCodes[color] = idx
+        self.offsetsTable = np.array(self.offsets, dtype=np.int64) if self.batchable else None
+
+        # Scratch color counters, reused between calls
+        self._counts = [ball_per_color] * self.num_colors
+        self._full = [ball_per_color] * self.num_colors
+
+    @classmethod
+    def fromBoard(cls, board, bottle_size, num_bottles):
+        """
+        Builds the indexer for the boards sharing the balls of a given board
+        """
+        colors = sorted({ball for bottle in board for ball in bottle if ball != 0})
+        num_balls = sum(1 for bottle in board for ball in bottle if ball != 0)
+        return cls(bottle_size, num_bottles, colors, num_balls // len(colors))
+
+    def rank(self, board):
+        """
+        Returns the index of a board
+
+        board : list of lists
+            - list of lists representing the game
+
+        Returns
+        -------
+
+        int - index of the board in [0, num_states)
+        """
+        counts = self._counts
+        counts[:] = self._full
+        left = self.num_balls
+        heights = 0
+        sequence = 0
+        multinomial = self.num_sequences
+
+        for t, bottle in enumerate(board):
+            height = 0
+            for ball in bottle:
+                if ball == 0:
+                    break
+                color = self.colorIndex[ball]
+                # Sequences starting with a smaller color are ranked before
+                smaller = 0
+                for c in range(color):
+                    smaller += counts[c]
+                sequence += multinomial * smaller // left
+                multinomial = multinomial * counts[color] // left
+                counts[color] -= 1
+                left -= 1
+                height += 1
+            heights += self.offsets[t][left + height][height]
+
+        return heights * self.num_sequences + sequence
+
+    def rankPacked(self, packed, bits):
+        """
+        Returns the index of a bit-packed board, see PackedBallSortPuzzle
+
+        packed : int
+            - integer holding the whole board
+
+        bits : int
+            - number of bits used by each ball
+
+        Returns
+        -------
+
+        int - index of the board in [0, num_states)
+        """
+        counts = self._counts
+        counts[:] = self._full
+        left = self.num_balls
+        heights = 0
+        sequence = 0
+        multinomial = self.num_sequences
+        mask = (1 << bits) - 1
+
+        for t in range(self.num_bottles):
+            height = 0
+            while height < self.bottle_size:
+                ball = packed & mask
+                if ball == 0:
+                    break
+                color = self.colorIndex[ball]
+                smaller = 0
+                for c in range(color):
+                    smaller += counts[c]
+                sequence += multinomial * smaller // left
+                multinomial = multinomial * counts[color] // left
+                counts[color] -= 1
+                left -= 1
+                height += 1
+                packed >>= bits
+            packed >>= (self.bottle_size - height) * bits
+            heights += self.offsets[t][left + height][height]
+
+        return heights * self.num_sequences + sequence
+
+    def rankBatch(self, boards):
+        """
+        Returns the indexes of a batch of boards
+
+        boards : array of int
+            - (N, num_bottles, bottle_size) array of boards
+
+        Returns
+        -------
+
+        array of int - index of every board
+        """
+        if not self.batchable:
+            return np.array([self.rank(board) for board in boards.tolist()], dtype=object)
+
+        num = len(boards)
+        rows = np.arange(num)
+        codes = self.colorCodes[boards]
+
+        counts = np.full((num, self.num_colors), self.ball_per_color, dtype=np.int64)
+        left = np.full(num, self.num_balls, dtype=np.int64)
+        multinomial = np.full(num, self.num_sequences, dtype=np.int64)
+        heights = np.zeros(num, dtype=np.int64)
+        sequence = np.zeros(num, dtype=np.int64)
+
+        for t in range(self.num_bottles):
+            height = np.zeros(num, dtype=np.int64)
+            for idx in range(self.bottle_size):
+                present = codes[:, t, idx] >= 0
+                color = np.maximum(codes[:, t, idx], 0)
+                count = counts[rows, color]
+                smaller = counts.cumsum(axis=1)[rows, color] - count
+                safeLeft = np.maximum(left, 1)
+                sequence += present * (multinomial * smaller // safeLeft)
+                multinomial = np.where(present, multinomial * count // safeLeft, multinomial)
+                counts[rows, color] -= present
+                left -= present
+                height += present
+            heights += self.offsetsTable[t, left + height, height]
+
+        return heights * self.num_sequences + sequence
+
+    def unrank(self, index):
+        """
+        Returns the board with a given index
+
+        index : int
+            - index of the board in [0, num_states)
+
+        Returns
+        -------
+
+        list of lists - board with the given index
+        """
+        heights, sequence = divmod(index, self.num_sequences)
+
+        counts = self._counts
+        counts[:] = self._full
+        left = self.num_balls
+        multinomial = self.num_sequences
+
+        board = []
+        for t in range(self.num_bottles):
+            table = self.offsets[t][left]
+            height = 0
+            while height < self.bottle_size and table[height + 1] <= heights:
+                height += 1
+            heights -= table[height]
+
+            bottle = [0] * self.bottle_size
+            for idx in range(height):
+                for color in range(self.num_colors):
+                    block = multinomial * counts[color] // left
+                    if sequence < block:
+                        break
+                    sequence -= block
+                bottle[idx] = self.colors[color]
+                multinomial = block
+                counts[color] -= 1
+                left -= 1
+            board.append(bottle)
+
+        return board
@@ -0,0 +1,123 @@
+import numpy as np
+
+from itertools import permutations, product
+
+class Canonicalizer:
+    """
+    Maps boards that only differ by the order of the bottles or by the color
+    labels to a single canonical board
+
+    Sorting the bottles removes their order. For the labels, every color is
+    described without naming it, by the color patterns (colors renamed by
+    first appearance inside the bottle) and positions of its balls. Colors
+    are relabelled in the order of their descriptions, and only colors with
+    equal descriptions are tried in every order, keeping the smallest sorted
+    board. Symmetric boards always get the same canonical board, and most
+    boards need a single relabelling.
+    """
+    def __init__(self, num_bottles, colors):
+        """
+        Constructor for the Canonicalizer object
+
+        Attributes
+        ----------
+
+        num_bottles : int
+            - number of bottles in the game
+
+        colors : list of int
+            - color labels used in the game, canonical boards use the same labels
+
+        """
+        self.num_bottles = num_bottles
+        self.colors = sorted(colors)
+
+        actions = list(permutations(list(range(0, num_bottles)), 2))
+        self.actionSrc = np.array([a[0] for a in actions], dtype=np.int64)
+        self.actionDst = np.array([a[1] for a in actions], dtype=np.int64)
+
+        # actionIds[src][dst] - action id of moving a ball from src to dst
+        self.actionIds = np.full((num_bottles, num_bottles), -1, dtype=np.int64)
+        for idx, (src, dst) in enumerate(actions):
+            self.actionIds[src, dst] = idx
+
+    def pattern(self, bottle):
+        """
+        Returns the colors of a bottle renamed by first appearance inside it
+        """
+        names = {0: 0}
+        return tuple(names.setdefault(ball, len(names)) for ball in bottle)
+
+    def canonicalize(self, board):
+        """
+        Returns the canonical form of a board
+
+        board : list of lists
+            - list of lists representing the game
+
+        Returns
+        -------
+
+        (list of lists, list of int) - canonical board and order, where the
+                                       canonical bottle i is the bottle order[i]
+        """
+        # Label free description of each color: where its balls sit
+        occurrences = {}
+        for bottle in board:
+            pattern = self.pattern(bottle)
+            for pos, ball in enumerate(bottle):
+                if ball != 0:
+                    occurrences.setdefault(ball, []).append((pattern, pos))
+        for places in occurrences.values():
+            places.sort()
+
+        # Colors with the same description may take each other's label
+        groups = []
+        for color in sorted(occurrences, key=occurrences.get):
+            if groups and occurrences[groups[-1][0]] == occurrences[color]:
+                groups[-1].append(color)
+            else:
+                groups.append([color])
+
+        best, bestOrder = None, None
+        for ordering in product(*(permutations(group) for group in groups)):
+            labels = {0: 0}
+            for group in ordering:
+                for color in group:
+                    labels[color] = self.colors[len(labels) - 1]
+
+            relabelled = [[labels[ball] for ball in bottle] for bottle in board]
+            order = sorted(range(self.num_bottles), key=relabelled.__getitem__)
+            candidate = [relabelled[idx] for idx in order]
+            if best is None or candidate < best:
+                best, bestOrder = candidate, order
+
+        return best, bestOrder
+
+    def actionMap(self, order):
+        """
+        Returns, for every canonical action, the action on the original board
+
+        order : list of int
+            - order returned by canonicalize
+
+        Returns
+        -------
+
+        array of int - concrete action id of each canonical action id
+        """
+        order = np.asarray(order)
+        return self.actionIds[order[self.actionSrc], order[self.actionDst]]
+
+    def toCanonicalAction(self, action, order):
+        """
+        Returns the canonical action id of an action on the original board
+        """
+        position = np.argsort(order)
+        return int(self.actionIds[position[self.actionSrc[action]], position[self.actionDst[action]]])
+
+    def toConcreteAction(self, action, order):
+        """
+        Returns the action on the original board of a canonical action id
+        """
+        return int(self.actionIds[order[self.actionSrc[action]], order[self.actionDst[action]]])
@@ -0,0 +1,292 @@
+import os
+import sys
+import json
+import numpy as np
+
+from itertools import permutations
+from gym_game.envs.packed_ball_sort_puzzle import PackedBallSortPuzzle
+from gym_game.envs.state_indexer import StateIndexer
+
+class TransitionGraph:
+    """
+    Reachable state graph of a board, stored as CSR arrays
+
+    Graph state 0 is the initial board and the other states are numbered in
+    BFS order. The valid moves of graph state s are
+    actions[indptr[s]:indptr[s + 1]], sorted by action id, leading to the graph
+    states targets[indptr[s]:indptr[s + 1]]. Goal states keep their moves, as
+    in the list and packed backends, so the boards reached from a goal are part
+    of the graph; stuck states have none.
+
+    The reward of a move and whether it ends the game only depend on the state
+    it reaches, so they are kept once per state instead of once per move.
+
+    Attributes
+    ----------
+
+    board : array of int
+        - initial board, as a (num_bottles, bottle_size) array
+
+    indptr, actions, targets : arrays of int
+        - CSR transition arrays
+
+    ranks : array of int
+        - StateIndexer id of each graph state
+
+    rewards : array of int
+        - reward of reaching each graph state
+
+    goal, stuck : arrays of bool
+        - terminal flags of each graph state
+
+    """
+    arrays = ('board', 'indptr', 'actions', 'targets', 'ranks', 'rewards', 'goal', 'stuck')
+
+    def __init__(self, board, indptr, actions, targets, ranks, rewards, goal, stuck):
+        self.board = board
+        self.indptr = indptr
+        self.actions = actions
+        self.targets = targets
+        self.ranks = ranks
+        self.rewards = rewards
+        self.goal = goal
+        self.stuck = stuck
+
+        self.num_states = len(indptr) - 1
+        self.num_transitions = len(actions)
+
+    @classmethod
+    def build(cls, board, bottle_size, num_bottles, max_states=None):
+        """
+        Enumerates every board reachable from a given board with a BFS
+
+        board : list of lists
+            - initial board
+
+        bottle_size : int
+            - number of balls that can fit in each bottle
+
+        num_bottles : int
+            - number of bottles in the game
+
+        max_states : int
+            - stops with a ValueError when more states are reachable
+
+        Returns
+        -------
+
+        TransitionGraph - the reachable state graph
+        """
+        game = PackedBallSortPuzzle(board, bottle_size, num_bottles)
+        if game.indexer.num_states >= 2 ** 63:
+            raise ValueError("State ids of this board do not fit in 64 bits")
+
+        ids = {game.packed: 0}
+        order = [game.packed]
+        indptr, actions, targets = [0], [], []
+        ranks, rewards, goal, stuck = [], [], [], []
+
+        head = 0
+        while head < len(order):
+            packed = order[head]
+            head += 1
+
+            game.load(packed)
+            isGoal = game.isGoal()
+            validMoves = game.getValid()
+
+            ranks.append(game.getState())
+            rewards.append(game.calculateReward())
+            goal.append(isGoal)
+            stuck.append(not isGoal and not validMoves)
+
+            for action in validMoves:
+                game.load(packed)
+                game.applyMovement(action)
+                if game.packed not in ids:
+                    if max_states is not None and len(order) >= max_states:
+                        raise ValueError("More than {} reachable states".format(max_states))
+                    ids[game.packed] = len(order)
+                    order.append(game.packed)
+                actions.append(action)
+                targets.append(ids[game.packed])
+            indptr.append(len(actions))
+
+        return cls(np.array(board, dtype=np.int8),
+                   np.array(indptr, dtype=np.int64),
+                   np.array(actions, dtype=np.int16),
+                   np.array(targets, dtype=np.int32),
+                   np.array(ranks, dtype=np.int64),
+                   np.array(rewards, dtype=np.int16),
+                   np.array(goal, dtype=np.bool_),
+                   np.array(stuck, dtype=np.bool_))
+
+    def save(self, path):
+        """
+        Saves the graph, to a single .npz file if the path ends with .npz or to
+        a directory of .npy files otherwise
+
+        path : str
+            - destination file or directory
+        """
+        if path.endswith('.npz'):
+            np.savez(path, **{name: getattr(self, name) for name in self.arrays})
+            return
+
+        os.makedirs(path, exist_ok=True)
+        for name in self.arrays:
+            np.save(os.path.join(path, name + '.npy'), getattr(self, name))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a graph saved by save, directories of .npy files are memory-mapped
+
+        path : str
+            - .npz file or directory
+
+        Returns
+        -------
+
+        TransitionGraph - the loaded graph
+        """
+        if path.endswith('.npz'):
+            with np.load(path) as data:
+                return cls(*(data[name] for name in cls.arrays))
+
+        return cls(*(np.load(os.path.join(path, name + '.npy'), mmap_mode='r') for name in cls.arrays))
+
+    def findMove(self, state, action):
+        """
+        Returns the position of a move in the CSR arrays, -1 if it is not valid
+
+        state : int
+            - graph state
+
+        action : int
+            - action id
+        """
+        lo, hi = self.indptr[state], self.indptr[state + 1]
+        pos = lo + np.searchsorted(self.actions[lo:hi], action)
+        if pos < hi and self.actions[pos] == action:
+            return pos
+        return -1
+
+
+class GraphBallSortPuzzle:
+    """
+    Ball Sort Puzzle game mechanics read from a TransitionGraph
+
+    Offers the same methods as BallSortPuzzle, each of them being an array
+    lookup. The board is only rebuilt when it is asked for.
+    """
+    def __init__(self, graph, bottle_size, num_bottles, indexer=None):
+        """
+        Constructor for the GraphBallSortPuzzle object
+
+        Attributes
+        ----------
+
+        graph : TransitionGraph
+            - reachable state graph of the game
+
+        bottle_size : int
+            - number of balls that can fit in each bottle
+
+        num_bottles : int
+            - number of bottles in the game
+
+        indexer : StateIndexer
+            - maps state ids back to boards
+
+        state : int
+            - current graph state
+
+        """
+        self.graph = graph
+        self.bottle_size = bottle_size
+        self.num_bottles = num_bottles
+
+        l = list(permutations(list(range(0, self.num_bottles)), 2))
+        self.actions = dict(zip(range(len(l)), l))
+
+        if indexer is None:
+            indexer = StateIndexer.fromBoard(graph.board.tolist(), bottle_size, num_bottles)
+        self.indexer = indexer
+
+        self.state = 0
+
+    @property
+    def board(self):
+        """
+        Returns the game as a list of lists
+        """
+        return self.indexer.unrank(self.getState())
+
+    def reset(self):
+        """
+        Restores the initial board
+        """
+        self.state = 0
+
+    def getState(self):
+        """
+        Returns the game state
+        """
+        return int(self.graph.ranks[self.state])
+
+    def applyMovement(self, action):
+        """
+        Applies a given action to the game
+
+        Returns
+        -------
+
+        int - reward of the applied movement
+
+        """
+        pos = self.graph.findMove(self.state, action)
+        if pos == -1:
+            return int(self.graph.rewards[self.state]) - 10
+
+        self.state = int(self.graph.targets[pos])
+        return int(self.graph.rewards[self.state])
+
+    def calculateReward(self):
+        """
+        Returns the reward of the current board
+        """
+        return int(self.graph.rewards[self.state])
+
+    def isGoal(self):
+        """
+        Cheks if the game puzzle has been solved
+        """
+        return bool(self.graph.goal[self.state])
+
+    def isStuck(self):
+        """
+        Verifiies if the player entered a stuck state of the game, losing
+        """
+        return bool(self.graph.stuck[self.state])
+
+    def getValid(self):
+        """
+        Returns all valid actions from the game
+        """
+        lo, hi = self.graph.indptr[self.state], self.graph.indptr[self.state + 1]
+        return self.graph.actions[lo:hi].tolist()
+
+
+if __name__ == "__main__":
+    # Offline builder: python -m gym_game.envs.transition_graph [CONFIG] [OUTPUT]
+    if len(sys.argv) < 3:
+        print("Usage: python -m gym_game.envs.transition_graph [CONFIG] [OUTPUT(.npz)]")
+        exit(-1)
+
+    with open('./config/{}'.format(sys.argv[1])) as json_file:
+        board = json.load(json_file)['board']
+
+    graph = TransitionGraph.build(board, len(board[0]), len(board))
+    graph.save(sys.argv[2])
+    print("{} states, {} transitions saved to {}".format(graph.num_states, graph.num_transitions, sys.argv[2]))
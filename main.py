@@ -4,8 +4,36 @@ import json
 import gym
 from gym.envs.registration import register
 
-from algorithms import AlgorithmType, QLearning, Sarsa, DoubleQLearning, Ppo
-from utils import Plot, Logger, GameSettings
+from algorithms import AlgorithmType, Algorithm, QLearning, ParallelQLearning, Sarsa, DoubleQLearning, ValueIteration, PolicyIteration, Ppo
+from utils import Plot, Logger, GameSettings, Profiler
+from gym_game.envs.ball_sort_vec_env import BallSortVecEnv
+
+def envKwargs(data, settings, debug=False):
+    """
+    Returns the BallSortEnv arguments of a config file
+
+    data : dict
+        - parsed config file
+
+    settings : GameSettings
+        - settings of the config board
+
+    debug : bool
+        - checks the running reward on every step
+    """
+    return {'board' : data['board'], 
+            'max_steps' : data['max_steps'],
+            'bottle_size' : settings.bottle_size,
+            'num_bottles' : settings.num_bottles,
+            'empty_spaces' : settings.empty_spaces,
+            'num_balls' : settings.num_balls,
+            'ball_per_color' : settings.ball_per_color,
+            'num_colors' : settings.num_colors,
+            'backend' : data.get('backend', 'list'),
+            'debug' : debug,
+            'graph_file' : data.get('graph_file'),
+            'symmetry' : data.get('symmetry', False),
+        }
 
 class App:
     def __init__(self, args):
@@ -18,10 +46,16 @@ class App:
         self.render = False
         self.verbose = False
         self.plot = False 
+        self.debug = False
+        self.resume = False
+        self.profile = False
 
         if '-render' in args: self.render = True
         if '-verbose' in args: self.verbose = True
         if '-plot' in args: self.plot = True
+        if '-debug' in args: self.debug = True
+        if '-resume' in args: self.resume = True
+        if '-profile' in args: self.profile = True
 
         try:
             self.data = self.parseJson(self.configFilePath)
@@ -35,6 +69,59 @@ class App:
         with open(path) as json_file:
             return json.load(json_file)
 
+    def train(self, algorithm):
+        """
+        Runs a tabular algorithm, resuming it and profiling it when asked
+
+        Returns
+        -------
+
+        str - average rewards log, see Logger.closeLogs
+        """
+        if self.resume: algorithm.resume()
+
+        if not self.profile:
+            algorithm.run()
+            _, avgValues = algorithm.finishLog()
+            self.printStop(algorithm)
+            return avgValues
+
+        episodes = algorithm.stats.count
+        with Profiler() as profiler:
+            self.instrument(profiler, algorithm)
+            algorithm.run()
+
+        allValues, avgValues = algorithm.finishLog()
+        self.printStop(algorithm)
+        steps = profiler.calls('BallSortEnv.step') + profiler.calls('BallSortVecEnv.step_wait') * algorithm.num_envs
+        report = profiler.report(algorithm.stats.count - episodes, steps)
+        Profiler.printReport(report)
+
+        reportFile = allValues.rsplit('-all', 1)[0] + '-profile.json'
+        Profiler.saveReport(report, reportFile)
+        print("Profile saved to {}".format(reportFile))
+        return avgValues
+
+    def printStop(self, algorithm):
+        """
+        Tells why the training ended before num_episodes, see stop_when
+        """
+        if algorithm.stop_reason is not None:
+            print("Stopped after {} episodes: {}".format(algorithm.stats.count, algorithm.stop_reason))
+
+    def instrument(self, profiler, algorithm):
+        """
+        Installs the -profile timers on the game, the environment and the algorithm loop
+        """
+        env = algorithm.env.unwrapped
+        profiler.instrument(type(env.game), ['getValid', 'applyMovement', 'calculateReward', 'isGoal', 'isStuck', 'getState'])
+        profiler.instrument(type(env), ['reset', 'step', 'getValidMask', 'observe'])
+        profiler.instrument(BallSortVecEnv, ['step_wait', 'getValidMasks', 'countMisplaced', 'resetAt'])
+        profiler.instrument(type(algorithm), ['update', 'choose_action', 'batchActions', 'batchUpdate'])
+        profiler.instrument(Algorithm, ['logEpisode', 'saveCheckpoint', 'endEpisode'])
+        if getattr(algorithm, 'planner', None) is not None:
+            profiler.instrument(type(algorithm.planner), ['observe', 'observeBatch', 'plan'])
+
     def run(self):
         # Build Environment
         if 'board' not in self.data: 
@@ -48,17 +135,10 @@ class App:
             exit(-1)
 
         env_id = 'ball_sort-v2'
+        env_kwargs = envKwargs(self.data, self.settings, self.debug)
         register(id=env_id,
                 entry_point='gym_game.envs:BallSortEnv',
-                kwargs={'board' : self.data['board'], 
-                        'max_steps' : self.data['max_steps'],
-                        'bottle_size' : self.settings.bottle_size,
-                        'num_bottles' : self.settings.num_bottles,
-                        'empty_spaces' : self.settings.empty_spaces,
-                        'num_balls' : self.settings.num_balls,
-                        'ball_per_color' : self.settings.ball_per_color,
-                        'num_colors' : self.settings.num_colors,
-                    },
+                kwargs=env_kwargs,
         )
         
         env = gym.make(env_id)
@@ -66,21 +146,24 @@ class App:
         # Choose Algorithm
         if self.algorithm == 'qlearning':
             qLearning = QLearning(env, self.data['param'], AlgorithmType.VANILLA, self.render, self.verbose)
-            qLearning.run()
-
-            _, avgValues = qLearning.finishLog()
+            avgValues = self.train(qLearning)
+        elif self.algorithm == 'pqlearning':
+            pqLearning = ParallelQLearning(env, self.data['param'], AlgorithmType.VANILLA, self.render, self.verbose)
+            avgValues = self.train(pqLearning)
         elif self.algorithm == 'sarsa':
             sarsa = Sarsa(env, self.data['param'], AlgorithmType.VANILLA, self.render, self.verbose)
-            sarsa.run()
-
-            _, avgValues = sarsa.finishLog()
+            avgValues = self.train(sarsa)
         elif self.algorithm == 'dqlearning':
             dqLearning = DoubleQLearning(env, self.data['param'], AlgorithmType.VANILLA, self.render, self.verbose)
-            dqLearning.run()
+            avgValues = self.train(dqLearning)
+        elif self.algorithm in ('valueiteration', 'policyiteration'):
+            solver = ValueIteration if self.algorithm == 'valueiteration' else PolicyIteration
+            planning = solver(env, self.data['param'], AlgorithmType.DYNAMIC_PROGRAMMING, self.render, self.verbose)
+            planning.run()
 
-            _, avgValues = dqLearning.finishLog()
+            exit(0)
         elif self.algorithm == 'ppo':
-            ppo = Ppo(env_id, self.data['param'], AlgorithmType.STABLE_BASELINES_PPO, self.render, self.verbose)
+            ppo = Ppo(env_kwargs, self.data['param'], AlgorithmType.STABLE_BASELINES_PPO, self.render, self.verbose)
             ppo.run()
 
             exit(0)
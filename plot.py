@@ -0,0 +1,40 @@
+import sys
+import glob
+
+from utils import Logger
+from utils.plot import MultiRunPlot
+
+def parseGroups(args):
+    """
+    Returns the groups of LABEL=GLOB arguments, a bare GLOB is its own label
+    """
+    groups = {}
+    for arg in args:
+        label, _, pattern = arg.rpartition('=')
+        paths = sorted(glob.glob(pattern))
+        if not paths:
+            Logger.error("No log matches {}".format(pattern))
+            exit(-1)
+        groups.setdefault(label or pattern, []).extend(paths)
+    return groups
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    options = {'-column' : 'reward', '-bins' : '2048', '-lttb' : None}
+    for option in options:
+        if option in args:
+            idx = args.index(option)
+            options[option] = args[idx + 1]
+            del args[idx:idx + 2]
+
+    if len(args) < 2 or options['-column'] not in Logger.LOG_DTYPE.names:
+        print("Usage: plot.py [OUTPUT|show] [LABEL=GLOB ...] { -column COLUMN -bins N -lttb N }")
+        exit(-1)
+
+    output = None if args[0] == 'show' else args[0]
+    lttb_points = int(options['-lttb']) if options['-lttb'] else None
+    plot = MultiRunPlot(parseGroups(args[1:]), options['-column'], int(options['-bins']), lttb_points)
+    plot.render(output)
+    if output is not None:
+        print("Plot saved to {}".format(output))
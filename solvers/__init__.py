@@ -0,0 +1,9 @@
+from .heuristics import misplacedBalls, colorRuns, heuristics
+from .solver import Solution, Solver, BudgetExceeded
+from .a_star import AStar
+from .ida_star import IDAStar
+from .parallel_bfs import ParallelBFS
+from .cache import CacheEntry, SolutionCache
+from .generator import BoardGenerator, saveConfig, saveBoards, loadBoards
+
+__all__ = ['misplacedBalls', 'colorRuns', 'heuristics', 'Solution', 'Solver', 'BudgetExceeded', 'AStar', 'IDAStar', 'ParallelBFS', 'CacheEntry', 'SolutionCache', 'BoardGenerator', 'saveConfig', 'saveBoards', 'loadBoards']
\ No newline at end of file
@@ -0,0 +1,44 @@
+import sys
+import json
+
+from solvers import AStar, IDAStar, ParallelBFS, SolutionCache, heuristics
+
+# Optimal solution of a config board: python -m solvers [CONFIG] [astar|idastar|bfs] [misplaced|runs] [MAX_NODES] [-cache]
+if __name__ == "__main__":
+    solvers = {'astar': AStar, 'idastar': IDAStar, 'bfs': ParallelBFS}
+
+    # -cache reads and stores results in cache/solutions.sqlite
+    cache = SolutionCache('cache/solutions.sqlite') if '-cache' in sys.argv else None
+    sys.argv = [arg for arg in sys.argv if arg != '-cache']
+
+    if len(sys.argv) < 2:
+        print("Usage: python -m solvers [CONFIG] [astar|idastar|bfs] [misplaced|runs] [MAX_NODES] [-cache]")
+        exit(-1)
+
+    name = sys.argv[2] if len(sys.argv) > 2 else 'astar'
+    heuristic = sys.argv[3] if len(sys.argv) > 3 else 'runs'
+    if name not in solvers or heuristic not in heuristics:
+        print("Usage: python -m solvers [CONFIG] [astar|idastar|bfs] [misplaced|runs] [MAX_NODES] [-cache]")
+        exit(-1)
+
+    with open('./config/{}'.format(sys.argv[1])) as json_file:
+        board = json.load(json_file)['board']
+
+    max_nodes = int(sys.argv[4]) if len(sys.argv) > 4 else None
+    if name == 'bfs':
+        # Breadth first search needs no heuristic
+        solver = ParallelBFS(len(board[0]), len(board), max_nodes=max_nodes, cache=cache)
+    else:
+        solver = solvers[name](len(board[0]), len(board), heuristics[heuristic], max_nodes=max_nodes, cache=cache)
+    solution = solver.solve(board)
+    if cache is not None:
+        cache.close()
+
+    print(solution)
+    if name == 'bfs':
+        for stats in solver.workerStats:
+            print("Worker {} : {} nodes, {:.0f} nodes/s".format(stats['worker'], stats['expanded'], stats['nodes_per_second']))
+    if solution.solved:
+        for action in solution.actions:
+            src, dst = solver.game.actions[action]
+            print("{} : {} -> {}".format(action, src, dst))
@@ -0,0 +1,64 @@
+# -- Imports -- #
+
+import heapq
+
+# -- Personal Imports -- #
+
+from solvers.solver import Solver, BudgetExceeded
+
+
+class AStar(Solver):
+    """
+    A* search
+
+    Keeps every reached board in a transposition table with its best known
+    cost and parent. A board reached again with a smaller cost is reopened,
+    so the first solved board taken from the open list is optimal as long as
+    the heuristic is admissible. An empty open list proves the board
+    unsolvable.
+    """
+    def search(self, start):
+        limit = self.tableLimit(start)
+        startKey = self.key(start)
+
+        costs = {startKey: 0}
+        parents = {startKey: None}
+        counter = 0
+        frontier = [(self.estimate(start), 0, counter, start, startKey)]
+
+        while frontier:
+            _, cost, _, packed, key = heapq.heappop(frontier)
+            cost = -cost
+            if costs[key] < cost:
+                continue  # Reached again with a smaller cost after being pushed
+            if self.isGoal(packed):
+                return self.path(start, key, parents)
+            self.expand()
+
+            for _, child in self.successors(packed):
+                childKey = self.key(child)
+                known = costs.get(childKey)
+                if known is not None and known <= cost + 1:
+                    continue
+                if known is None and limit is not None and len(costs) >= limit:
+                    raise BudgetExceeded('memory budget')
+
+                costs[childKey] = cost + 1
+                parents[childKey] = key
+                counter += 1
+                # Deeper boards first among equal estimates
+                heapq.heappush(frontier, (cost + 1 + self.estimate(child), -(cost + 1), counter, child, childKey))
+
+        return None
+
+    def path(self, start, goalKey, parents):
+        """
+        Returns the actions leading from the start board to a goal key
+        """
+        keys = []
+        key = goalKey
+        while key is not None:
+            keys.append(key)
+            key = parents[key]
+        keys.reverse()
+        return self.replay(start, keys)
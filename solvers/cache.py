@@ -0,0 +1,174 @@
+# -- Imports -- #
+
+import os
+import sqlite3
+
+# -- Personal Imports -- #
+
+from gym_game.envs.symmetry import Canonicalizer
+
+
+class CacheEntry:
+    """
+    What is known about a board
+
+    Attributes
+    ----------
+
+    distance : int
+        - number of moves of an optimal solution, None if unknown
+
+    move : int
+        - BallSortEnv action id of the first move of an optimal solution, None if unknown
+
+    dead : bool
+        - true when the board has no solution
+    """
+    def __init__(self, distance, move, dead):
+        self.distance = distance
+        self.move = move
+        self.dead = dead
+
+    def __repr__(self):
+        return "CacheEntry(distance={}, move={}, dead={})".format(self.distance, self.move, self.dead)
+
+
+class SolutionCache:
+    """
+    Persistent cache of solved and unsolvable boards, stored in a sqlite file
+
+    Boards are keyed by their canonical form (see Canonicalizer), so boards
+    that only differ by the order of the bottles or the color labels share an
+    entry. Moves are stored on the canonical board and mapped back to the
+    bottles of the board asked for.
+
+    Every read marks the entry as used, and once the cache holds more than
+    max_entries boards the least recently used ones are dropped.
+
+    Arguments
+    ---------
+
+    path : str
+        - sqlite file, created if missing
+
+    max_entries : int
+        - number of boards kept, no limit when None
+    """
+    def __init__(self, path, max_entries=None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS boards (
+                                       key BLOB PRIMARY KEY,
+                                       distance INTEGER,
+                                       move INTEGER,
+                                       dead INTEGER NOT NULL,
+                                       used INTEGER NOT NULL)""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS boards_used ON boards (used)")
+        self.connection.commit()
+
+        # Increasing stamp of the last use of an entry
+        self.clock = self.connection.execute("SELECT COALESCE(MAX(used), 0) FROM boards").fetchone()[0]
+        self.canonicalizers = {}
+
+    def canonical(self, board):
+        """
+        Returns the key of a board and the canonicalizer and order mapping its moves
+
+        board : list of lists
+            - list of lists representing the game
+        """
+        colors = {ball for bottle in board for ball in bottle if ball != 0}
+        shape = (len(board), len(colors))
+        canonicalizer = self.canonicalizers.get(shape)
+        if canonicalizer is None:
+            canonicalizer = Canonicalizer(len(board), list(range(1, len(colors) + 1)))
+            self.canonicalizers[shape] = canonicalizer
+
+        canonical, order = canonicalizer.canonicalize(board)
+        key = bytes([len(board), len(board[0])] + [ball for bottle in canonical for ball in bottle])
+        return key, canonicalizer, order
+
+    def get(self, board):
+        """
+        Returns what is known about a board
+
+        Returns
+        -------
+
+        CacheEntry - entry of the board, None if the board is not cached
+        """
+        key, canonicalizer, order = self.canonical(board)
+        row = self.connection.execute("SELECT distance, move, dead FROM boards WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+
+        self.clock += 1
+        self.connection.execute("UPDATE boards SET used = ? WHERE key = ?", (self.clock, key))
+        distance, move, dead = row
+        if move is not None:
+            move = canonicalizer.toConcreteAction(move, order)
+        return CacheEntry(distance, move, bool(dead))
+
+    def put(self, board, distance=None, move=None, dead=False):
+        """
+        Stores what is known about a board, replacing its previous entry
+
+        board : list of lists
+            - list of lists representing the game
+
+        distance : int
+            - number of moves of an optimal solution
+
+        move : int
+            - action id of the first move of an optimal solution
+
+        dead : bool
+            - true when the board has no solution
+        """
+        key, canonicalizer, order = self.canonical(board)
+        if move is not None:
+            move = canonicalizer.toCanonicalAction(move, order)
+
+        self.clock += 1
+        self.connection.execute("INSERT OR REPLACE INTO boards VALUES (?, ?, ?, ?, ?)",
+                                (key, distance, move, int(dead), self.clock))
+
+    def putSolution(self, game, actions):
+        """
+        Stores every board along an optimal solution, each of them with its own
+        distance and next move
+
+        game : BallSortPuzzle
+            - game holding the board the solution starts from, played through
+              the solution
+
+        actions : list of int
+            - action ids of the optimal solution
+        """
+        for idx, action in enumerate(actions):
+            self.put(game.board, len(actions) - idx, action)
+            game.applyMovement(action)
+        self.put(game.board, 0)
+        self.commit()
+
+    def commit(self):
+        """
+        Writes the pending changes and evicts the least recently used boards
+        """
+        if self.max_entries is not None:
+            self.connection.execute("""DELETE FROM boards WHERE key IN (
+                                           SELECT key FROM boards ORDER BY used DESC LIMIT -1 OFFSET ?)""",
+                                    (self.max_entries,))
+        self.connection.commit()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM boards").fetchone()[0]
+
+    def close(self):
+        self.commit()
+        self.connection.close()
@@ -0,0 +1,200 @@
+# -- Imports -- #
+
+import json
+import random
+import numpy as np
+
+# -- Personal Imports -- #
+
+from solvers.a_star import AStar
+from solvers.heuristics import colorRuns
+
+
+class BoardGenerator:
+    """
+    Random boards that are solvable by construction
+
+    A board is scrambled from a solved one with reverse moves: a ball is taken
+    from the top of a bottle and put on any bottle with room, as long as the
+    forward move putting it back would be valid, i.e. the ball was alone in
+    its bottle or on a ball of its own color. Playing the reverse moves
+    backwards solves the board, so the scramble length bounds its depth.
+    The colors and the bottles are shuffled afterwards.
+
+    The depth of a board is the length of its optimal solution, found with A*.
+    With a depth target, boards are scrambled again, longer or shorter, until
+    one falls inside it.
+
+    Arguments
+    ---------
+
+    num_colors : int
+        - number of colors, each with bottle_size balls
+
+    bottle_size : int
+        - number of balls that can fit in each bottle
+
+    empty_bottles : int
+        - number of bottles left empty on the solved board
+
+    seed : int
+        - seed of the generator, the same seed gives the same boards
+
+    max_nodes : int
+        - node budget of the A* search measuring the depth, a board whose depth
+          cannot be measured within it misses any depth target
+    """
+    def __init__(self, num_colors, bottle_size, empty_bottles=2, seed=None, max_nodes=200000):
+        if num_colors < 1 or bottle_size < 1 or empty_bottles < 1:
+            raise ValueError("A board needs at least one color, one ball per bottle and one empty bottle")
+
+        self.num_colors = num_colors
+        self.bottle_size = bottle_size
+        self.num_bottles = num_colors + empty_bottles
+        self.rng = random.Random(seed)
+        self.solver = AStar(bottle_size, self.num_bottles, colorRuns, max_nodes=max_nodes)
+
+    def solvedBoard(self):
+        return [[color] * self.bottle_size for color in range(1, self.num_colors + 1)] + \
+            [[0] * self.bottle_size for _ in range(self.num_bottles - self.num_colors)]
+
+    def reverseMoves(self, board, heights):
+        """
+        Returns the (src, dst) reverse moves of a board
+        """
+        moves = []
+        for src in range(self.num_bottles):
+            height = heights[src]
+            if not height:
+                continue
+            # The ball must have been put on an empty bottle or on its own color
+            if height > 1 and board[src][height - 2] != board[src][height - 1]:
+                continue
+            for dst in range(self.num_bottles):
+                if dst != src and heights[dst] < self.bottle_size:
+                    moves.append((src, dst))
+        return moves
+
+    def scramble(self, moves):
+        """
+        Returns a board scrambled from the solved board with random reverse moves,
+        never undoing the previous one
+        """
+        board = self.solvedBoard()
+        heights = [self.bottle_size] * self.num_colors + [0] * (self.num_bottles - self.num_colors)
+
+        previous = None
+        for _ in range(moves):
+            candidates = [move for move in self.reverseMoves(board, heights) if move != previous]
+            if not candidates:
+                break
+            src, dst = self.rng.choice(candidates)
+            board[dst][heights[dst]] = board[src][heights[src] - 1]
+            board[src][heights[src] - 1] = 0
+            heights[src] -= 1
+            heights[dst] += 1
+            previous = (dst, src)
+
+        # Neither the color labels nor the order of the bottles change the depth
+        colors = list(range(1, self.num_colors + 1))
+        self.rng.shuffle(colors)
+        relabel = [0] + colors
+        board = [[relabel[ball] for ball in bottle] for bottle in board]
+        self.rng.shuffle(board)
+        return board
+
+    def depth(self, board):
+        """
+        Returns the optimal number of moves solving a board, None when A* runs out of nodes
+        """
+        solution = self.solver.solve(board)
+        return len(solution.actions) if solution.solved else None
+
+    def generate(self, min_depth=None, max_depth=None, moves=None, max_attempts=100):
+        """
+        Generates a board, unsolved, inside the depth target when there is one
+
+        Parameters
+        ----------
+
+        min_depth, max_depth : int
+            - bounds of the solution depth, the depth is only measured when one is given
+
+        moves : int
+            - number of reverse moves of the first scramble, 3 per ball by default
+
+        max_attempts : int
+            - number of scrambles tried before giving up
+
+        Returns
+        -------
+
+        (list of lists, int) - board and its depth, None when not measured
+        """
+        if min_depth is not None and max_depth is not None and min_depth > max_depth:
+            raise ValueError("min_depth {} is above max_depth {}".format(min_depth, max_depth))
+        if moves is None:
+            moves = max(3 * self.num_colors * self.bottle_size, 2 * (min_depth or 0))
+        measure = min_depth is not None or max_depth is not None
+
+        for _ in range(max_attempts):
+            board = self.scramble(moves)
+            if not measure:
+                if any(len(set(bottle) - {0}) > 1 for bottle in board):
+                    return board, None
+                moves += 1
+                continue
+
+            depth = self.depth(board)
+            if depth is None or depth < max(1, min_depth or 0):
+                # Too easy, or too hard to measure, which a shorter scramble fixes
+                moves = moves + max(1, moves // 4) if depth is not None else max(1, moves * 3 // 4)
+            elif max_depth is not None and depth > max_depth:
+                moves = max(1, moves * 3 // 4)
+            else:
+                return board, depth
+
+        raise ValueError("No board of depth {}-{} after {} attempts".format(min_depth, max_depth, max_attempts))
+
+    def batch(self, count, **kwargs):
+        """
+        Returns count boards and depths, see generate
+        """
+        return [self.generate(**kwargs) for _ in range(count)]
+
+
+def saveConfig(path, board, depth=None, max_steps=100, param=None):
+    """
+    Writes a board to a config file, see config/*.json
+    """
+    data = {'board' : board, 'max_steps' : max_steps}
+    if depth is not None:
+        data['solution_depth'] = depth
+    if param is not None:
+        data['param'] = param
+    # One line per board, as in the hand written configs
+    text = json.dumps(dict(data, board='BOARD'), indent=4).replace('"BOARD"', json.dumps(board), 1)
+    with open(path, 'w') as json_file:
+        json_file.write(text)
+
+def saveBoards(path, boards, depths):
+    """
+    Writes a batch of boards to a .npz file
+
+    boards : uint8 array of shape (count, num_bottles, bottle_size), bottoms first
+    depths : int16 array, -1 where the depth was not measured
+    """
+    np.savez_compressed(path, boards=np.asarray(boards, dtype=np.uint8),
+                        depths=np.array([-1 if depth is None else depth for depth in depths], dtype=np.int16))
+
+def loadBoards(path):
+    """
+    Reads a batch written by saveBoards
+
+    Returns
+    -------
+
+    (list of lists of lists, list of int) - boards and depths, None where not measured
+    """
+    with np.load(path) as data:
+        return data['boards'].tolist(), [None if depth < 0 else int(depth) for depth in data['depths']]
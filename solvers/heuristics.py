@@ -0,0 +1,48 @@
+def misplacedBalls(game):
+    """
+    Counts the balls sitting above a color break, each of them has to move at least once
+
+    game : PackedBallSortPuzzle
+        - game holding the board to evaluate
+
+    Returns
+    -------
+
+    int - lower bound on the number of moves left
+    """
+    return sum(game.countMisplaced(idx) for idx in range(game.num_bottles))
+
+
+def colorRuns(game):
+    """
+    Adds to misplacedBalls the balls of the color runs resting on the bottom
+    of the bottles. All the balls of a color end up in a single bottle, so
+    when a color lays at the bottom of several bottles every run but one has
+    to move, and at best the largest one stays.
+
+    game : PackedBallSortPuzzle
+        - game holding the board to evaluate
+
+    Returns
+    -------
+
+    int - lower bound on the number of moves left
+    """
+    value = 0
+    runs = {}  # color -> (balls at the bottom of bottles, largest run)
+    for idx in range(game.num_bottles):
+        bottle = game.getBottle(idx)
+        if not bottle:
+            continue
+
+        misplaced = game.countMisplaced(idx)
+        run = game.getHeight(bottle) - misplaced
+        color = bottle & game.ballMask
+        total, largest = runs.get(color, (0, 0))
+        runs[color] = (total + run, max(largest, run))
+        value += misplaced
+
+    return value + sum(total - largest for total, largest in runs.values())
+
+
+heuristics = {'misplaced': misplacedBalls, 'runs': colorRuns}
@@ -0,0 +1,73 @@
+# -- Personal Imports -- #
+
+from solvers.solver import Solver
+
+
+class IDAStar(Solver):
+    """
+    Iterative deepening A*
+
+    Runs depth first searches bounded by the estimated cost, raising the bound
+    to the smallest estimate that went over it until a solution is found.
+    Memory grows with the solution length, plus a transposition table of the
+    smallest cost each board was reached with during the current iteration,
+    which stops growing at max_memory instead of ending the search.
+    """
+    def search(self, start):
+        self.limit = self.tableLimit(start)
+        self.table = {}
+        self.onPath = {self.key(start)}
+        self.actions = []
+
+        bound = self.estimate(start)
+        while True:
+            self.table.clear()
+            found = self.visit(start, 0, bound)
+            if found is True:
+                return list(self.actions)
+            if found is None:
+                return None  # Nothing over the bound, every reachable board was seen
+            bound = found
+
+    def visit(self, packed, cost, bound):
+        """
+        Depth first search below a board
+
+        Returns
+        -------
+
+        True when solved, otherwise the smallest estimate over the bound, None if there is none
+        """
+        if self.isGoal(packed):
+            return True
+        self.expand()
+
+        children = []
+        for action, child in self.successors(packed):
+            key = self.key(child)
+            if key in self.onPath or self.table.get(key, cost + 2) <= cost + 1:
+                continue
+            if self.limit is None or len(self.table) < self.limit:
+                self.table[key] = cost + 1
+            children.append((cost + 1 + self.estimate(child), action, child, key))
+        children.sort(key=lambda entry: entry[0])
+
+        smallest = None
+        for estimate, action, child, key in children:
+            if estimate > bound:
+                if smallest is None or estimate < smallest:
+                    smallest = estimate
+                continue
+
+            self.onPath.add(key)
+            self.actions.append(action)
+            found = self.visit(child, cost + 1, bound)
+            if found is True:
+                return True
+            self.actions.pop()
+            self.onPath.discard(key)
+
+            if found is not None and (smallest is None or found < smallest):
+                smallest = found
+
+        return smallest
@@ -0,0 +1,227 @@
+# -- Imports -- #
+
+import time
+import queue
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+
+# -- Personal Imports -- #
+
+from solvers.solver import Solver, BudgetExceeded
+
+
+class ParallelBFS(Solver):
+    """
+    Breadth first search sharded over several processes
+
+    Every board key is owned by the worker hash(key) % num_workers, which
+    alone keeps it in its visited table with its parent. The search runs one
+    level at a time:
+        - expand: each worker expands its frontier and writes the children,
+          grouped by owner, to a shared memory segment
+        - merge: each worker reads its group from every segment, drops the
+          boards it already visited and keeps the rest as its next frontier
+    The first level holding a solved board gives an optimal solution, rebuilt
+    by asking the owners for the parents.
+
+    Keys are the bottles sorted and packed back in a single integer, which is
+    itself a packed board, so the frontier holds nothing else.
+
+    Arguments
+    ---------
+
+    num_workers : int
+        - number of worker processes, the number of cores by default
+
+    max_nodes, max_memory, cache
+        - see Solver, max_memory is split evenly between the workers
+    """
+    def __init__(self, bottle_size, num_bottles, num_workers=None, max_nodes=None, max_memory=None, cache=None):
+        super().__init__(bottle_size, num_bottles, max_nodes=max_nodes, max_memory=max_memory, cache=cache)
+        self.num_workers = num_workers or multiprocessing.cpu_count()
+        self.workerStats = []
+
+    def load(self, board):
+        super().load(board)
+        # Bytes of a key inside the shared memory segments
+        self.width = (self.num_bottles * self.game.bottleBits + 7) // 8
+
+    def key(self, packed):
+        mask, bits = self.game.bottleMask, self.game.bottleBits
+        key = 0
+        for bottle in sorted((packed >> offset) & mask for offset in self.game.offsets):
+            key = (key << bits) | bottle
+        return key
+
+    def owner(self, key):
+        """
+        Returns the worker owning a key
+        """
+        return hash(key) % self.num_workers
+
+    def search(self, start):
+        if self.isGoal(start):
+            return []
+
+        # Workers share the tracker of the segments, which stays with their creator
+        resource_tracker.ensure_running()
+        context = multiprocessing.get_context()
+        limit = self.tableLimit(start)
+        if limit is not None:
+            limit //= self.num_workers
+
+        self.results = context.Queue()
+        self.commands = [context.Queue() for _ in range(self.num_workers)]
+        self.workers = [context.Process(target=work, daemon=True,
+                                        args=(idx, self.num_workers, self.game.board, self.bottle_size,
+                                              self.num_bottles, limit, self.commands[idx], self.results))
+                        for idx in range(self.num_workers)]
+        for worker in self.workers:
+            worker.start()
+
+        try:
+            goal = self.levels()
+            if goal is None:
+                return None
+
+            keys = [goal]
+            startKey = self.key(start)
+            while keys[-1] != startKey:
+                self.commands[self.owner(keys[-1])].put(('parent', keys[-1]))
+                keys.append(self.collect(1)[0][1])
+            keys.reverse()
+            return self.replay(start, keys)
+        finally:
+            self.broadcast('stats')
+            self.workerStats = [{'worker': idx, 'expanded': expanded, 'generated': generated, 'seconds': seconds,
+                                 'nodes_per_second': expanded / seconds if seconds else 0.0}
+                                for idx, expanded, generated, seconds in self.collect(self.num_workers)]
+            self.expanded = sum(stats['expanded'] for stats in self.workerStats)
+            self.generated = sum(stats['generated'] for stats in self.workerStats)
+
+            self.broadcast('stop')
+            for worker in self.workers:
+                worker.join()
+
+    def levels(self):
+        """
+        Runs the levels of the search
+
+        Returns
+        -------
+
+        int - key of the first solved board, None if no board is solved
+        """
+        expanded = 0
+        while True:
+            self.broadcast('expand')
+            outboxes = self.collect(self.num_workers)
+            expanded += sum(count for _, _, _, count in outboxes)
+
+            self.broadcast('merge', [(name, bounds) for _, name, bounds, _ in outboxes])
+            merged = self.collect(self.num_workers)
+
+            goals = [goal for _, _, goal, _ in merged if goal is not None]
+            if goals:
+                return min(goals)
+            if not any(frontier for _, frontier, _, _ in merged):
+                return None
+            if any(full for _, _, _, full in merged):
+                raise BudgetExceeded('memory budget')
+            if self.max_nodes is not None and expanded > self.max_nodes:
+                raise BudgetExceeded('node budget')
+
+    def broadcast(self, command, argument=None):
+        """
+        Sends a command to every worker
+        """
+        for commands in self.commands:
+            commands.put((command, argument))
+
+    def collect(self, count):
+        """
+        Returns the next replies of the workers, sorted by worker
+        """
+        replies = []
+        while len(replies) < count:
+            try:
+                replies.append(self.results.get(timeout=1))
+            except queue.Empty:
+                if not all(worker.is_alive() for worker in self.workers):
+                    raise RuntimeError("A search worker stopped unexpectedly")
+        return sorted(replies, key=lambda reply: reply[0])
+
+
+def work(idx, num_workers, board, bottle_size, num_bottles, limit, commands, results):
+    """
+    Worker process of ParallelBFS, owning the keys k with hash(k) % num_workers == idx
+    """
+    solver = ParallelBFS(bottle_size, num_bottles, num_workers)
+    solver.load(board)
+    width = solver.width
+
+    start = solver.key(solver.game.packed)
+    parents = {start: None} if solver.owner(start) == idx else {}
+    frontier = list(parents)
+    outbox = None
+    seconds = 0.0
+
+    while True:
+        command, argument = commands.get()
+        begin = time.perf_counter()
+
+        if command == 'expand':
+            if outbox is not None:
+                outbox.close()
+                outbox.unlink()
+
+            # Child and parent keys, grouped by the owner of the child
+            batches = [[] for _ in range(num_workers)]
+            for key in frontier:
+                parent = key.to_bytes(width, 'little')
+                for _, child in solver.successors(key):
+                    childKey = solver.key(child)
+                    batches[solver.owner(childKey)].append(childKey.to_bytes(width, 'little') + parent)
+            solver.expanded += len(frontier)
+
+            data = [b''.join(batch) for batch in batches]
+            bounds = [0]
+            for chunk in data:
+                bounds.append(bounds[-1] + len(chunk))
+            outbox = shared_memory.SharedMemory(create=True, size=max(1, bounds[-1]))
+            outbox.buf[:bounds[-1]] = b''.join(data)
+
+            seconds += time.perf_counter() - begin
+            results.put((idx, outbox.name, bounds, len(frontier)))
+
+        elif command == 'merge':
+            frontier = []
+            goal = None
+            for name, bounds in argument:
+                segment = shared_memory.SharedMemory(name=name)
+                data = bytes(segment.buf[bounds[idx]:bounds[idx + 1]])
+                segment.close()
+
+                for pos in range(0, len(data), 2 * width):
+                    key = int.from_bytes(data[pos:pos + width], 'little')
+                    if key in parents:
+                        continue
+                    parents[key] = int.from_bytes(data[pos + width:pos + 2 * width], 'little')
+                    frontier.append(key)
+                    if goal is None and solver.isGoal(key):
+                        goal = key
+
+            seconds += time.perf_counter() - begin
+            results.put((idx, len(frontier), goal, limit is not None and len(parents) > limit))
+
+        elif command == 'parent':
+            results.put((idx, parents[argument]))
+
+        elif command == 'stats':
+            results.put((idx, solver.expanded, solver.generated, seconds))
+
+        elif command == 'stop':
+            if outbox is not None:
+                outbox.close()
+                outbox.unlink()
+            return
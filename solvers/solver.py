@@ -0,0 +1,259 @@
+# -- Imports -- #
+
+import sys
+import time
+
+# -- Personal Imports -- #
+
+from gym_game.envs.packed_ball_sort_puzzle import PackedBallSortPuzzle
+from solvers.heuristics import colorRuns
+
+
+class BudgetExceeded(Exception):
+    """
+    Raised inside a search when it runs out of nodes or memory
+    """
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+class Solution:
+    """
+    Result of a solver
+
+    Attributes
+    ----------
+
+    status : str
+        - "solved", "unsolvable", "node budget" or "memory budget"
+
+    actions : list of int
+        - BallSortEnv action ids of an optimal solution, empty when not solved
+
+    expanded : int
+        - number of expanded boards
+
+    generated : int
+        - number of generated boards
+
+    seconds : float
+        - time spent searching
+    """
+    def __init__(self, status, actions, expanded, generated, seconds):
+        self.status = status
+        self.actions = actions
+        self.expanded = expanded
+        self.generated = generated
+        self.seconds = seconds
+
+    @property
+    def solved(self):
+        return self.status == 'solved'
+
+    def __repr__(self):
+        return "Solution(status={!r}, moves={}, expanded={}, generated={}, seconds={:.3f})".format(
+            self.status, len(self.actions), self.expanded, self.generated, self.seconds)
+
+
+class Solver:
+    """
+    Base class of the exact solvers
+
+    Boards are searched as PackedBallSortPuzzle integers and every move costs
+    one. Boards only differing by the order of the bottles are the same node
+    of the search, their transposition table key is the sorted tuple of their
+    bottles. For the same reason, only the first empty bottle is tried as a
+    destination.
+
+    Arguments
+    ---------
+
+    bottle_size : int
+        - number of balls that can fit in each bottle
+
+    num_bottles : int
+        - number of bottles in the game
+
+    heuristic : function
+        - admissible heuristic, see solvers.heuristics
+
+    max_nodes : int
+        - stops after expanding this many boards, no limit when None
+
+    max_memory : int
+        - stops when the transposition table would take more bytes, no limit when None
+
+    cache : SolutionCache
+        - boards solved before are read from it, and new results written to it
+    """
+    # Approximate bytes of a dict entry and of the tuples kept for each board
+    entryOverhead = 200
+
+    def __init__(self, bottle_size, num_bottles, heuristic=colorRuns, max_nodes=None, max_memory=None, cache=None):
+        self.bottle_size = bottle_size
+        self.num_bottles = num_bottles
+        self.heuristic = heuristic
+        self.max_nodes = max_nodes
+        self.max_memory = max_memory
+        self.cache = cache
+
+        self.game = None
+        self.expanded = 0
+        self.generated = 0
+
+    def load(self, board):
+        """
+        Sets up the game used for the move rules and resets the counters
+        """
+        self.game = PackedBallSortPuzzle(board, self.bottle_size, self.num_bottles)
+        self.expanded = 0
+        self.generated = 0
+
+    def key(self, packed):
+        """
+        Returns the transposition table key of a packed board
+        """
+        mask = self.game.bottleMask
+        return tuple(sorted((packed >> offset) & mask for offset in self.game.offsets))
+
+    def estimate(self, packed):
+        """
+        Returns the heuristic value of a packed board
+        """
+        self.game.packed = packed
+        return self.heuristic(self.game)
+
+    def isGoal(self, packed):
+        """
+        Checks if a packed board is solved
+        """
+        self.game.packed = packed
+        return self.game.isGoal()
+
+    def successors(self, packed):
+        """
+        Returns the action id and packed board of every move worth trying
+        """
+        self.game.packed = packed
+        empty = [idx for idx in range(self.num_bottles) if not self.game.getBottle(idx)]
+        successors = []
+        for action, child in self.game.getSuccessors():
+            # Moving to any empty bottle leads to the same node
+            dst = self.game.actions[action][1]
+            if dst in empty and dst != empty[0]:
+                continue
+            successors.append((action, child))
+        self.generated += len(successors)
+        return successors
+
+    def tableLimit(self, start):
+        """
+        Returns the number of boards the transposition table may hold under max_memory
+        """
+        if self.max_memory is None:
+            return None
+        key = self.key(start)
+        entry = sys.getsizeof(key) + sum(sys.getsizeof(bottle) for bottle in key) + self.entryOverhead
+        return self.max_memory // entry
+
+    def expand(self):
+        """
+        Counts one expansion, stopping when the node budget is exhausted
+        """
+        self.expanded += 1
+        if self.max_nodes is not None and self.expanded > self.max_nodes:
+            raise BudgetExceeded('node budget')
+
+    def replay(self, start, keys):
+        """
+        Returns the actions leading from a packed board through a sequence of keys
+
+        Keys forget the order of the bottles, so the moves are replayed from the
+        start board choosing, at each step, the one reaching the next key.
+
+        start : int
+            - packed board whose key is keys[0]
+
+        keys : list
+            - keys of the boards along the solution
+        """
+        actions = []
+        packed = start
+        for key in keys[1:]:
+            self.game.packed = packed
+            for action, child in self.game.getSuccessors():
+                if self.key(child) == key:
+                    actions.append(action)
+                    packed = child
+                    break
+        return actions
+
+    def solve(self, board):
+        """
+        Searches an optimal solution of a board
+
+        board : list of lists
+            - list of lists representing the game
+
+        Returns
+        -------
+
+        Solution - the optimal solution, or why there is none
+        """
+        self.load(board)
+
+        start = time.perf_counter()
+        if self.cache is not None:
+            cached = self.cached()
+            if cached is not None:
+                status, actions = cached
+                return Solution(status, actions, 0, 0, time.perf_counter() - start)
+
+        try:
+            actions = self.search(self.game.packed)
+            status = 'unsolvable' if actions is None else 'solved'
+        except BudgetExceeded as budget:
+            actions, status = None, budget.status
+
+        if self.cache is not None:
+            self.game.load(self.game.orig_packed)
+            if status == 'solved':
+                self.cache.putSolution(self.game, actions)
+            elif status == 'unsolvable':
+                self.cache.put(board, dead=True)
+                self.cache.commit()
+
+        return Solution(status, actions or [], self.expanded, self.generated, time.perf_counter() - start)
+
+    def cached(self):
+        """
+        Follows the cached best moves from the loaded board
+
+        Returns
+        -------
+
+        (str, list of int) - status and actions, None unless the cache leads to a solved board
+        """
+        entry = self.cache.get(self.game.board)
+        if entry is None:
+            return None
+        if entry.dead:
+            return 'unsolvable', []
+
+        actions = []
+        while entry is not None and entry.distance and entry.move is not None:
+            actions.append(entry.move)
+            self.game.applyMovement(entry.move)
+            entry = self.cache.get(self.game.board)
+
+        self.game.load(self.game.orig_packed)
+        if entry is None or entry.distance != 0:
+            return None
+        return 'solved', actions
+
+    def search(self, start):
+        """
+        Returns the actions of an optimal solution from a packed board, None if there is none
+        """
+        raise NotImplementedError
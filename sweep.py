@@ -0,0 +1,228 @@
+import os
+import sys
+import csv
+import json
+import time
+import random
+import itertools
+
+import gym
+import numpy as np
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from gym.envs.registration import register
+
+from algorithms import AlgorithmType, QLearning, Sarsa, DoubleQLearning
+from utils import Logger, GameSettings, WindowStats
+from main import envKwargs
+
+algorithms = {'qlearning' : QLearning, 'sarsa' : Sarsa, 'dqlearning' : DoubleQLearning}
+
+def gridTrials(space):
+    """
+    Returns every combination of the values of a grid search
+
+    space : dict
+        - param key -> list of values
+    """
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+
+def randomTrials(space, count, rng):
+    """
+    Returns count random combinations of a random search
+
+    space : dict
+        - param key -> list of values to choose from, or {"min", "max", "log"} range
+          sampled uniformly (log-uniformly when "log" is true, integers when both
+          bounds are integers)
+    """
+    return [{key: sample(values, rng) for key, values in space.items()} for _ in range(count)]
+
+def sample(values, rng):
+    """
+    Returns a random value of a random search key
+    """
+    if isinstance(values, list):
+        return rng.choice(values)
+
+    low, high = values['min'], values['max']
+    if values.get('log', False):
+        return float(np.exp(rng.uniform(np.log(low), np.log(high))))
+    if isinstance(low, int) and isinstance(high, int):
+        return rng.randint(low, high)
+    return rng.uniform(low, high)
+
+
+class EarlyKill:
+    """
+    Episode callback stopping a trial that is clearly bad: from episode `after`
+    on, the average reward of the last `window` episodes must reach min_reward
+    """
+    def __init__(self, after, window, min_reward):
+        self.after = after
+        self.window = WindowStats(window)
+        self.min_reward = min_reward
+
+    def __call__(self, algorithm, episode, reward):
+        self.window.add(reward)
+        if episode + 1 < self.after:
+            return None
+
+        average = self.window.mean
+        if average < self.min_reward:
+            return "average reward {:.2f} below {} after {} episodes".format(average, self.min_reward, episode + 1)
+        return None
+
+
+# Environment of the worker process, built once and shared by its trials
+env = None
+
+def initWorker(env_kwargs):
+    """
+    Builds the environment of a worker process
+    """
+    global env
+    register(id='ball_sort-v2',
+             entry_point='gym_game.envs:BallSortEnv',
+             kwargs=env_kwargs,
+    )
+    env = gym.make('ball_sort-v2')
+
+def status(learner):
+    """
+    Returns how a trial ended: "finished", "killed" by EarlyKill or "converged" on a stop_when criterion
+    """
+    if learner.stopped_by is None:
+        return 'finished'
+    return 'killed' if isinstance(learner.stopped_by, EarlyKill) else 'converged'
+
+def runTrial(algorithm, trial, param, seed, early_kill):
+    """
+    Trains one trial in a worker process
+
+    Returns
+    -------
+
+    dict - results row of the trial
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    env.action_space.seed(seed)
+
+    learner = algorithms[algorithm](env, param, AlgorithmType.VANILLA, False, False)
+    if early_kill is not None:
+        learner.addCallback(EarlyKill(**early_kill))
+
+    start = time.perf_counter()
+    learner.run()
+    seconds = time.perf_counter() - start
+    logFile, _ = learner.finishLog()
+
+    stats = learner.stats
+    return {'trial' : trial,
+            'seed' : seed,
+            'status' : status(learner),
+            'stop_reason' : learner.stop_reason or '',
+            'episodes' : stats.count,
+            'mean_reward' : stats.total.mean if stats.count else '',
+            'window' : stats.window.size,
+            'last_window' : stats.window.mean if stats.count else '',
+            'seconds' : round(seconds, 3),
+            'log' : logFile,
+    }
+
+
+class Sweep:
+    """
+    Hyperparameter sweep: runs one algorithm on one config file with many
+    param blocks, spread over a process pool with one environment per worker.
+    Every finished trial is appended to a single results CSV in logs/.
+
+    The sweep file (in config/) holds:
+        - "search": "grid" (default) or "random"
+        - "param": param key -> values, see gridTrials and randomTrials. Keys
+          left out keep the value of the config file
+        - "trials": number of random trials
+        - "seed": seed of the random search and of the trials (default 0)
+        - "early_kill": optional {"after", "window", "min_reward"}, see EarlyKill
+    """
+    def __init__(self, args):
+        if len(args) < 4 or args[1] not in algorithms:
+            print("Usage: sweep.py [qlearning|sarsa|dqlearning] [CONFIG] [SWEEP] { -workers N }")
+            exit(-1)
+
+        self.algorithm = args[1]
+        try:
+            self.data = self.parseJson('./config/{}'.format(args[2]))
+            self.spec = self.parseJson('./config/{}'.format(args[3]))
+        except FileNotFoundError:
+            Logger.error("Config file not found. More information on README.")
+            exit(-1)
+
+        self.workers = os.cpu_count()
+        if '-workers' in args:
+            self.workers = int(args[args.index('-workers') + 1])
+
+        if 'param' not in self.spec:
+            Logger.error("Missing param on sweep file. Check readme.")
+            exit(-1)
+
+    def parseJson(self, path):
+        with open(path) as json_file:
+            return json.load(json_file)
+
+    def trials(self):
+        """
+        Returns the param overrides of every trial
+        """
+        search = self.spec.get('search', 'grid')
+        if search == 'grid':
+            return gridTrials(self.spec['param'])
+        if search == 'random':
+            rng = random.Random(self.spec.get('seed', 0))
+            return randomTrials(self.spec['param'], self.spec.get('trials', 10), rng)
+
+        Logger.error("search should be grid or random. Check readme.")
+        exit(-1)
+
+    def run(self):
+        env_kwargs = envKwargs(self.data, GameSettings(self.data['board']))
+        trials = self.trials()
+        keys = list(self.spec['param'])
+        seed = self.spec.get('seed', 0)
+        early_kill = self.spec.get('early_kill')
+
+        os.makedirs('logs', exist_ok=True)
+        stamp = datetime.now().strftime("%H_%M_%S")
+        resultsFile = 'logs/sweep-{}-{}.csv'.format(self.algorithm, stamp)
+        columns = ['trial'] + keys + ['seed', 'status', 'stop_reason', 'episodes', 'mean_reward', 'window', 'last_window', 'seconds', 'log']
+
+        with open(resultsFile, 'w', newline='') as results_file, \
+             ProcessPoolExecutor(self.workers, initializer=initWorker, initargs=(env_kwargs,)) as pool:
+            writer = csv.DictWriter(results_file, columns)
+            writer.writeheader()
+            results_file.flush()
+
+            futures = {}
+            for trial, overrides in enumerate(trials):
+                param = dict(self.data['param'], **overrides)
+                param['log_name'] = 'sweep-{}-trial-{}'.format(stamp, trial)
+                # Concurrent trials must not share checkpoints nor the memmap work file
+                param['checkpoint_dir'] = 'checkpoints/sweep-{}-trial-{}'.format(stamp, trial)
+                future = pool.submit(runTrial, self.algorithm, trial, param, seed + trial, early_kill)
+                futures[future] = overrides
+
+            for done, future in enumerate(as_completed(futures)):
+                row = dict(future.result(), **futures[future])
+                writer.writerow(row)
+                results_file.flush()
+                print("[{}/{}] trial {} {} - last {} episodes: {}".format(
+                    done + 1, len(futures), row['trial'], row['status'], row['window'], row['last_window']))
+
+        print("Results saved to {}".format(resultsFile))
+
+
+if __name__ == "__main__":
+    sweep = Sweep(sys.argv)
+    sweep.run()
@@ -0,0 +1,79 @@
+import glob
+import json
+import os
+import random
+from copy import deepcopy
+
+import pytest
+
+from gym_game.envs.ball_sort_env import BallSortEnv
+from gym_game.envs.ball_sort_puzzle import BallSortPuzzle
+from utils.game_settings import GameSettings
+
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config')
+LEVELS = sorted(glob.glob(os.path.join(CONFIG_DIR, 'level*.json')))
+
+# Random walks played on every board and backend
+WALKS = 20
+WALK_LENGTH = 200
+
+# Share of the moves drawn among all the actions instead of the valid ones
+INVALID_SHARE = 0.2
+
+
+def makeEnv(data, backend):
+    settings = GameSettings(data['board'])
+    return BallSortEnv(data['board'], data['max_steps'], settings.bottle_size, settings.num_bottles,
+                       settings.empty_spaces, settings.num_balls, settings.ball_per_color, settings.num_colors,
+                       backend=backend)
+
+def boardOf(game):
+    return [list(bottle) for bottle in game.board]
+
+def assertSameGame(game, baseline, where):
+    assert boardOf(game) == boardOf(baseline), where
+    assert sorted(game.getValid()) == sorted(baseline.getValid()), where
+    assert game.isGoal() == baseline.isGoal(), where
+    assert game.isStuck() == baseline.isStuck(), where
+    assert game.calculateReward() == baseline.calculateReward(), where
+    assert game.getState() == baseline.getState(), where
+
+
+@pytest.mark.parametrize('backend', BallSortEnv.backends)
+@pytest.mark.parametrize('level', LEVELS, ids=os.path.basename)
+def test_backend_matches_baseline(level, backend):
+    """
+    Random walks on a BallSortEnv backend and on the baseline BallSortPuzzle give the same games
+    """
+    with open(level) as json_file:
+        data = json.load(json_file)
+
+    env = makeEnv(data, backend)
+    settings = GameSettings(data['board'])
+    rng = random.Random(0)
+
+    for walk in range(WALKS):
+        state = env.reset()
+        baseline = BallSortPuzzle(deepcopy(data['board']), settings.bottle_size, settings.num_bottles)
+        assert state == baseline.getState()
+        assertSameGame(env.game, baseline, (walk, 0))
+
+        for step in range(WALK_LENGTH):
+            valid = baseline.getValid()
+            if valid and rng.random() >= INVALID_SHARE:
+                action = rng.choice(valid)
+            else:
+                action = rng.randrange(env.action_space.n)
+
+            state, reward, done, _ = env.step(action)
+            expected = baseline.applyMovement(action)
+            if baseline.isGoal():
+                expected = settings.num_balls
+
+            where = (walk, step + 1, action)
+            assert reward == expected, where
+            assert state == baseline.getState(), where
+            assertSameGame(env.game, baseline, where)
+            if done:
+                break
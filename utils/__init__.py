@@ -1,5 +1,7 @@
 from .logger import Logger
 from .plot import Plot
 from .game_settings import GameSettings
+from .profiler import Profiler
+from .stats import RunningStats, WindowStats, Ema, P2Quantile, EpisodeStats
 
-__all__ = ['Logger', 'Plot']
\ No newline at end of file
+__all__ = ['Logger', 'Plot', 'Profiler', 'RunningStats', 'WindowStats', 'Ema', 'P2Quantile', 'EpisodeStats']
\ No newline at end of file
@@ -2,14 +2,46 @@
 # -- Imports -- #
 
 import os
+import time
+import numpy as np
 from datetime import datetime
+from itertools import islice
 
 
 class Logger:
     """
     Class for representing the logs of the algorithms
+
+    The episodes are appended to a preallocated NumPy chunk, written to the
+    -all file in bulk once chunk_size episodes are waiting or flush_seconds
+    have passed since the last write, and when the logs are closed.
+
+    Columns of the -all file, see LOG_DTYPE:
+        - episode, reward, steps, solved, epsilon (exploration rate used during
+          the episode), seconds (wall time since the logger was created)
+
+    Logs written before these columns hold only episode,reward, readLog and
+    csvColumns tell them apart by their number of columns.
+
+    Formats:
+        - "csv" (default) - one line per episode, without header
+        - "npy" - a structured .npy file, its header is rewritten on every
+          write, so the file is always complete and can be memory-mapped
+          while training runs
     """
-    def __init__(self, algorithm):
+    LOG_DTYPE = np.dtype([('episode', np.int64), ('reward', np.int64), ('steps', np.int32),
+                          ('solved', np.bool_), ('epsilon', np.float64), ('seconds', np.float64)])
+    CSV_FORMAT = '%d,%d,%d,%d,%.6g,%.3f\n'
+    LEGACY_COLUMNS = ('episode', 'reward')
+    formats = ('csv', 'npy')
+
+    # Bytes reserved for the .npy header, enough for any number of episodes
+    NPY_HEADER_SIZE = 256
+
+    def __init__(self, algorithm, name=None, log_format='csv', chunk_size=4096, flush_seconds=10):
+        if log_format not in self.formats:
+            raise ValueError("Unknown log format '{}'".format(log_format))
+
         self._dir = "logs/"
         
         try:
@@ -17,27 +49,139 @@ class Logger:
         except FileExistsError:
             pass
         
-        time = datetime.now().strftime("%H_%M_%S")
-        self._logAllFile = self._dir + algorithm + '-' +time + '-all.csv'
-        self._logAvgFile = self._dir + algorithm + '-' +time + '-avg.csv'
-        self.log = open(self._logAllFile, "w")
+        time_str = datetime.now().strftime("%H_%M_%S")
+        if name is not None:
+            time_str += '-' + name
+        self._logAllFile = self._dir + algorithm + '-' + time_str + '-all.' + log_format
+        self._logAvgFile = self._dir + algorithm + '-' + time_str + '-avg.csv'
+        self.log_format = log_format
+        self.log = open(self._logAllFile, "w" if log_format == 'csv' else "wb")
         self.avg = open(self._logAvgFile, "w")
+
+        self.chunk = np.zeros(chunk_size, dtype=self.LOG_DTYPE)
+        self.pending = 0
+        self.written = 0
+        self.flush_seconds = flush_seconds
+        self.start = self.lastFlush = time.perf_counter()
+
+        if log_format == 'npy':
+            self.writeNpyHeader()
     
     def closeLogs(self):
+        self.flush()
         self.log.close()
         self.avg.close()
 
         return self._logAllFile, self._logAvgFile
 
-    def writeLog(self, episode, rewards):
-        self.log.write(str(episode) + "," + str(rewards) + "\n")
+    def writeLog(self, episode, rewards, steps=0, solved=False, epsilon=0.0):
+        now = time.perf_counter()
+        self.chunk[self.pending] = (episode, rewards, steps, solved, epsilon, now - self.start)
+        self.pending += 1
+
+        if self.pending == len(self.chunk) or now - self.lastFlush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        """
+        Writes the episodes waiting in the chunk
+        """
+        self.lastFlush = time.perf_counter()
+        if not self.pending:
+            return
+
+        rows = self.chunk[:self.pending]
+        if self.log_format == 'csv':
+            self.log.write(''.join(self.CSV_FORMAT % row for row in rows.tolist()))
+        else:
+            self.log.write(rows.tobytes())
+            self.written += self.pending
+            self.writeNpyHeader()
+        self.log.flush()
+        self.pending = 0
+
+    def writeNpyHeader(self):
+        """
+        Writes the .npy header of the episodes written so far, padded to a fixed size
+        """
+        header = "{{'descr': {!r}, 'fortran_order': False, 'shape': ({},), }}".format(
+            np.lib.format.dtype_to_descr(self.LOG_DTYPE), self.written)
+        header = header.ljust(self.NPY_HEADER_SIZE - 10 - 1) + '\n'
+
+        end = self.log.tell()
+        self.log.seek(0)
+        self.log.write(np.lib.format.magic(1, 0) + np.uint16(len(header)).tobytes() + header.encode('latin1'))
+        if end: self.log.seek(end)
+
+    @staticmethod
+    def csvColumns(path):
+        """
+        Returns the columns of a .csv -all log, LOG_DTYPE names (also for an
+        empty log) or LEGACY_COLUMNS
+
+        Raises a ValueError when the log has any other number of columns
+        """
+        with open(path) as log_file:
+            line = log_file.readline()
+        if not line.strip():
+            return Logger.LOG_DTYPE.names
+
+        width = line.count(',') + 1
+        for columns in (Logger.LOG_DTYPE.names, Logger.LEGACY_COLUMNS):
+            if width == len(columns):
+                return columns
+        raise ValueError("{} has {} columns, expected {} or {} for a legacy log".format(
+            path, width, ",".join(Logger.LOG_DTYPE.names), ",".join(Logger.LEGACY_COLUMNS)))
+
+    @staticmethod
+    def readLog(path, chunk_size=65536):
+        """
+        Reads an -all log chunk by chunk, without loading the whole run
+
+        path : str
+            - .csv or .npy log written by writeLog, or a legacy episode,reward
+              .csv log whose other columns are read as 0 (nan for epsilon and
+              seconds)
+
+        Returns
+        -------
+
+        generator of arrays of LOG_DTYPE - consecutive episodes of the log
+        """
+        if path.endswith('.npy'):
+            log = np.load(path, mmap_mode='r')
+            for start in range(0, len(log), chunk_size):
+                yield np.array(log[start:start + chunk_size])
+            return
+
+        legacy = Logger.csvColumns(path) == Logger.LEGACY_COLUMNS
+        with open(path) as log_file:
+            while True:
+                lines = list(islice(log_file, chunk_size))
+                if not lines:
+                    return
+                if not legacy:
+                    yield np.loadtxt(lines, delimiter=',', dtype=Logger.LOG_DTYPE, ndmin=1)
+                    continue
+
+                values = np.loadtxt(lines, delimiter=',', ndmin=2)
+                chunk = np.zeros(len(values), dtype=Logger.LOG_DTYPE)
+                chunk['episode'], chunk['reward'] = values[:, 0], values[:, 1]
+                chunk['epsilon'] = chunk['seconds'] = np.nan
+                yield chunk
 
-    def writeAvgRewards(self, count, r):
-        self.avg.write(str(count) + "," + str(sum(r / 100)) + "\n")
+    def writeAvg(self, columns, row):
+        """
+        Writes a row of the -avg log, preceded by the columns on the first call
+        """
+        if self.avg.tell() == 0:
+            self.avg.write(",".join(columns) + "\n")
+        self.avg.write(str(row[0]) + "," + ",".join("{:.6g}".format(value) for value in row[1:]) + "\n")
+        self.avg.flush()
     
     @staticmethod
-    def printAvgRewards(count, r):
-        print(count, ": ", str(sum(r / 100)))
+    def printAvgRewards(count, average):
+        print(count, ": ", str(average))
 
     @staticmethod
     def newEpisode(episode):
@@ -48,8 +192,8 @@ class Logger:
         print("Done - Step: {}".format(step))
 
     @staticmethod
-    def finish(rewards_all_episodes, num_episodes, exploration_rate):
-        print("Performace: " +  str(sum(rewards_all_episodes)/num_episodes))
+    def finish(mean_reward, exploration_rate):
+        print("Performace: " +  str(mean_reward))
         print("Exploration Rate: ", exploration_rate)
 
     @staticmethod
@@ -60,13 +204,19 @@ class Logger:
         print("     - More information on README. You can also use one of your config file, by passing \"level1.json\" without quotes\n")
         print("Algorithms:")
         print("     - qlearning")
+        print("     - pqlearning")
         print("     - sarsa")
         print("     - dqlearning")
+        print("     - valueiteration")
+        print("     - policyiteration")
         print("     - ppo\n")
         print("OPTIONS:")
         print("     -plot")
         print("     -verbose")
         print("     -render")
+        print("     -debug")
+        print("     -resume")
+        print("     -profile")
 
     @staticmethod
     def error(message):
@@ -3,6 +3,8 @@ import pandas as pd
 
 import matplotlib.pyplot as plt 
 
+from utils.logger import Logger
+
 class Plot:
     """
     Class to plot the results of the algorithms
@@ -27,4 +29,237 @@ class Plot:
         plt.title('Average reward per Timesteps') 
             
         # function to show the plot 
-        plt.show() 
\ No newline at end of file
+        plt.show() 
+
+
+class BinnedSeries:
+    """
+    Fixed memory summary of a series of any length, fed chunk by chunk
+
+    Consecutive points are grouped in bins of width points, keeping their
+    count, sum, min and max. When more than max_bins bins would be needed,
+    adjacent bins are merged in pairs and the width doubles, so every series
+    built with the same max_bins has a power of two width and can be aligned
+    with the others.
+    """
+    def __init__(self, max_bins=2048):
+        self.max_bins = max_bins + max_bins % 2
+        self.width = 1
+        self.length = 0
+        self.counts = np.zeros(self.max_bins, dtype=np.int64)
+        self.sums = np.zeros(self.max_bins)
+        self.mins = np.full(self.max_bins, np.inf)
+        self.maxs = np.full(self.max_bins, -np.inf)
+
+    @property
+    def num_bins(self):
+        return -(-self.length // self.width)
+
+    def merge(self):
+        """
+        Merges adjacent bins in pairs, doubling the width
+        """
+        half = self.max_bins // 2
+        self.counts[:half] = self.counts.reshape(-1, 2).sum(axis=1)
+        self.sums[:half] = self.sums.reshape(-1, 2).sum(axis=1)
+        self.mins[:half] = self.mins.reshape(-1, 2).min(axis=1)
+        self.maxs[:half] = self.maxs.reshape(-1, 2).max(axis=1)
+
+        self.counts[half:] = 0
+        self.sums[half:] = 0
+        self.mins[half:] = np.inf
+        self.maxs[half:] = -np.inf
+        self.width *= 2
+
+    def add(self, values):
+        """
+        Appends consecutive points
+        """
+        if not len(values):
+            return
+        values = np.asarray(values, dtype=np.float64)
+
+        start = self.length
+        self.length += len(values)
+        while self.num_bins > self.max_bins:
+            self.merge()
+
+        # Split the chunk at the bin boundaries it crosses
+        first, last = start // self.width, (self.length - 1) // self.width
+        splits = np.concatenate(([0], np.arange(first + 1, last + 1) * self.width - start))
+        bins = slice(first, last + 1)
+
+        self.counts[bins] += np.diff(np.append(splits, len(values)))
+        self.sums[bins] += np.add.reduceat(values, splits)
+        self.mins[bins] = np.minimum(self.mins[bins], np.minimum.reduceat(values, splits))
+        self.maxs[bins] = np.maximum(self.maxs[bins], np.maximum.reduceat(values, splits))
+
+    def widen(self, width):
+        """
+        Merges bins until they are width points wide
+        """
+        while self.width < width:
+            self.merge()
+
+    def x(self):
+        """
+        Returns the middle point of every bin
+        """
+        num_bins = self.num_bins
+        return np.arange(num_bins) * self.width + (self.counts[:num_bins] - 1) / 2
+
+    def means(self):
+        num_bins = self.num_bins
+        return self.sums[:num_bins] / self.counts[:num_bins]
+
+    def envelope(self):
+        """
+        Returns the min and max of every bin
+        """
+        num_bins = self.num_bins
+        return self.mins[:num_bins], self.maxs[:num_bins]
+
+
+def readColumn(path, column, chunk_size=1 << 20):
+    """
+    Reads one column of an -all log chunk by chunk
+
+    path : str
+        - .csv or .npy log written by Logger.writeLog, or a legacy
+          episode,reward .csv log, which only has those two columns
+    """
+    if path.endswith('.npy'):
+        for chunk in Logger.readLog(path, chunk_size):
+            yield chunk[column]
+        return
+
+    try:
+        columns = Logger.csvColumns(path)
+    except ValueError as error:
+        Logger.error(error)
+        exit(-1)
+    if column not in columns:
+        Logger.error("{} is a legacy log with only the {} columns, it has no {}".format(path, ",".join(columns), column))
+        exit(-1)
+
+    for chunk in pd.read_csv(path, header=None, names=columns, usecols=[column], chunksize=chunk_size):
+        yield chunk[column].to_numpy()
+
+
+def lttb(x, y, threshold):
+    """
+    Largest Triangle Three Buckets downsampling
+
+    Keeps the first and last points and, from each of threshold - 2 buckets,
+    the point making the largest triangle with the point kept before it and
+    the mean of the next bucket.
+
+    Returns
+    -------
+
+    array of int - indices of the points kept
+    """
+    length = len(x)
+    if threshold >= length or threshold < 3:
+        return np.arange(length)
+
+    edges = (np.arange(threshold - 1) * (length - 2) / (threshold - 2)).astype(np.int64) + 1
+    edges[-1] = length - 1
+
+    kept = np.zeros(threshold, dtype=np.int64)
+    previous = 0
+    for bucket in range(threshold - 2):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        nextLo, nextHi = hi, edges[bucket + 2] if bucket + 2 < len(edges) else length
+        nextX, nextY = x[nextLo:nextHi].mean(), y[nextLo:nextHi].mean()
+
+        areas = np.abs((x[previous] - nextX) * (y[lo:hi] - y[previous]) -
+                       (x[previous] - x[lo:hi]) * (nextY - y[previous]))
+        previous = lo + int(np.argmax(areas))
+        kept[bucket + 1] = previous
+
+    kept[-1] = length - 1
+    return kept
+
+
+class MultiRunPlot:
+    """
+    Plots many -all logs, grouped by label, with bounded memory
+
+    Each log is streamed into a BinnedSeries. A group of a single run is
+    drawn as the mean of every bin inside its min/max envelope; a group of
+    several runs (seeds) as the mean of the runs inside a 95% confidence band.
+    The lines can be thinned further with LTTB.
+
+    Attributes
+    ----------
+    groups : dict
+        - label -> list of log paths
+    """
+    def __init__(self, groups, column='reward', bins=2048, lttb_points=None):
+        self.groups = groups
+        self.column = column
+        self.bins = bins
+        self.lttb_points = lttb_points
+
+    def series(self, path):
+        """
+        Returns the BinnedSeries of a log
+        """
+        binned = BinnedSeries(self.bins)
+        for chunk in readColumn(path, self.column):
+            binned.add(chunk)
+        return binned
+
+    def summarize(self, paths):
+        """
+        Returns the x, line and band of a group of logs
+        """
+        runs = [self.series(path) for path in paths]
+        if len(runs) == 1:
+            return (runs[0].x(), runs[0].means()) + runs[0].envelope()
+
+        # Align the runs on the widest bins, shorter runs stop early
+        width = max(run.width for run in runs)
+        for run in runs:
+            run.widen(width)
+        longest = max(runs, key=lambda run: run.num_bins)
+
+        means = np.full((len(runs), longest.num_bins), np.nan)
+        for idx, run in enumerate(runs):
+            means[idx, :run.num_bins] = run.means()
+
+        counts = np.sum(~np.isnan(means), axis=0)
+        mean = np.nanmean(means, axis=0)
+        variance = np.nansum((means - mean) ** 2, axis=0) / np.maximum(counts - 1, 1)
+        half = 1.96 * np.sqrt(variance / counts)
+        return longest.x(), mean, mean - half, mean + half
+
+    def render(self, output=None, title=None):
+        """
+        Draws every group, to output (.png, .svg or any matplotlib format)
+        without a display, or to a window when output is None
+        """
+        if output is not None:
+            plt.switch_backend('Agg')
+
+        figure, axes = plt.subplots(figsize=(10, 6))
+        for label, paths in self.groups.items():
+            x, line, low, high = self.summarize(paths)
+            if self.lttb_points:
+                kept = lttb(x, line, self.lttb_points)
+                x, line, low, high = x[kept], line[kept], low[kept], high[kept]
+
+            lines = axes.plot(x, line, label='{} ({} runs)'.format(label, len(paths)), linewidth=1)
+            axes.fill_between(x, low, high, color=lines[0].get_color(), alpha=0.25, linewidth=0)
+
+        axes.set_xlabel('Episode')
+        axes.set_ylabel(self.column.capitalize())
+        axes.set_title(title or 'Average {} per episode'.format(self.column))
+        axes.legend()
+
+        if output is None:
+            plt.show()
+        else:
+            figure.savefig(output, bbox_inches='tight')
+        plt.close(figure)
@@ -0,0 +1,119 @@
+import json
+import time
+from time import perf_counter_ns
+
+
+class Profiler:
+    """
+    Per-phase call counters and timers, installed by patching methods at runtime
+
+    Nothing is patched until instrument is called, so a run without -profile
+    pays nothing. Every call of an instrumented method is counted, and one
+    call out of sample_every is timed with perf_counter_ns; the total time of
+    a phase is estimated from its timed calls. Phases nest, the time of
+    BallSortEnv.step includes the puzzle methods it calls.
+
+    Attributes
+    ----------
+    counters : dict
+        - phase name -> [calls, timed calls, timed nanoseconds]
+    """
+    def __init__(self, sample_every=8):
+        self.sample_every = sample_every
+        self.counters = {}
+        self.patched = []
+        self.start = self.end = None
+
+    def wrap(self, function, name):
+        """
+        Returns function counting its calls and timing one out of sample_every
+        """
+        counter = self.counters.setdefault(name, [0, 0, 0])
+        every = self.sample_every
+
+        def profiled(*args, **kwargs):
+            counter[0] += 1
+            if counter[0] % every:
+                return function(*args, **kwargs)
+
+            start = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                counter[2] += perf_counter_ns() - start
+                counter[1] += 1
+
+        return profiled
+
+    def instrument(self, cls, methods):
+        """
+        Patches the methods of a class that exist, phases are named Class.method
+        """
+        for method in methods:
+            function = cls.__dict__.get(method)
+            if function is None or not callable(function):
+                continue
+            self.patched.append((cls, method, function))
+            setattr(cls, method, self.wrap(function, '{}.{}'.format(cls.__name__, method)))
+
+    def restore(self):
+        """
+        Puts back every patched method
+        """
+        for cls, method, function in reversed(self.patched):
+            setattr(cls, method, function)
+        self.patched = []
+
+    def calls(self, name):
+        return self.counters.get(name, [0])[0]
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.end = time.perf_counter()
+        self.restore()
+        return False
+
+    def report(self, episodes, steps):
+        """
+        Returns the report of the profiled run
+
+        episodes, steps : int
+            - number of episodes and environment steps played
+        """
+        seconds = (self.end or time.perf_counter()) - self.start
+        phases = {}
+        for name, (calls, timed, nanoseconds) in self.counters.items():
+            if not calls:
+                continue
+            perCall = nanoseconds / timed if timed else 0.0
+            phases[name] = {'calls' : calls,
+                            'seconds' : perCall * calls / 1e9,
+                            'ns_per_call' : perCall,
+                            'percent' : 100 * perCall * calls / 1e9 / seconds if seconds else 0.0}
+
+        return {'seconds' : seconds,
+                'episodes' : episodes,
+                'steps' : steps,
+                'episodes_per_second' : episodes / seconds if seconds else 0.0,
+                'steps_per_second' : steps / seconds if seconds else 0.0,
+                'sample_every' : self.sample_every,
+                'phases' : dict(sorted(phases.items(), key=lambda item: -item[1]['seconds'])),
+        }
+
+    @staticmethod
+    def printReport(report):
+        print("Profile: {:.3f}s, {} episodes ({:.1f}/s), {} steps ({:.1f}/s)".format(
+            report['seconds'], report['episodes'], report['episodes_per_second'],
+            report['steps'], report['steps_per_second']))
+        print("{:<40}{:>12}{:>12}{:>12}{:>8}".format("Phase", "Calls", "Seconds", "ns/call", "%"))
+        for name, phase in report['phases'].items():
+            print("{:<40}{:>12}{:>12.3f}{:>12.0f}{:>8.1f}".format(
+                name, phase['calls'], phase['seconds'], phase['ns_per_call'], phase['percent']))
+
+    @staticmethod
+    def saveReport(report, path):
+        with open(path, 'w') as report_file:
+            json.dump(report, report_file, indent=4)
@@ -0,0 +1,209 @@
+import numpy as np
+
+
+class RunningStats:
+    """
+    Mean and variance of every value seen so far (Welford's algorithm)
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self):
+        return self.variance ** 0.5
+
+
+class WindowStats:
+    """
+    Mean and variance of the last size values, kept in a ring buffer with
+    running sums
+    """
+    def __init__(self, size):
+        self.size = size
+        self.values = np.zeros(size)
+        self.count = 0
+        self.total = 0.0
+        self.squares = 0.0
+
+    def add(self, value):
+        idx = self.count % self.size
+        if self.count >= self.size:
+            old = self.values[idx]
+            self.total -= old
+            self.squares -= old * old
+        self.values[idx] = value
+        self.total += value
+        self.squares += value * value
+        self.count += 1
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    @property
+    def mean(self):
+        return self.total / len(self) if self.count else 0.0
+
+    @property
+    def variance(self):
+        if not self.count:
+            return 0.0
+        mean = self.mean
+        return max(self.squares / len(self) - mean * mean, 0.0)
+
+    @property
+    def std(self):
+        return self.variance ** 0.5
+
+
+class Ema:
+    """
+    Exponential moving average, starting at the first value
+    """
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.value = None
+
+    def add(self, value):
+        if self.value is None:
+            self.value = float(value)
+        else:
+            self.value += self.alpha * (value - self.value)
+
+
+class P2Quantile:
+    """
+    Streaming estimate of a quantile with five markers (P-square algorithm,
+    Jain and Chlamtac), exact for the first five values
+    """
+    def __init__(self, p):
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, value):
+        heights, positions = self.heights, self.positions
+        if len(heights) < 5:
+            heights.append(value)
+            heights.sort()
+            return
+
+        # Cell of the new value, moving the extreme markers when needed
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+
+        for idx in range(cell + 1, 5):
+            positions[idx] += 1
+        for idx in range(5):
+            self.desired[idx] += self.increments[idx]
+
+        # Move the middle markers towards their desired positions
+        for idx in range(1, 4):
+            offset = self.desired[idx] - positions[idx]
+            if (offset >= 1 and positions[idx + 1] - positions[idx] > 1) or \
+               (offset <= -1 and positions[idx - 1] - positions[idx] < -1):
+                step = 1 if offset > 0 else -1
+                height = self.parabolic(idx, step)
+                if not heights[idx - 1] < height < heights[idx + 1]:
+                    height = heights[idx] + step * (heights[idx + step] - heights[idx]) / \
+                        (positions[idx + step] - positions[idx])
+                heights[idx] = height
+                positions[idx] += step
+
+    def parabolic(self, idx, step):
+        """
+        Returns the piecewise parabolic prediction of a marker moved by step
+        """
+        h, n = self.heights, self.positions
+        return h[idx] + step / (n[idx + 1] - n[idx - 1]) * \
+            ((n[idx] - n[idx - 1] + step) * (h[idx + 1] - h[idx]) / (n[idx + 1] - n[idx]) +
+             (n[idx + 1] - n[idx] - step) * (h[idx] - h[idx - 1]) / (n[idx] - n[idx - 1]))
+
+    @property
+    def value(self):
+        if not self.heights:
+            return 0.0
+        if len(self.heights) < 5 or self.positions[4] == 5:
+            return float(np.quantile(self.heights, self.p))
+        return self.heights[2]
+
+
+class EpisodeStats:
+    """
+    Online statistics of the episode rewards, O(1) time and memory per episode
+
+    Attributes
+    ----------
+    total : RunningStats
+        - mean and variance of every episode
+
+    window : WindowStats
+        - mean and variance of the last window episodes
+
+    ema : Ema
+        - exponential moving average of the rewards
+
+    quantiles : list of P2Quantile
+        - estimated quantiles of every episode
+    """
+    COLUMNS = ['episodes', 'window_mean', 'window_std', 'ema', 'mean']
+
+    def __init__(self, window=100, ema_alpha=0.01, quantiles=(0.5,)):
+        self.total = RunningStats()
+        self.window = WindowStats(window)
+        self.ema = Ema(ema_alpha)
+        self.quantiles = [P2Quantile(p) for p in quantiles]
+
+    def add(self, reward):
+        """
+        Adds the reward of an episode
+
+        Returns
+        -------
+
+        bool - True when a whole window has just been completed
+        """
+        self.total.add(reward)
+        self.window.add(reward)
+        self.ema.add(reward)
+        for quantile in self.quantiles:
+            quantile.add(reward)
+        return self.total.count % self.window.size == 0
+
+    @property
+    def count(self):
+        return self.total.count
+
+    def columns(self):
+        """
+        Returns the names of the values of row
+        """
+        return self.COLUMNS + ['q{:g}'.format(quantile.p * 100) for quantile in self.quantiles]
+
+    def row(self):
+        """
+        Returns the current statistics, see columns
+        """
+        return [self.count, self.window.mean, self.window.std, self.ema.value or 0.0, self.total.mean] + \
+            [quantile.value for quantile in self.quantiles]